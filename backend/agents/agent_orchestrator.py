@@ -3,27 +3,49 @@ Agent Orchestrator
 Orchestrates multiple AI agents for complex alert processing tasks
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import logging
 import asyncio
 
+from core.config import settings
+from services.time_utils import isoformat
+from services.temporal_correlation import temporal_clusters
+from services.topology import ServiceTopology
+from services.text_similarity import TextSimilarityIndex
+from services.correlation_grouping import group_edges
+from services.entity_extraction import EntityIndex
+
 logger = logging.getLogger(__name__)
 
 
 class AgentOrchestrator:
     """Orchestrate multiple agents for complex tasks"""
     
-    def __init__(self, bedrock_manager, strands_manager):
+    def __init__(self, bedrock_manager, strands_manager, correlation_window: Optional[float] = None,
+                 topology: Optional[ServiceTopology] = None,
+                 text_index: Optional[TextSimilarityIndex] = None,
+                 entity_index: Optional[EntityIndex] = None):
         """
         Initialize orchestrator with agent managers
         
         Args:
             bedrock_manager: Bedrock AgentCore manager instance
             strands_manager: Strands Agents manager instance
+            correlation_window: Temporal correlation window in seconds
+                                (defaults to ALERT_CORRELATION_WINDOW)
+            topology: Service dependency graph for cross-service correlation
+            text_index: Rolling text similarity index of recent alerts
+            entity_index: Recent alerts per canonical host/pod/service entity
         """
         self.bedrock_manager = bedrock_manager
         self.strands_manager = strands_manager
+        self.correlation_window = (
+            correlation_window if correlation_window is not None else settings.ALERT_CORRELATION_WINDOW
+        )
+        self.topology = topology
+        self.text_index = text_index
+        self.entity_index = entity_index or EntityIndex(window_seconds=self.correlation_window)
         self.processing_stats = {
             "total_processed": 0,
             "phases_completed": 0,
@@ -140,6 +162,11 @@ class AgentOrchestrator:
                 "source": "agent_orchestrator"
             })
             
+            # Normalize the hosts, pods and services the alert refers to,
+            # unless ingest already did
+            if "entities" not in alert:
+                self.entity_index.extractor.annotate(alert)
+            
             # Add severity context
             severity = alert.get("severity", "unknown")
             alert["enrichments"].append({
@@ -184,38 +211,132 @@ class AgentOrchestrator:
                 for alert in service_alerts:
                     alert["correlation_id"] = correlation["correlation_id"]
         
-        # Find temporal correlations (alerts within 5 minutes)
+        # Find correlations across services that depend on each other
+        if self.topology:
+            correlations.extend(self._find_topology_correlations(service_groups))
+        
+        # Find alerts sharing a host, pod or service under any label key
+        correlations.extend(self._find_entity_correlations(alerts))
+        
+        # Find alerts with similar text, including earlier batches
+        if self.text_index:
+            correlations.extend(self._find_text_correlations(alerts))
+        
+        # Find temporal correlations (alerts within the correlation window)
         temporal_correlations = self._find_temporal_correlations(alerts)
         correlations.extend(temporal_correlations)
         
         logger.info(f"Correlation phase found {len(correlations)} correlations")
         return correlations
     
+    def _find_topology_correlations(self, service_groups: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Group alerting services linked through the topology
+        
+        Services within the topology's hop limit of each other are linked,
+        and groups are the connected components of those links, so two
+        members may be further apart than the hop limit when alerting
+        services lie between them (web -> api -> database with max_hops=1).
+        """
+        topology_correlations = []
+        # Alerting services by their name in the topology
+        by_name: Dict[str, List[str]] = {}
+        for service in service_groups:
+            by_name.setdefault(self.topology.normalize(service), []).append(service)
+        unvisited = set(by_name)
+        
+        for name in list(by_name):
+            if name not in unvisited:
+                continue
+            unvisited.discard(name)
+            names, frontier = [name], [name]
+            while frontier:
+                linked = self.topology.neighbors(frontier.pop()) & unvisited
+                unvisited -= linked
+                names.extend(linked)
+                frontier.extend(linked)
+            component = [service for linked_name in names for service in by_name[linked_name]]
+            if len(component) < 2:
+                continue
+            service = component[0]
+            
+            members = [alert for member in component for alert in service_groups[member]]
+            correlation = {
+                "correlation_id": f"topology_{service}_{datetime.now().timestamp()}",
+                "type": "topology",
+                "services": sorted(component),
+                "alert_count": len(members),
+                "confidence": 0.8,
+                "pattern": "dependency_failure",
+                "alerts": [alert["id"] for alert in members],
+                "timestamp": datetime.now().isoformat()
+            }
+            topology_correlations.append(correlation)
+        
+        return topology_correlations
+    
+    def _find_entity_correlations(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group alerts that share a canonical entity, by hash lookup in the entity index"""
+        edges = []
+        for alert in alerts:
+            for related_id, (kind, _) in self.entity_index.add(alert):
+                edges.append((alert["id"], related_id, 0.8, f"entity_{kind}"))
+        
+        entity_correlations = []
+        for group in group_edges(edges, items=[alert["id"] for alert in alerts]):
+            correlation = {
+                "correlation_id": f"entity_{group['group_id']}",
+                "type": "entity",
+                "alert_count": group["alert_count"],
+                "confidence": group["confidence"],
+                "pattern": "shared_entity",
+                "entity_types": [name[len("entity_"):] for name in group["correlation_types"]],
+                "alerts": group["alert_ids"],
+                "timestamp": datetime.now().isoformat()
+            }
+            entity_correlations.append(correlation)
+        
+        return entity_correlations
+    
+    def _find_text_correlations(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Group alerts whose TF-IDF text vectors are above the similarity threshold"""
+        edges = []
+        for alert in alerts:
+            for similar_id, similarity in self.text_index.add(alert):
+                edges.append((alert["id"], similar_id, similarity, "text_similarity"))
+        
+        text_correlations = []
+        for group in group_edges(edges, items=[alert["id"] for alert in alerts]):
+            correlation = {
+                "correlation_id": f"text_{group['group_id']}",
+                "type": "text_similarity",
+                "alert_count": group["alert_count"],
+                "confidence": group["confidence"],
+                "pattern": "similar_content",
+                "alerts": group["alert_ids"],
+                "timestamp": datetime.now().isoformat()
+            }
+            text_correlations.append(correlation)
+        
+        return text_correlations
+    
     def _find_temporal_correlations(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Find temporal correlations between alerts"""
+        """Find clusters of alerts within the correlation window of each other"""
         temporal_correlations = []
         
-        # Sort alerts by timestamp
-        sorted_alerts = sorted(alerts, key=lambda x: x.get("created_at", ""))
-        
-        for i, alert1 in enumerate(sorted_alerts):
-            for alert2 in sorted_alerts[i+1:]:
-                # Check if alerts are within 5 minutes
-                time1 = datetime.fromisoformat(alert1.get("created_at", "2024-01-01T00:00:00").replace("Z", ""))
-                time2 = datetime.fromisoformat(alert2.get("created_at", "2024-01-01T00:00:00").replace("Z", ""))
-                
-                time_diff = abs((time2 - time1).total_seconds())
-                if time_diff <= 300:  # 5 minutes
-                    correlation = {
-                        "correlation_id": f"temporal_{alert1['id']}_{alert2['id']}",
-                        "type": "temporal",
-                        "alert_count": 2,
-                        "confidence": 0.75,
-                        "pattern": "temporal_proximity",
-                        "alerts": [alert1["id"], alert2["id"]],
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    temporal_correlations.append(correlation)
+        for start, end, members in temporal_clusters(alerts, self.correlation_window):
+            correlation = {
+                "correlation_id": f"temporal_{members[0]['id']}_{len(members)}",
+                "type": "temporal",
+                "alert_count": len(members),
+                "confidence": 0.75,
+                "pattern": "temporal_proximity",
+                "alerts": [alert["id"] for alert in members],
+                "window_start": isoformat(start),
+                "window_end": isoformat(end),
+                "timestamp": datetime.now().isoformat()
+            }
+            temporal_correlations.append(correlation)
         
         return temporal_correlations
     
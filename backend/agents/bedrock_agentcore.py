@@ -14,6 +14,8 @@ from datetime import datetime
 # from botocore.exceptions import ClientError, BotoCoreError
 
 from core.config import settings
+from services.similarity_join import jaccard, similar_pairs
+from services.correlation_grouping import group_edges
 
 logger = logging.getLogger(__name__)
 
@@ -128,30 +130,43 @@ class BedrockAgentCoreManager:
             return {"status": "success", "message": "Agent executed successfully"}
     
     async def _correlate_alerts(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Correlate alerts using AI"""
+        """
+        Correlate alerts using AI
+        
+        Returns groups of correlated alerts with their member ids and edges;
+        the flat pair list is only included when the payload sets
+        include_pairs.
+        """
         alerts = payload.get("alerts", [])
         
-        # Simulate correlation logic
-        correlations = []
-        for i, alert1 in enumerate(alerts):
-            for j, alert2 in enumerate(alerts[i+1:], i+1):
-                # Simple correlation based on similarity
-                similarity = self._calculate_similarity(alert1, alert2)
-                if similarity > 0.7:  # 70% similarity threshold
-                    correlations.append({
-                        "alert1_id": alert1.get("id"),
-                        "alert2_id": alert2.get("id"),
-                        "correlation_type": "similarity",
-                        "confidence": similarity,
-                        "reason": "High similarity in alert content and context"
-                    })
+        # Simulate correlation logic: only alerts sharing a rare title word
+        # are compared, with each title tokenized once
+        token_sets = [self._title_words(alert) for alert in alerts]
+        edges = [
+            (alerts[i].get("id"), alerts[j].get("id"), similarity, "similarity")
+            for i, j, similarity in similar_pairs(token_sets, 0.7)  # 70% similarity threshold
+        ]
+        groups = group_edges(edges, items=[alert.get("id") for alert in alerts], include_edges=True)
         
-        return {
+        result = {
             "status": "success",
-            "correlations": correlations,
+            "groups": groups,
             "total_alerts": len(alerts),
-            "correlation_count": len(correlations)
+            "correlation_count": len(edges),
+            "group_count": len(groups)
         }
+        if payload.get("include_pairs"):
+            result["correlations"] = [
+                {
+                    "alert1_id": first,
+                    "alert2_id": second,
+                    "correlation_type": correlation_type,
+                    "confidence": confidence,
+                    "reason": "High similarity in alert content and context"
+                }
+                for first, second, confidence, correlation_type in edges
+            ]
+        return result
     
     async def _enrich_alert(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Enrich alert with additional context"""
@@ -217,22 +232,12 @@ class BedrockAgentCoreManager:
     def _calculate_similarity(self, alert1: Dict[str, Any], alert2: Dict[str, Any]) -> float:
         """Calculate similarity between two alerts"""
         # Simple similarity calculation based on title and labels
-        title1 = alert1.get("title", "").lower()
-        title2 = alert2.get("title", "").lower()
-        
-        # Calculate Jaccard similarity
-        words1 = set(title1.split())
-        words2 = set(title2.split())
-        
-        if not words1 and not words2:
-            return 1.0
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = len(words1.intersection(words2))
-        union = len(words1.union(words2))
-        
-        return intersection / union if union > 0 else 0.0
+        return jaccard(self._title_words(alert1), self._title_words(alert2))
+    
+    @staticmethod
+    def _title_words(alert: Dict[str, Any]) -> set:
+        """Lower-cased word set of an alert title"""
+        return set(alert.get("title", "").lower().split())
     
     def _is_noise(self, alert: Dict[str, Any]) -> bool:
         """Determine if an alert is noise"""
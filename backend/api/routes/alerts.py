@@ -339,9 +339,8 @@ async def _process_correlations(correlations: List[dict], db: Session):
     """Process correlations in background"""
     try:
         correlation_service = CorrelationService(db)
-        for correlation in correlations:
-            await correlation_service.save_correlation(correlation)
-        logger.info(f"Processed {len(correlations)} correlations")
+        saved = await correlation_service.save_correlations(correlations)
+        logger.info(f"Processed {saved} correlation groups")
     except Exception as e:
         logger.error(f"Failed to process correlations: {e}")
 
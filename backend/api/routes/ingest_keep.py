@@ -10,7 +10,9 @@ from __future__ import annotations
 import hmac
 import hashlib
 import logging
-from typing import Any, Dict
+import time
+from collections import Counter
+from typing import Any, Dict, Tuple
 
 from fastapi import APIRouter, HTTPException, Request, Depends
 from sqlmodel import Session
@@ -18,18 +20,120 @@ from sqlmodel import Session
 from core.config import settings
 from core.database import get_db
 from services.alert_filter import AlertFilter
-from services.alert_deduplicator import AlertDeduplicator
+from services.rule_store import RuleStore
+from services.alert_deduplicator import AlertDeduplicator, build_shared_store
+from services.fingerprint import Fingerprinter
+from services.near_duplicate import NearDuplicateIndex
+from services.bloom_dedup import RotatingBloomFilter
+from services.flap_detector import FlapDetector
+from services.silence_engine import SilenceEngine
+from services.throttler import AlertThrottler
+from services.correlation_engine import StreamingCorrelator
+from services.topology import ServiceTopology
+from services.text_similarity import TextSimilarityIndex
+from services.entity_extraction import EntityExtractor
 from agents.strands_orchestrator import correlate_with_agents
 from services.bedrock_client import summarize_and_triage
 from services.keep_client import KeepClient
-from models.alert import Alert, AlertCreate, AlertEnrichment, AlertSeverity, AlertStatus, AlertSource
+from models.alert import Alert, AlertCreate, AlertEnrichment, AlertSeverity, AlertStatus, AlertSource, SilenceCreateRequest, TopologyDependencyRequest
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 _filter_engine = AlertFilter()
-_deduper = AlertDeduplicator(window_minutes=int(settings.ALERT_DEDUPLICATION_WINDOW // 60))
+_rule_store = (
+    RuleStore(settings.ALERT_FILTER_RULES_PATH, _filter_engine)
+    if settings.ALERT_FILTER_RULES_PATH
+    else None
+)
+if _rule_store:
+    _rule_store.reload()
+_deduper = AlertDeduplicator(
+    window_minutes=int(settings.ALERT_DEDUPLICATION_WINDOW // 60),
+    max_entries=settings.ALERT_DEDUPLICATION_MAX_ENTRIES,
+    aggregate=True,
+    fingerprinter=(
+        Fingerprinter.from_file(settings.ALERT_FINGERPRINT_SCHEMAS_PATH)
+        if settings.ALERT_FINGERPRINT_SCHEMAS_PATH
+        else None
+    ),
+    near_duplicate=(
+        NearDuplicateIndex(
+            threshold=settings.ALERT_NEAR_DUPLICATE_THRESHOLD,
+            window_seconds=settings.ALERT_DEDUPLICATION_WINDOW,
+        )
+        if settings.ALERT_NEAR_DUPLICATE_THRESHOLD
+        else None
+    ),
+    bloom_filter=(
+        RotatingBloomFilter(
+            settings.ALERT_DEDUPLICATION_WINDOW,
+            capacity_per_slice=settings.ALERT_DEDUPLICATION_BLOOM_CAPACITY,
+            fp_rate=settings.ALERT_DEDUPLICATION_BLOOM_FP_RATE,
+        )
+        if settings.ALERT_DEDUPLICATION_MODE == "bloom"
+        else None
+    ),
+    shared_store=build_shared_store(
+        settings.ALERT_DEDUPLICATION_BACKEND,
+        settings.ALERT_DEDUPLICATION_WINDOW,
+        shm_name=settings.ALERT_DEDUPLICATION_SHM_NAME,
+        shm_slots=settings.ALERT_DEDUPLICATION_SHM_SLOTS,
+    ),
+)
+
+_silence_engine = SilenceEngine()
+
+_flap_detector = FlapDetector(
+    window_seconds=settings.ALERT_FLAP_WINDOW,
+    flap_threshold=settings.ALERT_FLAP_THRESHOLD,
+    stable_seconds=settings.ALERT_FLAP_STABLE_SECONDS,
+)
+
+_throttler = (
+    AlertThrottler(
+        rate_per_minute=settings.ALERT_THROTTLE_RATE,
+        burst=settings.ALERT_THROTTLE_BURST,
+        service_rate_per_minute=settings.ALERT_THROTTLE_SERVICE_RATE,
+        service_burst=settings.ALERT_THROTTLE_SERVICE_BURST,
+    )
+    if settings.ALERT_THROTTLE_ENABLED
+    else None
+)
+
+# Outcome of every Keep webhook alert, by response status
+_ingest_stats: Counter = Counter()
+_SUPPRESSED_STATUSES = ("filtered", "silenced", "flapping", "duplicate", "throttled")
+
+_entity_extractor = (
+    EntityExtractor.from_file(settings.ALERT_ENTITY_CONFIG_PATH)
+    if settings.ALERT_ENTITY_CONFIG_PATH
+    else EntityExtractor()
+)
+
+# Topology nodes are the extractor's canonical entity IDs
+_topology = (
+    ServiceTopology.from_file(
+        settings.ALERT_TOPOLOGY_PATH, settings.ALERT_TOPOLOGY_MAX_HOPS, normalize=_entity_extractor.normalize_id
+    )
+    if settings.ALERT_TOPOLOGY_PATH
+    else ServiceTopology(max_hops=settings.ALERT_TOPOLOGY_MAX_HOPS, normalize=_entity_extractor.normalize_id)
+)
+
+_correlator = StreamingCorrelator(
+    window_seconds=settings.ALERT_CORRELATION_WINDOW, topology=_topology, extractor=_entity_extractor
+)
+
+_text_index = (
+    TextSimilarityIndex(
+        threshold=settings.ALERT_TEXT_SIMILARITY_THRESHOLD,
+        window_seconds=settings.ALERT_CORRELATION_WINDOW,
+        max_alerts=settings.ALERT_TEXT_SIMILARITY_MAX_ALERTS,
+    )
+    if settings.ALERT_TEXT_SIMILARITY_THRESHOLD
+    else None
+)
 
 
 def _verify_hmac_signature(request: Request, raw_body: bytes) -> None:
@@ -56,16 +160,20 @@ def _verify_hmac_signature(request: Request, raw_body: bytes) -> None:
         raise HTTPException(status_code=401, detail="signature mismatch")
 
 
-def _passes_filters(alert: Dict[str, Any]) -> bool:
+def _passes_filters(alert: Dict[str, Any]) -> Tuple[bool, int]:
     """Run alert through active filter rules.
 
-    We reuse AlertFilter's single-rule application by synthesizing an AND across
-    configured rules. If no rules exist, accept by default.
+    Uses AlertFilter's compiled rule set (an AND across configured rules).
+    If no rules exist, accept by default. Also returns the rule version that
+    decided the alert.
     """
-    rules = _filter_engine.get_rules()
-    if not rules:
-        return True
-    return all(_filter_engine.apply_filter(alert, r) for r in rules)
+    return _filter_engine.decide(alert)
+
+
+async def watch_filter_rules() -> None:
+    """Hot-reload filter rules from ALERT_FILTER_RULES_PATH until cancelled."""
+    if _rule_store:
+        await _rule_store.watch(settings.ALERT_FILTER_RULES_RELOAD_INTERVAL)
 
 
 @router.post("/ingest/keep")
@@ -83,24 +191,72 @@ async def ingest_keep(request: Request, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="unsupported event")
 
     alert_data = payload.get("alert") or {}
+    _ingest_stats["received"] += 1
+
+    # Tenant from the ingest API key takes precedence over alert labels
+    api_key = request.headers.get("X-API-Key")
+    if api_key and api_key in settings.TENANT_API_KEYS:
+        alert_data["tenant"] = settings.TENANT_API_KEYS[api_key]
 
     # Noise reduction
-    if not _passes_filters(alert_data):
-        logger.info("alert filtered", extra={"fingerprint": alert_data.get("fingerprint")})
-        return {"status": "filtered"}
+    passed, rule_version = _passes_filters(alert_data)
+    if not passed:
+        logger.info("alert filtered", extra={"fingerprint": alert_data.get("fingerprint"), "rule_version": rule_version})
+        _ingest_stats["filtered"] += 1
+        return {"status": "filtered", "rule_version": rule_version}
+
+    # Silences and maintenance windows
+    silence = _silence_engine.apply(alert_data)
+    if silence:
+        _ingest_stats["silenced"] += 1
+        return {"status": "silenced", "silence_id": silence.silence_id, "kind": silence.kind}
 
     # Deduplication
-    fingerprint = _deduper.generate_fingerprint(
-        {
-            "source": alert_data.get("source", "unknown"),
-            "service": (alert_data.get("labels") or {}).get("service") or alert_data.get("service", "unknown"),
-            "name": alert_data.get("title") or alert_data.get("name") or "Alert",
-            "severity": alert_data.get("severity", "unknown"),
-        }
+    alert_data["fingerprint"] = alert_data.get("fingerprint") or _deduper.generate_fingerprint(alert_data)
+
+    # Flap detection: oscillating alerts are collapsed into one record and
+    # skip correlation, AI triage and persistence until they stabilize
+    flapping = _flap_detector.observe(
+        alert_data["fingerprint"], alert_data.get("status"), time.time(), alert_data
     )
-    alert_data["fingerprint"] = alert_data.get("fingerprint") or fingerprint
-    if _deduper.is_duplicate(alert_data, alert_data["fingerprint"]):
-        return {"status": "duplicate"}
+    # Flaps that went quiet emit their last suppressed update as the final
+    # state; the current update supersedes a final state of its own fingerprint
+    for stable in _flap_detector.pop_stabilized():
+        logger.info("flap stabilized", extra={"fingerprint": stable["fingerprint"], "status": stable["current_status"]})
+        if stable["alert"] and stable["fingerprint"] != alert_data["fingerprint"]:
+            _entity_extractor.annotate(stable["alert"])
+            _correlator.observe(stable["alert"])
+    if flapping:
+        _ingest_stats["flapping"] += 1
+        return {"status": "flapping", **flapping}
+    if await _deduper.is_duplicate_async(alert_data, alert_data["fingerprint"]):
+        _ingest_stats["duplicate"] += 1
+        return {
+            "status": "duplicate",
+            "fingerprint": alert_data["fingerprint"],
+            **(_deduper.get_occurrence(alert_data["fingerprint"]) or {}),
+            "noise_reduction_rate": _deduper.get_cache_stats()["noise_reduction_rate"],
+        }
+
+    # Throttling: during storms, alerts beyond the per-source or per-service
+    # rate are counted but skip correlation and AI triage
+    if _throttler:
+        throttled = _throttler.check(alert_data, time.time())
+        if throttled:
+            _ingest_stats["throttled"] += 1
+            return {"status": "throttled", "fingerprint": alert_data["fingerprint"], **throttled}
+
+    # Streaming correlation: normalize the services, hosts and pods the alert
+    # names once, then join the open group of any entity it shares, across
+    # webhook deliveries
+    _entity_extractor.annotate(alert_data)
+    group = _correlator.observe(alert_data)
+    if group:
+        alert_data["correlation_group"] = group.group_id
+    similar = [
+        {"alert_id": alert_id, "similarity": similarity}
+        for alert_id, similarity in (_text_index.add(alert_data) if _text_index else [])
+    ]
 
     # Correlation (Strands agents)
     correlated = await correlate_with_agents(alert_data)
@@ -139,6 +295,14 @@ async def ingest_keep(request: Request, db: Session = Depends(get_db)):
             )
             db.add(ai_enrichment)
         
+        filter_enrichment = AlertEnrichment(
+            alert_id=db_alert.id,
+            key="filter_rule_version",
+            value=str(rule_version),
+            source="alert_filter"
+        )
+        db.add(filter_enrichment)
+        
         if enriched.get("correlation"):
             corr_enrichment = AlertEnrichment(
                 alert_id=db_alert.id,
@@ -148,6 +312,15 @@ async def ingest_keep(request: Request, db: Session = Depends(get_db)):
             )
             db.add(corr_enrichment)
         
+        if group:
+            group_enrichment = AlertEnrichment(
+                alert_id=db_alert.id,
+                key="correlation_group",
+                value=group.group_id,
+                source="correlation_engine"
+            )
+            db.add(group_enrichment)
+        
         db.commit()
         db.refresh(db_alert)
         
@@ -161,7 +334,11 @@ async def ingest_keep(request: Request, db: Session = Depends(get_db)):
             "status": "ok",
             "alert_id": str(db_alert.id),
             "fingerprint": enriched.get("fingerprint"),
-            "incident": (enriched.get("correlation") or {}).get("incidentId")
+            "incident": (enriched.get("correlation") or {}).get("incidentId"),
+            "correlation_group": group.group_id if group else None,
+            "similar_alerts": similar,
+            "entities": alert_data["entities"],
+            "rule_version": rule_version
         }
         
     except Exception as e:
@@ -176,3 +353,78 @@ async def ingest_keep(request: Request, db: Session = Depends(get_db)):
         }
 
 
+@router.get("/noise-reduction/stats")
+async def get_noise_reduction_stats():
+    received = _ingest_stats["received"]
+    suppressed = sum(_ingest_stats[status] for status in _SUPPRESSED_STATUSES)
+    return {
+        "ingest_stats": {
+            "received": received,
+            **{status: _ingest_stats[status] for status in _SUPPRESSED_STATUSES},
+            "noise_reduction_rate": round(suppressed / received * 100, 2) if received else 0.0,
+        },
+        "deduplicator_stats": _deduper.get_cache_stats(),
+        "silence_stats": _silence_engine.get_stats(),
+        "flap_stats": _flap_detector.get_stats(),
+        "throttle_stats": _throttler.get_stats() if _throttler else {},
+    }
+
+
+@router.get("/silences")
+async def list_silences(active_only: bool = False):
+    silences = _silence_engine.get_silences(active_at=time.time() if active_only else None)
+    return {"silences": silences, "stats": _silence_engine.get_stats()}
+
+
+@router.post("/silences")
+async def create_silence(request: SilenceCreateRequest):
+    try:
+        silence = _silence_engine.add_silence(
+            request.matchers,
+            request.starts_at,
+            request.ends_at,
+            comment=request.comment,
+            created_by=request.created_by,
+            kind=request.kind,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return silence.to_dict()
+
+
+@router.delete("/silences/{silence_id}")
+async def delete_silence(silence_id: str):
+    if not _silence_engine.remove_silence(silence_id):
+        raise HTTPException(status_code=404, detail="silence not found")
+    return {"status": "deleted", "id": silence_id}
+
+
+@router.get("/correlation-groups")
+async def list_correlation_groups(min_size: int = 2):
+    return {"groups": _correlator.get_groups(min_size), "stats": _correlator.get_stats()}
+
+
+@router.get("/correlation-groups/{group_id}")
+async def get_correlation_group(group_id: str):
+    group = _correlator.get_group(group_id)
+    if group is None:
+        raise HTTPException(status_code=404, detail="correlation group not found")
+    return group.to_dict()
+
+
+@router.get("/topology")
+async def get_topology():
+    return {"dependencies": _topology.to_dict(), "stats": _topology.get_stats()}
+
+
+@router.post("/topology/dependencies")
+async def add_topology_dependency(request: TopologyDependencyRequest):
+    added = _topology.add_dependency(request.service, request.depends_on)
+    return {"status": "added" if added else "exists", **request.dict()}
+
+
+@router.delete("/topology/dependencies")
+async def remove_topology_dependency(request: TopologyDependencyRequest):
+    if not _topology.remove_dependency(request.service, request.depends_on):
+        raise HTTPException(status_code=404, detail="dependency not found")
+    return {"status": "deleted", **request.dict()}
@@ -3,7 +3,7 @@ Configuration management for MSP Alert Intelligence Platform
 """
 
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -61,7 +61,31 @@ class Settings(BaseSettings):
     
     # Alert Processing
     ALERT_DEDUPLICATION_WINDOW: int = Field(default=300, env="ALERT_DEDUPLICATION_WINDOW")  # 5 minutes
+    ALERT_DEDUPLICATION_MAX_ENTRIES: int = Field(default=100000, env="ALERT_DEDUPLICATION_MAX_ENTRIES")
+    ALERT_DEDUPLICATION_MODE: str = Field(default="exact", env="ALERT_DEDUPLICATION_MODE")  # exact | bloom
+    ALERT_DEDUPLICATION_BLOOM_CAPACITY: int = Field(default=1000000, env="ALERT_DEDUPLICATION_BLOOM_CAPACITY")  # per window slice
+    ALERT_DEDUPLICATION_BLOOM_FP_RATE: float = Field(default=0.001, env="ALERT_DEDUPLICATION_BLOOM_FP_RATE")
+    ALERT_DEDUPLICATION_BACKEND: str = Field(default="memory", env="ALERT_DEDUPLICATION_BACKEND")  # memory | redis | shm
+    ALERT_DEDUPLICATION_SHM_NAME: str = Field(default="msp_alert_dedup", env="ALERT_DEDUPLICATION_SHM_NAME")
+    ALERT_DEDUPLICATION_SHM_SLOTS: int = Field(default=262144, env="ALERT_DEDUPLICATION_SHM_SLOTS")
+    ALERT_FINGERPRINT_SCHEMAS_PATH: Optional[str] = Field(default=None, env="ALERT_FINGERPRINT_SCHEMAS_PATH")
+    ALERT_NEAR_DUPLICATE_THRESHOLD: Optional[float] = Field(default=None, env="ALERT_NEAR_DUPLICATE_THRESHOLD")  # e.g. 0.8; unset disables
+    ALERT_FLAP_WINDOW: int = Field(default=600, env="ALERT_FLAP_WINDOW")  # 10 minutes
+    ALERT_FLAP_THRESHOLD: int = Field(default=4, env="ALERT_FLAP_THRESHOLD")  # transitions per window
+    ALERT_FLAP_STABLE_SECONDS: int = Field(default=300, env="ALERT_FLAP_STABLE_SECONDS")
+    ALERT_THROTTLE_ENABLED: bool = Field(default=True, env="ALERT_THROTTLE_ENABLED")
+    ALERT_THROTTLE_RATE: float = Field(default=600, env="ALERT_THROTTLE_RATE")  # alerts/minute per tenant source
+    ALERT_THROTTLE_BURST: int = Field(default=300, env="ALERT_THROTTLE_BURST")
+    ALERT_THROTTLE_SERVICE_RATE: float = Field(default=120, env="ALERT_THROTTLE_SERVICE_RATE")  # alerts/minute per tenant service
+    ALERT_THROTTLE_SERVICE_BURST: int = Field(default=60, env="ALERT_THROTTLE_SERVICE_BURST")
+    ALERT_FILTER_RULES_PATH: Optional[str] = Field(default=None, env="ALERT_FILTER_RULES_PATH")  # unset keeps built-in defaults
+    ALERT_FILTER_RULES_RELOAD_INTERVAL: int = Field(default=5, env="ALERT_FILTER_RULES_RELOAD_INTERVAL")
     ALERT_CORRELATION_WINDOW: int = Field(default=1800, env="ALERT_CORRELATION_WINDOW")  # 30 minutes
+    ALERT_TOPOLOGY_PATH: Optional[str] = Field(default=None, env="ALERT_TOPOLOGY_PATH")  # service/host dependency graph
+    ALERT_TOPOLOGY_MAX_HOPS: int = Field(default=2, env="ALERT_TOPOLOGY_MAX_HOPS")
+    ALERT_ENTITY_CONFIG_PATH: Optional[str] = Field(default=None, env="ALERT_ENTITY_CONFIG_PATH")  # label keys per entity kind
+    ALERT_TEXT_SIMILARITY_THRESHOLD: Optional[float] = Field(default=None, env="ALERT_TEXT_SIMILARITY_THRESHOLD")  # cosine, unset disables
+    ALERT_TEXT_SIMILARITY_MAX_ALERTS: int = Field(default=100000, env="ALERT_TEXT_SIMILARITY_MAX_ALERTS")
     MAX_ALERTS_PER_BATCH: int = Field(default=100, env="MAX_ALERTS_PER_BATCH")
     
     # Workflow Processing
@@ -80,6 +104,9 @@ class Settings(BaseSettings):
     KEEP_API_URL: Optional[str] = Field(default=None, env="KEEP_API_URL")
     KEEP_API_KEY: Optional[str] = Field(default=None, env="KEEP_API_KEY")
     KEEP_WEBHOOK_SECRET: Optional[str] = Field(default=None, env="KEEP_WEBHOOK_SECRET")
+
+    # Multi-tenancy: ingest API key -> tenant, as JSON ({"<api key>": "<tenant>"})
+    TENANT_API_KEYS: Dict[str, str] = Field(default={}, env="TENANT_API_KEYS")
     
     class Config:
         env_file = ".env"
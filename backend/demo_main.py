@@ -15,6 +15,7 @@ Keep Core: Apache 2.0
 """
 
 import asyncio
+import time
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -46,6 +47,10 @@ strands_manager = None
 orchestrator = None
 deduplicator = None
 filter_engine = None
+silence_engine = None
+throttler = None
+correlator = None
+entity_extractor = None
 
 # WebSocket connection manager
 class ConnectionManager:
@@ -78,7 +83,7 @@ manager = ConnectionManager()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup and shutdown"""
-    global bedrock_manager, strands_manager, orchestrator, deduplicator, filter_engine
+    global bedrock_manager, strands_manager, orchestrator, deduplicator, filter_engine, silence_engine, throttler, correlator, entity_extractor
     
     logger.info("Starting MSP Alert Intelligence Platform (Demo Mode)")
     
@@ -121,13 +126,85 @@ async def lifespan(app: FastAPI):
     
     # Initialize processing services
     try:
-        from services.alert_deduplicator import AlertDeduplicator
+        from services.alert_deduplicator import AlertDeduplicator, build_shared_store
         from services.alert_filter import AlertFilter
         from agents.agent_orchestrator import AgentOrchestrator
         
-        deduplicator = AlertDeduplicator()
+        from services.fingerprint import Fingerprinter
+        from services.near_duplicate import NearDuplicateIndex
+        from services.bloom_dedup import RotatingBloomFilter
+        from services.silence_engine import SilenceEngine
+        from services.throttler import AlertThrottler
+        from services.correlation_engine import StreamingCorrelator
+        from services.topology import ServiceTopology
+        from services.text_similarity import TextSimilarityIndex
+        from services.entity_extraction import EntityExtractor, EntityIndex
+
+        schemas_path = os.getenv("ALERT_FINGERPRINT_SCHEMAS_PATH")
+        near_duplicate_threshold = os.getenv("ALERT_NEAR_DUPLICATE_THRESHOLD")
+        deduplicator = AlertDeduplicator(
+            aggregate=True,
+            fingerprinter=Fingerprinter.from_file(schemas_path) if schemas_path else None,
+            near_duplicate=(
+                NearDuplicateIndex(threshold=float(near_duplicate_threshold))
+                if near_duplicate_threshold
+                else None
+            ),
+            bloom_filter=(
+                RotatingBloomFilter(300)
+                if os.getenv("ALERT_DEDUPLICATION_MODE", "exact") == "bloom"
+                else None
+            ),
+            shared_store=build_shared_store(
+                os.getenv("ALERT_DEDUPLICATION_BACKEND", "memory"),
+                300,
+                redis_url=os.getenv("REDIS_URL"),
+            ),
+        )
         filter_engine = AlertFilter()
-        orchestrator = AgentOrchestrator(bedrock_manager, strands_manager)
+        silence_engine = SilenceEngine()
+        throttler = (
+            AlertThrottler(
+                rate_per_minute=float(os.getenv("ALERT_THROTTLE_RATE", "600")),
+                burst=int(os.getenv("ALERT_THROTTLE_BURST", "300")),
+                service_rate_per_minute=float(os.getenv("ALERT_THROTTLE_SERVICE_RATE", "120")),
+                service_burst=int(os.getenv("ALERT_THROTTLE_SERVICE_BURST", "60")),
+            )
+            if os.getenv("ALERT_THROTTLE_ENABLED", "true").lower() == "true"
+            else None
+        )
+        entity_config_path = os.getenv("ALERT_ENTITY_CONFIG_PATH")
+        entity_extractor = (
+            EntityExtractor.from_file(entity_config_path) if entity_config_path else EntityExtractor()
+        )
+        topology_path = os.getenv("ALERT_TOPOLOGY_PATH")
+        topology_max_hops = int(os.getenv("ALERT_TOPOLOGY_MAX_HOPS", "2"))
+        topology = (
+            ServiceTopology.from_file(topology_path, topology_max_hops, normalize=entity_extractor.normalize_id)
+            if topology_path
+            else ServiceTopology(max_hops=topology_max_hops, normalize=entity_extractor.normalize_id)
+        )
+        correlation_window = float(os.getenv("ALERT_CORRELATION_WINDOW", "1800"))
+        correlator = StreamingCorrelator(
+            window_seconds=correlation_window,
+            topology=topology,
+            extractor=entity_extractor
+        )
+        text_similarity_threshold = os.getenv("ALERT_TEXT_SIMILARITY_THRESHOLD")
+        text_index = (
+            TextSimilarityIndex(
+                threshold=float(text_similarity_threshold),
+                window_seconds=correlation_window,
+                max_alerts=int(os.getenv("ALERT_TEXT_SIMILARITY_MAX_ALERTS", "100000"))
+            )
+            if text_similarity_threshold
+            else None
+        )
+        orchestrator = AgentOrchestrator(
+            bedrock_manager, strands_manager, correlation_window=correlation_window, topology=topology,
+            text_index=text_index,
+            entity_index=EntityIndex(entity_extractor, window_seconds=correlation_window)
+        )
         
         logger.info("Processing services initialized successfully")
     except ImportError as e:
@@ -717,9 +794,18 @@ async def correlate_alerts():
     """Correlate alerts using simple demo rules.
 
     Rules:
-    - Same source AND same labels.instance (if present)
+    - Same source AND same host or pod entity, whichever label names it
+      (instance, host, hostname, node, pod, ...)
     - Started within 10 minutes of each other
+
+    Entities are normalized once per alert and alerts are bucketed by
+    (source, entity) and sorted by start time, so only neighbours in time
+    are compared. Linked alerts are returned as connected groups rather
+    than as every correlated pair.
     """
+    from services.correlation_grouping import group_edges
+    from services.entity_extraction import EntityExtractor
+
     def parse_dt(s: str) -> datetime:
         try:
             return datetime.fromisoformat(s.replace("Z", "+00:00"))
@@ -727,37 +813,39 @@ async def correlate_alerts():
             return datetime.utcnow()
 
     window_minutes = 10
-    correlations: List[Dict[str, Any]] = []
     alerts = demo_alerts
-    for i in range(len(alerts)):
-        for j in range(i + 1, len(alerts)):
-            a = alerts[i]
-            b = alerts[j]
-            same_source = a.get("source") == b.get("source")
-            same_instance = a.get("labels", {}).get("instance") and a.get("labels", {}).get("instance") == b.get("labels", {}).get("instance")
-
-            if not (same_source and same_instance):
+    extractor = entity_extractor or EntityExtractor()
+    buckets: Dict[tuple, List[tuple]] = {}
+    for alert in alerts:
+        started = None
+        for kind, name in extractor.extract(alert):
+            if kind == "service":
                 continue
+            if started is None:
+                started = parse_dt(alert.get("started_at", alert.get("created_at", "")))
+            buckets.setdefault((alert.get("source"), kind, name), []).append((started, alert["id"]))
 
-            t1 = parse_dt(a.get("started_at", a.get("created_at", "")))
-            t2 = parse_dt(b.get("started_at", b.get("created_at", "")))
-            within_window = abs((t2 - t1).total_seconds()) <= window_minutes * 60
+    # Within a bucket, an alert within the window of any other is within the
+    # window of its predecessor or successor, so consecutive links suffice
+    edges = []
+    for timed in buckets.values():
+        timed.sort(key=lambda entry: entry[0])
+        for (t1, id1), (t2, id2) in zip(timed, timed[1:]):
+            if (t2 - t1).total_seconds() <= window_minutes * 60:
+                edges.append((id1, id2, 0.85, "temporal+entity"))
 
-            if within_window:
-                correlations.append({
-                    "alert1_id": a["id"],
-                    "alert2_id": b["id"],
-                    "correlation_type": "temporal+entity",
-                    "confidence": 0.85,
-                    "reason": f"Same source and instance within {window_minutes}m"
-                })
+    groups = group_edges(edges, items=[alert["id"] for alert in alerts])
+    for group in groups:
+        group["reason"] = f"Same source and host/pod within {window_minutes}m"
+    correlated = sum(group["alert_count"] for group in groups)
 
     return {
-        "correlations": correlations,
+        "correlations": groups,
         "correlation_stats": {
             "total_alerts": len(alerts),
-            "correlations_found": len(correlations),
-            "correlation_rate": round(len(correlations) / max(1, len(alerts)), 2)
+            "correlations_found": len(groups),
+            "correlated_alerts": correlated,
+            "correlation_rate": round(correlated / max(1, len(alerts)), 2)
         }
     }
 
@@ -895,6 +983,14 @@ class AlertIngestRequest(BaseModel):
     labels: Dict[str, str] = {}
     annotations: Dict[str, str] = {}
 
+class SilenceRequest(BaseModel):
+    matchers: Dict[str, str]
+    starts_at: datetime
+    ends_at: datetime
+    comment: str = ""
+    created_by: str = "demo-user"
+    kind: str = "maintenance_window"
+
 # Enhanced API endpoints with new processing pipeline
 @app.post("/api/alerts/ingest")
 async def ingest_alerts(alerts: List[AlertIngestRequest]):
@@ -918,17 +1014,41 @@ async def ingest_alerts(alerts: List[AlertIngestRequest]):
         alert["created_at"] = datetime.utcnow().isoformat()
         alert["status"] = "active"
     
-    # Phase 1: Deduplication
-    unique_alerts = deduplicator.deduplicate_batch(alert_dicts)
+    # Phase 1: Silences and maintenance windows
+    unsilenced_alerts = silence_engine.filter_alerts(alert_dicts)
+    silenced = len(alert_dicts) - len(unsilenced_alerts)
     
-    # Phase 2: Filtering
+    # Phase 2: Deduplication (duplicates are folded into occurrence counters)
+    folded_before = deduplicator.duplicates_folded
+    unique_alerts = await deduplicator.deduplicate_batch_async(unsilenced_alerts)
+    duplicates_folded = deduplicator.duplicates_folded - folded_before
+    
+    # Phase 3: Filtering
     filtered_alerts = filter_engine.filter_alerts(unique_alerts)
     
-    # Phase 3: AI Processing
-    agent_results = await orchestrator.process_alert_pipeline(filtered_alerts)
+    # Phase 4: Throttling (alerts beyond their rate limits are counted, not processed)
+    processed_alerts, throttled = filtered_alerts, 0
+    if throttler:
+        throttled_before = throttler.throttled
+        processed_alerts = throttler.filter_alerts(filtered_alerts, time.time())
+        throttled = throttler.throttled - throttled_before
+    
+    # Phase 5: Streaming correlation across ingest batches, on entities
+    # normalized once per alert
+    for alert in processed_alerts:
+        entity_extractor.annotate(alert)
+    correlation_groups = correlator.observe_batch(processed_alerts)
+    alerts_by_id = {alert["id"]: alert for alert in processed_alerts}
+    for group in correlation_groups:
+        for alert_id in group.alert_ids:
+            if alert_id in alerts_by_id:
+                alerts_by_id[alert_id]["correlation_group"] = group.group_id
+    
+    # Phase 6: AI Processing
+    agent_results = await orchestrator.process_alert_pipeline(processed_alerts)
     
     # Calculate noise reduction
-    noise_reduction_rate = (1 - len(unique_alerts) / len(alert_dicts)) * 100 if alert_dicts else 0
+    noise_reduction_rate = (silenced + duplicates_folded + throttled) / len(alert_dicts) * 100 if alert_dicts else 0
     
     # Broadcast update to WebSocket clients
     if manager.active_connections:
@@ -937,7 +1057,7 @@ async def ingest_alerts(alerts: List[AlertIngestRequest]):
             "timestamp": datetime.utcnow().isoformat(),
             "data": {
                 "received": len(alert_dicts),
-                "processed": len(filtered_alerts),
+                "processed": len(processed_alerts),
                 "noise_reduction": noise_reduction_rate
             }
         }
@@ -945,12 +1065,53 @@ async def ingest_alerts(alerts: List[AlertIngestRequest]):
     
     return {
         "received": len(alert_dicts),
+        "silenced": silenced,
         "after_dedup": len(unique_alerts),
+        "duplicates_folded": duplicates_folded,
         "after_filter": len(filtered_alerts),
+        "throttled": throttled,
+        "correlation_groups": [
+            {"group_id": group.group_id, "alert_count": len(group.alert_ids)} for group in correlation_groups
+        ],
         "agent_processing": agent_results,
         "noise_reduction_rate": noise_reduction_rate
     }
 
+@app.get("/api/v1/silences")
+async def list_silences():
+    """List silences and maintenance windows"""
+    if not silence_engine:
+        return {"silences": [], "stats": {}}
+    return {"silences": silence_engine.get_silences(), "stats": silence_engine.get_stats()}
+
+@app.post("/api/v1/silences")
+async def create_silence(request: SilenceRequest):
+    """Create a silence or maintenance window"""
+    if not silence_engine:
+        raise HTTPException(status_code=503, detail="Silence engine not available")
+    try:
+        silence = silence_engine.add_silence(
+            request.matchers, request.starts_at, request.ends_at,
+            comment=request.comment, created_by=request.created_by, kind=request.kind
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return silence.to_dict()
+
+@app.delete("/api/v1/silences/{silence_id}")
+async def delete_silence(silence_id: str):
+    """Delete a silence or maintenance window"""
+    if not silence_engine or not silence_engine.remove_silence(silence_id):
+        raise HTTPException(status_code=404, detail="Silence not found")
+    return {"message": "Silence deleted successfully"}
+
+@app.get("/api/v1/correlation-groups")
+async def list_correlation_groups(min_size: int = 2):
+    """List open correlation groups built across ingest batches"""
+    if not correlator:
+        return {"groups": [], "stats": {}}
+    return {"groups": correlator.get_groups(min_size), "stats": correlator.get_stats()}
+
 @app.get("/api/v1/processing/stats")
 async def get_processing_stats():
     """Get processing statistics"""
@@ -971,7 +1132,10 @@ async def get_processing_stats():
         base_stats.update({
             "orchestrator_stats": stats,
             "deduplicator_stats": deduplicator.get_cache_stats() if deduplicator else {},
-            "filter_stats": filter_engine.get_filter_stats(demo_alerts) if filter_engine else {}
+            "filter_stats": filter_engine.get_filter_stats() if filter_engine else {},
+            "silence_stats": silence_engine.get_stats() if silence_engine else {},
+            "throttle_stats": throttler.get_stats() if throttler else {},
+            "correlation_stats": correlator.get_stats() if correlator else {}
         })
     
     return base_stats
@@ -79,10 +79,14 @@ async def lifespan(app: FastAPI):
         logger.error("Failed to initialize Strands Agents", error=str(e))
         strands_manager = None
     
+    # Hot-reload filter rules (no-op unless ALERT_FILTER_RULES_PATH is set)
+    rule_watcher = asyncio.create_task(ingest_keep.watch_filter_rules())
+    
     yield
     
     # Cleanup
     logger.info("Shutting down MSP Alert Intelligence Platform")
+    rule_watcher.cancel()
     if bedrock_manager:
         await bedrock_manager.cleanup()
     if strands_manager:
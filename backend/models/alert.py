@@ -7,6 +7,7 @@ from enum import Enum
 from typing import Dict, List, Optional, Any
 from uuid import UUID, uuid4
 
+from sqlalchemy import JSON, Column, Index
 from sqlmodel import SQLModel, Field, Relationship
 from pydantic import BaseModel
 
@@ -49,8 +50,8 @@ class AlertBase(SQLModel):
     source: AlertSource
     source_id: str
     fingerprint: str
-    labels: Dict[str, str] = Field(default_factory=dict)
-    annotations: Dict[str, str] = Field(default_factory=dict)
+    labels: Dict[str, str] = Field(default_factory=dict, sa_column=Column(JSON))
+    annotations: Dict[str, str] = Field(default_factory=dict, sa_column=Column(JSON))
     started_at: datetime
     updated_at: Optional[datetime] = None
     resolved_at: Optional[datetime] = None
@@ -59,13 +60,17 @@ class AlertBase(SQLModel):
 class Alert(AlertBase, table=True):
     """Alert database model"""
     __tablename__ = "alerts"
+    # Serves started_at range scans and per-source time ordering in correlation
+    __table_args__ = (Index("ix_alerts_source_started_at", "source", "started_at"),)
     
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
     enrichments: List["AlertEnrichment"] = Relationship(back_populates="alert")
-    correlations: List["AlertCorrelation"] = Relationship(back_populates="alert")
+    correlations: List["AlertCorrelation"] = Relationship(
+        back_populates="alert", sa_relationship_kwargs={"foreign_keys": "AlertCorrelation.alert_id"}
+    )
     incident_id: Optional[UUID] = Field(default=None, foreign_key="incidents.id")
 
 
@@ -85,7 +90,7 @@ class AlertEnrichment(SQLModel, table=True):
 
 
 class AlertCorrelation(SQLModel, table=True):
-    """Alert correlation data"""
+    """Pairwise alert correlation data (superseded by AlertCorrelationGroup)"""
     __tablename__ = "alert_correlations"
     
     id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
@@ -96,7 +101,34 @@ class AlertCorrelation(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
-    alert: Alert = Relationship(back_populates="correlations")
+    alert: Alert = Relationship(
+        back_populates="correlations", sa_relationship_kwargs={"foreign_keys": "AlertCorrelation.alert_id"}
+    )
+
+
+class AlertCorrelationGroup(SQLModel, table=True):
+    """A group of correlated alerts, stored once regardless of its size"""
+    __tablename__ = "alert_correlation_groups"
+    
+    id: Optional[UUID] = Field(default_factory=uuid4, primary_key=True)
+    correlation_type: str  # e.g., "temporal", "similarity", "temporal+entity"
+    confidence: float = Field(ge=0.0, le=1.0)
+    alert_count: int
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    # Relationships
+    members: List["AlertCorrelationMember"] = Relationship(back_populates="group")
+
+
+class AlertCorrelationMember(SQLModel, table=True):
+    """Membership of an alert in a correlation group"""
+    __tablename__ = "alert_correlation_members"
+    
+    group_id: UUID = Field(foreign_key="alert_correlation_groups.id", primary_key=True)
+    alert_id: UUID = Field(foreign_key="alerts.id", primary_key=True, index=True)
+    
+    # Relationships
+    group: AlertCorrelationGroup = Relationship(back_populates="members")
 
 
 # API Models
@@ -177,6 +209,22 @@ class AlertFilterRequest(BaseModel):
     search_query: Optional[str] = None
 
 
+class SilenceCreateRequest(BaseModel):
+    """Silence / maintenance window creation request"""
+    matchers: Dict[str, str]  # e.g. {"client": "acme", "instance": "server-01"}
+    starts_at: datetime
+    ends_at: datetime
+    comment: str = ""
+    created_by: str = ""
+    kind: str = "silence"  # silence | maintenance_window
+
+
+class TopologyDependencyRequest(BaseModel):
+    """Service dependency edge request"""
+    service: str  # e.g. "api" or a host name
+    depends_on: str  # e.g. "database"
+
+
 class AlertEnrichmentRequest(BaseModel):
     """Alert enrichment request"""
     alert_id: UUID
@@ -3,27 +3,135 @@ Alert Deduplication Service
 Handles fingerprint-based alert deduplication logic
 """
 
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
-from collections import defaultdict
-import hashlib
+from typing import List, Dict, Any, Optional
+from datetime import timedelta
+from collections import OrderedDict
+import heapq
 import logging
+import time
+
+from services.fingerprint import Fingerprinter
+from services.near_duplicate import NearDuplicateIndex
+from services.bloom_dedup import RotatingBloomFilter
+from services.time_utils import event_time, isoformat
 
 logger = logging.getLogger(__name__)
 
+# How far ahead of the wall clock an event time may move the watermark
+MAX_CLOCK_SKEW_SECONDS = 60
+
+
+class SharedStoreUnavailable(Exception):
+    """Raised by a shared dedup store when its backend cannot be reached"""
+
+
+def build_shared_store(backend: str, window_seconds: float, redis_url: Optional[str] = None,
+                       shm_name: str = "msp_alert_dedup", shm_slots: int = 262144):
+    """
+    Build the shared dedup store for a configured backend
+    
+    Args:
+        backend: "memory" (no shared store), "redis" or "shm"
+        window_seconds: Dedup window length in seconds
+        redis_url: Redis URL for a dedicated client; when omitted the
+                   application client from core.database is used
+        shm_name: Shared memory segment name for the "shm" backend
+        shm_slots: Slot count used when the "shm" backend creates its table
+        
+    Returns:
+        Shared store instance, or None for the in-memory backend
+    """
+    backend = (backend or "memory").lower()
+    if backend == "memory":
+        return None
+    if backend == "redis":
+        from services.redis_dedup_store import RedisDedupStore
+        client = None
+        if redis_url:
+            import redis.asyncio as redis
+            client = redis.from_url(redis_url)
+        return RedisDedupStore(window_seconds, client=client)
+    if backend == "shm":
+        from services.shm_dedup_store import SharedMemoryDedupStore
+        return SharedMemoryDedupStore(window_seconds, name=shm_name, slots=shm_slots)
+    raise ValueError(f"Unknown deduplication backend: {backend}")
+
+
+class OccurrenceRecord:
+    """Occurrence counters for one fingerprint's open dedup window"""
+    
+    __slots__ = ("window_start", "count", "first_seen", "last_seen", "last_alert")
+    
+    def __init__(self, window_start: float, alert: Dict[str, Any], count: int = 1,
+                 last_seen: Optional[float] = None, last_alert: Optional[Dict[str, Any]] = None):
+        self.window_start = window_start
+        self.count = count
+        self.first_seen = window_start
+        self.last_seen = window_start if last_seen is None else last_seen
+        self.last_alert = alert if last_alert is None else last_alert
+    
+    def merge(self, count: int, first_seen: float, last_seen: float, last_alert: Dict[str, Any]):
+        """Fold further occurrences into this record"""
+        self.count += count
+        if first_seen < self.first_seen:
+            self.first_seen = first_seen
+        if last_seen >= self.last_seen:
+            self.last_seen = last_seen
+            self.last_alert = last_alert
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Counters in the shape attached to representative alerts"""
+        return {
+            "occurrence_count": self.count,
+            "first_seen": isoformat(self.first_seen),
+            "last_seen": isoformat(self.last_seen),
+        }
+
 
 class AlertDeduplicator:
     """Handles alert deduplication logic using fingerprints"""
     
-    def __init__(self, window_minutes: int = 5):
+    def __init__(self, window_minutes: int = 5, max_entries: int = 100_000, aggregate: bool = False,
+                 shared_store=None, fingerprinter: Optional[Fingerprinter] = None,
+                 near_duplicate: Optional[NearDuplicateIndex] = None,
+                 bloom_filter: Optional[RotatingBloomFilter] = None):
         """
         Initialize deduplicator with time window
         
         Args:
             window_minutes: Time window in minutes for considering alerts as duplicates
+            max_entries: Hard cap on cached fingerprints; least recently seen
+                         fingerprints are evicted first once it is reached
+            aggregate: If True, deduplicate_batch folds duplicates into
+                       occurrence counters instead of discarding them
+            shared_store: Optional store (e.g. RedisDedupStore) that shares
+                          dedup windows across worker processes
+            fingerprinter: Fingerprint schemas to use; defaults to
+                           source:service:name:severity
+            near_duplicate: Optional index that folds alerts whose text is
+                            near-identical to a recent alert of the same tenant
+            bloom_filter: If set, windows are tracked probabilistically in
+                          fixed memory instead of per-fingerprint records;
+                          occurrence counters then only cover one batch
         """
-        self.alert_cache = defaultdict(list)
+        # fingerprint -> occurrence record of the current window, kept in
+        # least-recently-seen order so the LRU entry is always first
+        self.alert_cache: "OrderedDict[str, OccurrenceRecord]" = OrderedDict()
+        # Min-heap of (window_expiry, fingerprint); stale entries are skipped lazily
+        self._expiry_heap: List[tuple] = []
+        self._watermark = float("-inf")
         self.window = timedelta(minutes=window_minutes)
+        self._window_seconds = self.window.total_seconds()
+        self.max_entries = max_entries
+        self.evictions = {"expired": 0, "lru": 0}
+        self.aggregate = aggregate
+        self.shared_store = shared_store
+        self.shared_fallbacks = 0
+        self.fingerprinter = fingerprinter or Fingerprinter()
+        self.near_duplicate = near_duplicate
+        self.bloom_filter = bloom_filter
+        self.occurrences_seen = 0
+        self.duplicates_folded = 0
         logger.info(f"AlertDeduplicator initialized with {window_minutes} minute window")
     
     def generate_fingerprint(self, alert: Dict[str, Any]) -> str:
@@ -34,25 +142,18 @@ class AlertDeduplicator:
             alert: Alert dictionary containing source, service, name, severity
             
         Returns:
-            MD5 hash fingerprint string
+            128-bit hex fingerprint string
         """
-        # Create fingerprint key from alert attributes
-        key_parts = [
-            alert.get("source", "unknown"),
-            alert.get("service", "unknown"), 
-            alert.get("name", "unknown"),
-            alert.get("severity", "unknown")
-        ]
-        key = ":".join(key_parts)
-        fingerprint = hashlib.md5(key.encode()).hexdigest()
-        
-        logger.debug(f"Generated fingerprint {fingerprint} for alert {alert.get('name', 'Unknown')}")
-        return fingerprint
+        return self.fingerprinter.fingerprint(alert)
     
     def is_duplicate(self, alert: Dict[str, Any], fingerprint: str) -> bool:
         """
         Check if alert is duplicate within time window
         
+        The window is measured in event time (started_at/created_at), so late
+        or replayed webhooks are judged by when the alert fired rather than
+        when it arrived.
+        
         Args:
             alert: Alert dictionary
             fingerprint: Pre-computed fingerprint
@@ -60,26 +161,108 @@ class AlertDeduplicator:
         Returns:
             True if duplicate, False otherwise
         """
-        now = datetime.now()
-        
-        # Clean old alerts from cache (outside time window)
-        self.alert_cache[fingerprint] = [
-            cached_time for cached_time in self.alert_cache[fingerprint]
-            if now - cached_time < self.window
-        ]
-        
-        # Check if duplicate exists
-        is_dup = len(self.alert_cache[fingerprint]) > 0
+        event_ts = event_time(alert)
+        self._advance(event_ts)
         
+        is_dup = self._record(fingerprint, alert, event_ts, event_ts, alert, 1)
+        if not is_dup:
+            is_dup = self._fold_near_duplicate(alert, fingerprint, event_ts)
         if is_dup:
-            logger.info(f"Duplicate alert detected: {alert.get('name', 'Unknown')} (fingerprint: {fingerprint})")
+            logger.debug(f"Duplicate alert detected: {alert.get('name', 'Unknown')} (fingerprint: {fingerprint})")
         else:
-            # Add to cache
-            self.alert_cache[fingerprint].append(now)
             logger.debug(f"New unique alert: {alert.get('name', 'Unknown')} (fingerprint: {fingerprint})")
-        
         return is_dup
     
+    def _record(self, fingerprint: str, first_alert: Dict[str, Any], first_seen: float,
+                last_seen: float, last_alert: Dict[str, Any], count: int) -> bool:
+        """
+        Merge occurrences of a fingerprint into the cache
+        
+        Returns:
+            True if they fell inside an open window, False if they opened one
+        """
+        self.occurrences_seen += count
+        if self.bloom_filter is not None:
+            is_dup = self.bloom_filter.check_and_add(fingerprint, first_seen)
+            self.duplicates_folded += count if is_dup else count - 1
+            return is_dup
+        
+        record = self.alert_cache.get(fingerprint)
+        if record is not None and abs(first_seen - record.window_start) < self._window_seconds:
+            record.merge(count, first_seen, last_seen, last_alert)
+            self.alert_cache.move_to_end(fingerprint)
+            self.duplicates_folded += count
+            return True
+        
+        self.duplicates_folded += count - 1
+        # A stale replay older than the open window is not a duplicate, but it
+        # must not move the window backwards either
+        if record is None or first_seen > record.window_start:
+            self._open_window(
+                fingerprint,
+                OccurrenceRecord(first_seen, first_alert, count, last_seen, last_alert),
+            )
+        return False
+    
+    def _fold_near_duplicate(self, alert: Dict[str, Any], fingerprint: str, event_ts: float) -> bool:
+        """
+        Run the near-duplicate stage for an alert that opened a new window
+        
+        Returns:
+            True if the alert was folded into a recent near-identical group
+        """
+        if self.near_duplicate is None:
+            return False
+        match = self.near_duplicate.fold(alert, fingerprint, event_ts)
+        if match is None:
+            return False
+        alert["near_duplicate_of"] = match["group_id"]
+        alert["similarity"] = match["similarity"]
+        self.duplicates_folded += 1
+        return True
+    
+    def _open_window(self, fingerprint: str, record: OccurrenceRecord):
+        """Start a new dedup window for a fingerprint and index its expiry"""
+        event_ts = record.window_start
+        self.alert_cache[fingerprint] = record
+        self.alert_cache.move_to_end(fingerprint)
+        heapq.heappush(self._expiry_heap, (event_ts + self._window_seconds, fingerprint))
+        
+        while len(self.alert_cache) > self.max_entries:
+            self.alert_cache.popitem(last=False)
+            self.evictions["lru"] += 1
+        
+        # LRU evictions and reopened windows leave stale heap entries behind;
+        # rebuild when they dominate so the heap stays proportional to the cache
+        if len(self._expiry_heap) > 2 * len(self.alert_cache) + 1024:
+            self._expiry_heap = [
+                (rec.window_start + self._window_seconds, fp) for fp, rec in self.alert_cache.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+    
+    def _advance(self, event_ts: float):
+        """
+        Move the event-time watermark forward and expire closed windows
+        
+        The watermark never runs more than MAX_CLOCK_SKEW_SECONDS ahead of
+        the wall clock, so one alert with a far-future timestamp cannot
+        close every open window.
+        """
+        watermark = min(event_ts, time.time() + MAX_CLOCK_SKEW_SECONDS)
+        if watermark > self._watermark:
+            self._watermark = watermark
+            self._expire()
+    
+    def _expire(self):
+        """Evict every fingerprint whose window closed before the watermark"""
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= self._watermark:
+            expires_at, fingerprint = heapq.heappop(heap)
+            record = self.alert_cache.get(fingerprint)
+            if record is not None and record.window_start + self._window_seconds == expires_at:
+                del self.alert_cache[fingerprint]
+                self.evictions["expired"] += 1
+    
     def deduplicate_batch(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Deduplicate a batch of alerts
@@ -90,11 +273,13 @@ class AlertDeduplicator:
         Returns:
             List of unique alerts
         """
+        if self.aggregate:
+            return self.aggregate_batch(alerts)
+        
         unique_alerts = []
         duplicates_removed = 0
         
-        for alert in alerts:
-            fingerprint = self.generate_fingerprint(alert)
+        for alert, fingerprint in zip(alerts, self.fingerprinter.fingerprint_batch(alerts)):
             alert["fingerprint"] = fingerprint
             
             if not self.is_duplicate(alert, fingerprint):
@@ -105,6 +290,133 @@ class AlertDeduplicator:
         logger.info(f"Deduplication complete: {len(alerts)} total, {len(unique_alerts)} unique, {duplicates_removed} duplicates removed")
         return unique_alerts
     
+    def aggregate_batch(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Deduplicate a batch by folding duplicates into occurrence counters
+        
+        The batch is grouped by fingerprint in one pass and each group is
+        merged into its fingerprint's record. One representative alert is
+        returned per group that opened a new window, carrying
+        occurrence_count, first_seen and last_seen. Groups that fell into an
+        already open window only update that window's counters.
+        
+        Args:
+            alerts: List of alert dictionaries
+            
+        Returns:
+            List of representative alerts
+        """
+        # fingerprint -> [first alert, count, first_seen, last_seen, last alert]
+        groups: Dict[str, list] = {}
+        for alert, fingerprint in zip(alerts, self.fingerprinter.fingerprint_batch(alerts)):
+            alert["fingerprint"] = fingerprint
+            event_ts = event_time(alert)
+            group = groups.get(fingerprint)
+            if group is None:
+                groups[fingerprint] = [alert, 1, event_ts, event_ts, alert]
+            else:
+                group[1] += 1
+                if event_ts < group[2]:
+                    group[2] = event_ts
+                if event_ts >= group[3]:
+                    group[3] = event_ts
+                    group[4] = alert
+        
+        latest = max((group[3] for group in groups.values()), default=None)
+        if latest is not None:
+            self._advance(latest)
+        
+        representatives = []
+        for fingerprint, (first_alert, count, first_seen, last_seen, last_alert) in groups.items():
+            if self._record(fingerprint, first_alert, first_seen, last_seen, last_alert, count):
+                continue
+            if self._fold_near_duplicate(first_alert, fingerprint, first_seen):
+                continue
+            record = self.alert_cache.get(fingerprint)
+            if record is None:
+                record = OccurrenceRecord(first_seen, first_alert, count, last_seen, last_alert)
+            first_alert.update(record.to_dict())
+            representatives.append(first_alert)
+        
+        logger.info(f"Deduplication complete: {len(alerts)} total, {len(groups)} fingerprints, {len(representatives)} new windows")
+        return representatives
+    
+    async def is_duplicate_async(self, alert: Dict[str, Any], fingerprint: str) -> bool:
+        """
+        Check if alert is duplicate across all workers sharing the store
+        
+        The local window answers repeats seen by this worker; only alerts
+        that are new locally are claimed in the shared store. If the store
+        is unavailable the local answer is used.
+        
+        Args:
+            alert: Alert dictionary
+            fingerprint: Pre-computed fingerprint
+            
+        Returns:
+            True if duplicate, False otherwise
+        """
+        if self.is_duplicate(alert, fingerprint):
+            return True
+        if self.shared_store is None:
+            return False
+        
+        try:
+            is_new = await self.shared_store.claim(fingerprint, event_time(alert))
+        except SharedStoreUnavailable:
+            self.shared_fallbacks += 1
+            return False
+        if not is_new:
+            self.duplicates_folded += 1
+        return not is_new
+    
+    async def deduplicate_batch_async(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Deduplicate a batch across all workers sharing the store
+        
+        Runs the local deduplicate_batch, then claims the survivors in the
+        shared store with one pipelined call and drops those another worker
+        already holds a window for.
+        
+        Args:
+            alerts: List of alert dictionaries
+            
+        Returns:
+            List of unique (or representative) alerts
+        """
+        local = self.deduplicate_batch(alerts)
+        if self.shared_store is None or not local:
+            return local
+        
+        try:
+            claims = await self.shared_store.claim_many(
+                [(alert["fingerprint"], event_time(alert)) for alert in local]
+            )
+        except SharedStoreUnavailable:
+            self.shared_fallbacks += 1
+            return local
+        
+        unique = []
+        for alert, is_new in zip(local, claims):
+            if is_new:
+                unique.append(alert)
+            else:
+                self.duplicates_folded += alert.get("occurrence_count", 1)
+        return unique
+    
+    def get_occurrence(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get occurrence counters for a fingerprint's open window
+        
+        Args:
+            fingerprint: Alert fingerprint
+            
+        Returns:
+            Dictionary with occurrence_count, first_seen and last_seen, or None
+        """
+        record = self.alert_cache.get(fingerprint)
+        return record.to_dict() if record is not None else None
+    
     def get_cache_stats(self) -> Dict[str, Any]:
         """
         Get deduplication cache statistics
@@ -112,17 +424,37 @@ class AlertDeduplicator:
         Returns:
             Dictionary with cache statistics
         """
-        total_cached = sum(len(times) for times in self.alert_cache.values())
         unique_fingerprints = len(self.alert_cache)
         
         return {
-            "total_cached_alerts": total_cached,
+            "total_cached_alerts": unique_fingerprints,
             "unique_fingerprints": unique_fingerprints,
             "cache_size": len(self.alert_cache),
-            "window_minutes": self.window.total_seconds() / 60
+            "max_entries": self.max_entries,
+            "expiry_index_size": len(self._expiry_heap),
+            "expired_evictions": self.evictions["expired"],
+            "lru_evictions": self.evictions["lru"],
+            "occurrences_seen": self.occurrences_seen,
+            "duplicates_folded": self.duplicates_folded,
+            "noise_reduction_rate": (
+                self.duplicates_folded / self.occurrences_seen * 100 if self.occurrences_seen else 0
+            ),
+            "window_minutes": self.window.total_seconds() / 60,
+            "shared_store": self.shared_store.get_stats() if self.shared_store else None,
+            "shared_fallbacks": self.shared_fallbacks,
+            "near_duplicate": self.near_duplicate.get_stats() if self.near_duplicate else None,
+            "bloom_filter": self.bloom_filter.get_stats() if self.bloom_filter else None
         }
     
     def clear_cache(self):
         """Clear the deduplication cache"""
         self.alert_cache.clear()
+        self._expiry_heap.clear()
+        self._watermark = float("-inf")
+        if self.near_duplicate is not None:
+            self.near_duplicate.clear()
+        if self.bloom_filter is not None:
+            self.bloom_filter.clear()
+        self.occurrences_seen = 0
+        self.duplicates_folded = 0
         logger.info("Deduplication cache cleared")
@@ -3,50 +3,187 @@ Alert Filtering Service
 Handles rule-based alert filtering logic
 """
 
-from typing import List, Dict, Any
-import re
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime
 import logging
+import threading
+
+from services.rule_compiler import CompiledRuleSet, CompiledRule, RuleStats, validate_rule
+from services.tenancy import get_tenant
 
 logger = logging.getLogger(__name__)
 
 
+class RuleSnapshot:
+    """Immutable, compiled view of every filter rule at one version"""
+
+    __slots__ = ("version", "rules", "tenant_rules", "compiled", "tenant_compiled", "source", "published_at")
+
+    def __init__(self, version: int, rules: Tuple[Dict[str, Any], ...],
+                 tenant_rules: Dict[str, Tuple[Dict[str, Any], ...]], compiled: CompiledRuleSet,
+                 tenant_compiled: Dict[str, CompiledRuleSet], source: str):
+        self.version = version
+        self.rules = rules
+        self.tenant_rules = tenant_rules
+        self.compiled = compiled
+        # Tenant -> compiled global + tenant rules, for tenants with their own rules
+        self.tenant_compiled = tenant_compiled
+        self.source = source
+        self.published_at = datetime.utcnow()
+
+    def ruleset_for(self, tenant: Optional[str]) -> CompiledRuleSet:
+        """Compiled rule set that applies to a tenant's alerts"""
+        return self.tenant_compiled.get(tenant, self.compiled)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "published_at": self.published_at.isoformat(),
+            "global_rules": len(self.rules),
+            "tenant_rule_sets": len(self.tenant_rules),
+        }
+
+
 class AlertFilter:
     """Handles alert filtering based on configurable rules"""
     
+    # Batches at least this large are filtered column-wise by default
+    COLUMNAR_BATCH_SIZE = 256
+    
     def __init__(self):
         """Initialize filter with default rules"""
-        self.rules = []
+        # (tenant or None for global, rule name) -> counters kept across recompiles
+        self._rule_stats: Dict[Tuple[Optional[str], str], RuleStats] = {}
+        self._snapshot = RuleSnapshot(0, (), {}, CompiledRuleSet([]), {}, "empty")
+        # Serializes writers only; readers just load the current snapshot
+        self._write_lock = threading.RLock()
+        self.alerts_evaluated = 0
+        self.alerts_passed = 0
         self.load_default_rules()
         logger.info(f"AlertFilter initialized with {len(self.rules)} default rules")
     
+    @property
+    def rules(self) -> Tuple[Dict[str, Any], ...]:
+        """Global rules of the current snapshot"""
+        return self._snapshot.rules
+    
+    @property
+    def tenant_rules(self) -> Dict[str, Tuple[Dict[str, Any], ...]]:
+        """Tenant rules of the current snapshot"""
+        return dict(self._snapshot.tenant_rules)
+    
+    @property
+    def version(self) -> int:
+        """Version of the current rule snapshot"""
+        return self._snapshot.version
+    
     def load_default_rules(self):
         """Load default filtering rules for MSP alerts"""
-        self.rules = [
+        self.publish([
             {
                 "name": "high_severity_only",
-                "field": "severity", 
-                "operator": "in", 
+                "field": "severity",
+                "operator": "in",
                 "value": ["critical", "high"],
                 "description": "Only process critical and high severity alerts"
             },
             {
                 "name": "active_status_only",
-                "field": "status", 
-                "operator": "equals", 
+                "field": "status",
+                "operator": "equals",
                 "value": "active",
                 "description": "Only process active alerts"
             },
             {
                 "name": "exclude_test_alerts",
-                "field": "name", 
-                "operator": "not_regex", 
+                "field": "name",
+                "operator": "not_regex",
                 "value": r".*test.*|.*demo.*",
                 "description": "Exclude test and demo alerts"
             }
-        ]
+        ], {}, source="defaults")
         logger.debug("Loaded default filtering rules")
     
-    def add_rule(self, rule: Dict[str, Any]):
+    def publish(self, rules: List[Dict[str, Any]], tenant_rules: Dict[str, List[Dict[str, Any]]],
+                source: str = "api") -> RuleSnapshot:
+        """
+        Compile a complete rule configuration and publish it as a new version
+        
+        Everything is compiled before the snapshot reference is swapped, so
+        readers see either the previous or the new version in full, never a
+        mix, and never wait on a lock.
+        
+        Args:
+            rules: Global rules
+            tenant_rules: Tenant -> rules applied on top of the global rules
+            source: Where the rules came from (defaults, api, a file path)
+        
+        Returns:
+            The published snapshot
+        """
+        for rule in rules:
+            validate_rule(rule)
+        for scoped in tenant_rules.values():
+            for rule in scoped:
+                validate_rule(rule)
+        
+        rules = tuple(rules)
+        tenant_rules = {tenant: tuple(scoped) for tenant, scoped in tenant_rules.items() if scoped}
+        with self._write_lock:
+            self._prune_stats(rules, tenant_rules)
+            global_stats = self._stats_for(None, rules)
+            snapshot = RuleSnapshot(
+                version=self._snapshot.version + 1,
+                rules=rules,
+                tenant_rules=tenant_rules,
+                compiled=CompiledRuleSet(list(rules), stats=global_stats),
+                tenant_compiled={
+                    tenant: CompiledRuleSet(list(rules + scoped), stats=global_stats + self._stats_for(tenant, scoped))
+                    for tenant, scoped in tenant_rules.items()
+                },
+                source=source,
+            )
+            self._snapshot = snapshot
+        logger.info(f"Published filter rules v{snapshot.version} from {source}: "
+                    f"{len(rules)} global, {len(tenant_rules)} tenant rule sets")
+        return snapshot
+    
+    def _stats_for(self, tenant: Optional[str], rules: Tuple[Dict[str, Any], ...]) -> List[RuleStats]:
+        """Counters for a scope's rules, created on first use"""
+        return [
+            self._rule_stats.setdefault((tenant, rule.get("name", "unnamed")), RuleStats())
+            for rule in rules
+        ]
+    
+    def _prune_stats(self, rules: Tuple[Dict[str, Any], ...], tenant_rules: Dict[str, Tuple[Dict[str, Any], ...]]):
+        """Drop counters of rules that are no longer configured"""
+        keys = {(None, rule.get("name", "unnamed")) for rule in rules}
+        keys.update(
+            (tenant, rule.get("name", "unnamed"))
+            for tenant, scoped in tenant_rules.items()
+            for rule in scoped
+        )
+        self._rule_stats = {key: stats for key, stats in self._rule_stats.items() if key in keys}
+    
+    def _set_rules(self, rules: List[Dict[str, Any]], tenant: Optional[str] = None):
+        """
+        Replace the rules of one scope and publish a new version
+        
+        Args:
+            rules: New rule list for the scope
+            tenant: Tenant whose rules are replaced, or None for global rules
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            tenant_rules = dict(snapshot.tenant_rules)
+            if tenant is None:
+                self.publish(rules, tenant_rules)
+                return
+            tenant_rules[tenant] = tuple(rules)
+            self.publish(list(snapshot.rules), tenant_rules)
+    
+    def add_rule(self, rule: Dict[str, Any], tenant: Optional[str] = None):
         """
         Add a new filtering rule
         
@@ -57,25 +194,31 @@ class AlertFilter:
                  - operator: Comparison operator (equals, in, not_in, regex, not_regex)
                  - value: Value to compare against
                  - description: Human-readable description
+            tenant: Tenant the rule applies to; None applies it to every alert
         """
-        required_fields = ["name", "field", "operator", "value"]
-        if not all(field in rule for field in required_fields):
-            raise ValueError(f"Rule must contain fields: {required_fields}")
+        validate_rule(rule)
         
-        self.rules.append(rule)
-        logger.info(f"Added filtering rule: {rule['name']}")
+        # Read and replace under the write lock so concurrent changes are not lost
+        with self._write_lock:
+            self._set_rules(self.get_rules(tenant) + [rule], tenant)
+        logger.info(f"Added filtering rule: {rule['name']}" + (f" for tenant {tenant}" if tenant else ""))
     
-    def remove_rule(self, rule_name: str):
+    def remove_rule(self, rule_name: str, tenant: Optional[str] = None):
         """
         Remove a filtering rule by name
         
         Args:
             rule_name: Name of rule to remove
+            tenant: Tenant the rule belongs to; None for global rules
         """
-        original_count = len(self.rules)
-        self.rules = [rule for rule in self.rules if rule.get("name") != rule_name]
+        with self._write_lock:
+            rules = self.get_rules(tenant)
+            remaining = [rule for rule in rules if rule.get("name") != rule_name]
+            removed = len(remaining) < len(rules)
+            if removed:
+                self._set_rules(remaining, tenant)
         
-        if len(self.rules) < original_count:
+        if removed:
             logger.info(f"Removed filtering rule: {rule_name}")
         else:
             logger.warning(f"Rule not found: {rule_name}")
@@ -87,105 +230,145 @@ class AlertFilter:
         Args:
             alert: Alert dictionary
             rule: Filter rule dictionary
-            
+        
         Returns:
             True if alert passes filter, False otherwise
         """
-        field = rule["field"]
-        operator = rule["operator"]
-        value = rule["value"]
-        
-        # Get alert value (check direct field, then labels, then annotations)
-        alert_value = alert.get(field)
-        if alert_value is None:
-            alert_value = alert.get("labels", {}).get(field)
-        if alert_value is None:
-            alert_value = alert.get("annotations", {}).get(field)
-        
-        # Apply operator logic
-        try:
-            if operator == "equals":
-                result = alert_value == value
-            elif operator == "in":
-                result = alert_value in value
-            elif operator == "not_in":
-                result = alert_value not in value
-            elif operator == "regex":
-                result = bool(re.search(value, str(alert_value), re.IGNORECASE))
-            elif operator == "not_regex":
-                result = not bool(re.search(value, str(alert_value), re.IGNORECASE))
-            elif operator == "contains":
-                result = str(value).lower() in str(alert_value).lower()
-            elif operator == "not_contains":
-                result = str(value).lower() not in str(alert_value).lower()
-            else:
-                logger.warning(f"Unknown operator '{operator}' in rule '{rule.get('name', 'unnamed')}'")
-                result = True  # Default to pass if unknown operator
-            
-            logger.debug(f"Rule '{rule.get('name', 'unnamed')}': {field} {operator} {value} -> {result}")
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error applying rule '{rule.get('name', 'unnamed')}': {e}")
-            return True  # Default to pass on error
-    
-    def filter_alerts(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return CompiledRule(rule).evaluate(alert)
+    
+    def decide(self, alert: Dict[str, Any]) -> Tuple[bool, int]:
+        """
+        Check an alert against all active rules
+        
+        Args:
+            alert: Alert dictionary
+        
+        Returns:
+            Tuple of whether the alert passes every global and tenant rule
+            (or no rules are configured), and the rule version that decided it
+        """
+        snapshot = self._snapshot
+        self.alerts_evaluated += 1
+        if snapshot.ruleset_for(get_tenant(alert))(alert):
+            self.alerts_passed += 1
+            return True, snapshot.version
+        return False, snapshot.version
+    
+    def passes(self, alert: Dict[str, Any]) -> bool:
+        """
+        Check an alert against all active rules
+        
+        Args:
+            alert: Alert dictionary
+        
+        Returns:
+            True if alert passes every global and tenant rule (or no rules
+            are configured)
+        """
+        return self.decide(alert)[0]
+    
+    def filter_alerts(self, alerts: List[Dict[str, Any]], columnar: Optional[bool] = None) -> List[Dict[str, Any]]:
         """
         Filter alerts based on all active rules
         
         Args:
             alerts: List of alert dictionaries
-            
+            columnar: Force the column-wise (True) or row-by-row (False)
+                      path; by default large batches are filtered column-wise
+        
         Returns:
             List of filtered alerts
         """
-        if not self.rules:
+        snapshot = self._snapshot
+        tenant_compiled = snapshot.tenant_compiled
+        if not len(snapshot.compiled) and not tenant_compiled:
             logger.warning("No filtering rules configured, returning all alerts")
             return alerts
         
-        filtered = []
         total_alerts = len(alerts)
+        if not tenant_compiled:
+            filtered = self._filter_with(snapshot.compiled, alerts, columnar)
+        else:
+            # Route each alert to its tenant's rule set; tenants without
+            # their own rules share the global set
+            partitions: Dict[Optional[str], List[Dict[str, Any]]] = {}
+            for alert in alerts:
+                tenant = get_tenant(alert)
+                partitions.setdefault(tenant if tenant in tenant_compiled else None, []).append(alert)
+            passed = set()
+            for tenant, partition in partitions.items():
+                compiled = snapshot.ruleset_for(tenant)
+                passed.update(id(alert) for alert in self._filter_with(compiled, partition, columnar))
+            filtered = [alert for alert in alerts if id(alert) in passed]
         
+        filtered_count = len(filtered)
+        filtered_out = total_alerts - filtered_count
+        self.alerts_evaluated += total_alerts
+        self.alerts_passed += filtered_count
+        
+        logger.info(f"Filtering complete: {total_alerts} total, {filtered_count} passed, {filtered_out} filtered out")
+        return filtered
+    
+    def _filter_with(self, compiled: CompiledRuleSet, alerts: List[Dict[str, Any]],
+                     columnar: Optional[bool]) -> List[Dict[str, Any]]:
+        """Filter alerts against one compiled rule set"""
+        if not len(compiled):
+            return list(alerts)
+        if columnar is None:
+            columnar = len(alerts) >= self.COLUMNAR_BATCH_SIZE
+        if columnar:
+            return compiled.filter_batch(alerts)
+        
+        filtered = []
         for alert in alerts:
             # Alert must pass ALL rules to be included
-            passes_all_rules = all(self.apply_filter(alert, rule) for rule in self.rules)
-            
-            if passes_all_rules:
+            if compiled(alert):
                 filtered.append(alert)
             else:
                 logger.debug(f"Alert filtered out: {alert.get('name', 'Unknown')}")
-        
-        filtered_count = len(filtered)
-        filtered_out = total_alerts - filtered_count
-        
-        logger.info(f"Filtering complete: {total_alerts} total, {filtered_count} passed, {filtered_out} filtered out")
         return filtered
     
-    def get_rules(self) -> List[Dict[str, Any]]:
+    def get_rules(self, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get all active filtering rules
         
+        Args:
+            tenant: Tenant whose own rules to return; None for global rules
+        
         Returns:
             List of rule dictionaries
         """
-        return self.rules.copy()
+        snapshot = self._snapshot
+        if tenant is None:
+            return list(snapshot.rules)
+        return list(snapshot.tenant_rules.get(tenant, ()))
     
-    def get_filter_stats(self, alerts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def get_filter_stats(self) -> Dict[str, Any]:
         """
-        Get filtering statistics for a set of alerts
+        Get running filtering statistics
+        
+        Counters accumulate as alerts are filtered; nothing is re-evaluated.
         
-        Args:
-            alerts: List of alert dictionaries
-            
         Returns:
-            Dictionary with filtering statistics
+            Dictionary with alert totals, the active rule version and per-rule
+            evaluations, rejections, errors and cumulative evaluation time
         """
-        filtered = self.filter_alerts(alerts)
+        snapshot = self._snapshot
+        for compiled in (snapshot.compiled, *snapshot.tenant_compiled.values()):
+            compiled.flush_stats()
+        total = self.alerts_evaluated
+        passed = self.alerts_passed
         
         return {
-            "total_alerts": len(alerts),
-            "filtered_alerts": len(filtered),
-            "filtered_out": len(alerts) - len(filtered),
-            "filter_rate": (len(alerts) - len(filtered)) / len(alerts) * 100 if alerts else 0,
-            "active_rules": len(self.rules)
+            "total_alerts": total,
+            "filtered_alerts": passed,
+            "filtered_out": total - passed,
+            "filter_rate": (total - passed) / total * 100 if total else 0,
+            "active_rules": len(snapshot.rules),
+            "tenant_rule_sets": len(snapshot.tenant_rules),
+            "rule_version": snapshot.to_dict(),
+            "rules": [
+                {"name": name, "tenant": tenant, **stats.to_dict()}
+                for (tenant, name), stats in self._rule_stats.items()
+            ]
         }
@@ -3,7 +3,7 @@ Alert service for MSP Alert Intelligence Platform
 """
 
 import logging
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
 
@@ -12,6 +12,7 @@ from sqlalchemy.orm import selectinload
 
 from models.alert import Alert, AlertCreate, AlertUpdate, AlertResponse, AlertStatus
 from core.database import get_redis
+from services.correlation_service import CorrelationService
 
 logger = logging.getLogger(__name__)
 
@@ -70,7 +71,8 @@ class AlertService:
             if alert:
                 # Cache the alert
                 await self._cache_alert(alert)
-                return self._to_response(alert)
+                correlations = CorrelationService(self.db).get_correlations([alert.id])
+                return self._to_response(alert, correlations[alert.id])
             
             return None
             
@@ -128,7 +130,10 @@ class AlertService:
             result = self.db.exec(statement)
             alerts = result.all()
             
-            return [self._to_response(alert) for alert in alerts], total
+            # Load correlations for the whole page in one query
+            correlations = CorrelationService(self.db).get_correlations(alert.id for alert in alerts)
+            
+            return [self._to_response(alert, correlations[alert.id]) for alert in alerts], total
             
         except Exception as e:
             logger.error(f"Failed to list alerts: {e}")
@@ -258,7 +263,7 @@ class AlertService:
             self.db.rollback()
             raise
     
-    def _to_response(self, alert: Alert) -> AlertResponse:
+    def _to_response(self, alert: Alert, correlations: Optional[List[Dict[str, Any]]] = None) -> AlertResponse:
         """Convert Alert model to AlertResponse"""
         return AlertResponse(
             id=alert.id,
@@ -276,7 +281,7 @@ class AlertService:
             resolved_at=alert.resolved_at,
             created_at=alert.created_at,
             enrichments=[],  # TODO: Load enrichments
-            correlations=[],  # TODO: Load correlations
+            correlations=correlations or [],
             incident_id=alert.incident_id
         )
     
@@ -0,0 +1,154 @@
+"""
+Rotating Bloom Filter
+Fixed-memory probabilistic dedup for very high fingerprint cardinality
+"""
+
+from typing import Dict, Any, List
+import hashlib
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
+class _BloomSlice:
+    """Bit array for one time slice of the window"""
+
+    __slots__ = ("bits", "bits_set", "items")
+
+    def __init__(self, num_bytes: int):
+        self.bits = bytearray(num_bytes)
+        self.bits_set = 0
+        self.items = 0
+
+
+class RotatingBloomFilter:
+    """Ring of time-bucketed Bloom filters covering one dedup window"""
+
+    def __init__(self, window_seconds: float, slices: int = 6,
+                 capacity_per_slice: int = 1_000_000, fp_rate: float = 0.001):
+        """
+        Initialize rotating Bloom filter
+
+        The window is split into slices; each slice has its own filter and
+        a fingerprint is a duplicate if any slice within the window holds
+        it. A slice is dropped as a whole once it leaves the window, so
+        memory stays fixed at (slices + 1) filters. Windows are rounded up
+        to slice boundaries.
+
+        Args:
+            window_seconds: Dedup window length in seconds
+            slices: Number of slices the window is split into
+            capacity_per_slice: Distinct fingerprints each slice is sized for
+            fp_rate: Target false-positive rate of a check across the ring
+        """
+        self.window_seconds = window_seconds
+        self.slices = slices
+        self.slice_seconds = window_seconds / slices
+        self.capacity_per_slice = capacity_per_slice
+        self.fp_rate = fp_rate
+
+        # A check probes slices + 1 filters, so each gets a share of the budget
+        per_slice_rate = fp_rate / (slices + 1)
+        num_bits = math.ceil(-capacity_per_slice * math.log(per_slice_rate) / (math.log(2) ** 2))
+        self.num_bytes = (num_bits + 7) // 8
+        self.num_bits = self.num_bytes * 8
+        self.num_hashes = max(1, round(self.num_bits / capacity_per_slice * math.log(2)))
+
+        self._ring: Dict[int, _BloomSlice] = {}
+        self._newest = None
+        logger.info(
+            f"RotatingBloomFilter initialized: {slices} slices x {self.num_bytes} bytes, "
+            f"{self.num_hashes} hashes"
+        )
+
+    def _positions(self, fingerprint: str) -> List[int]:
+        """Bit positions via double hashing of a 128-bit digest"""
+        digest = hashlib.blake2b(fingerprint.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def _rotate(self, newest: int):
+        """Advance the ring and drop slices that left the window"""
+        if self._newest is not None and newest <= self._newest:
+            return
+        self._newest = newest
+        oldest = newest - self.slices
+        for index in [i for i in self._ring if i < oldest]:
+            del self._ring[index]
+
+    @staticmethod
+    def _contains(bloom: _BloomSlice, positions: List[int]) -> bool:
+        bits = bloom.bits
+        for pos in positions:
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def check_and_add(self, fingerprint: str, event_ts: float) -> bool:
+        """
+        Check a fingerprint against the window and record it
+
+        Args:
+            fingerprint: Alert fingerprint
+            event_ts: Event time of the alert as an epoch timestamp
+
+        Returns:
+            True if the fingerprint was (probably) seen within the window
+        """
+        index = int(event_ts // self.slice_seconds)
+        self._rotate(index)
+        oldest = self._newest - self.slices
+        if index < oldest:
+            # Replay older than anything retained: cannot be judged, let it through
+            return False
+
+        positions = self._positions(fingerprint)
+        for i in range(max(oldest, index - self.slices), min(self._newest, index + self.slices) + 1):
+            bloom = self._ring.get(i)
+            if bloom is not None and self._contains(bloom, positions):
+                return True
+
+        bloom = self._ring.get(index)
+        if bloom is None:
+            bloom = self._ring[index] = _BloomSlice(self.num_bytes)
+        bits = bloom.bits
+        for pos in positions:
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                bloom.bits_set += 1
+        bloom.items += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get filter statistics
+
+        Returns:
+            Dictionary with fill ratio and the estimated false-positive rate
+            of a check against the slices currently in the ring
+        """
+        fills = [bloom.bits_set / self.num_bits for bloom in self._ring.values()]
+        miss_all = 1.0
+        for fill in fills:
+            miss_all *= 1 - fill ** self.num_hashes
+
+        return {
+            "slices_active": len(self._ring),
+            "slice_seconds": self.slice_seconds,
+            "items": sum(bloom.items for bloom in self._ring.values()),
+            "memory_bytes": self.num_bytes * len(self._ring),
+            "max_memory_bytes": self.num_bytes * (self.slices + 1),
+            "num_hashes": self.num_hashes,
+            "fill_ratio": max(fills, default=0.0),
+            "target_fp_rate": self.fp_rate,
+            "estimated_fp_rate": 1 - miss_all,
+        }
+
+    def clear(self):
+        """Drop every slice"""
+        self._ring.clear()
+        self._newest = None
@@ -0,0 +1,282 @@
+"""
+Streaming Correlation Engine
+Incrementally groups related alerts across requests while their window is open
+"""
+
+from typing import Dict, Any, List, Optional, Set, Tuple
+from collections import deque
+import itertools
+import logging
+
+from services.time_utils import event_time, isoformat
+from services.tenancy import get_tenant
+from services.topology import ServiceTopology
+from services.entity_extraction import EntityExtractor
+
+logger = logging.getLogger(__name__)
+
+EntityKey = Tuple[str, str, str]
+
+
+class CorrelationGroup:
+    """An open or closed set of correlated alerts"""
+
+    __slots__ = ("group_id", "alert_ids", "entities", "opened_at", "last_seen", "closed", "bucket",
+                 "merged_ids", "merged_into")
+
+    def __init__(self, group_id: str, ts: float):
+        self.group_id = group_id
+        self.alert_ids: List[str] = []
+        self.entities: Set[EntityKey] = set()
+        self.opened_at = ts
+        self.last_seen = ts
+        self.closed = False
+        self.bucket: Optional[int] = None
+        # Ids of groups folded into this one, and the group this one was folded into
+        self.merged_ids: List[str] = []
+        self.merged_into: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "group_id": self.group_id,
+            "status": "closed" if self.closed else "open",
+            "alert_count": len(self.alert_ids),
+            "alert_ids": list(self.alert_ids),
+            "entities": sorted(f"{kind}:{name}" for _, kind, name in self.entities),
+            "opened_at": isoformat(self.opened_at),
+            "last_seen": isoformat(self.last_seen),
+            "merged_ids": list(self.merged_ids),
+            "merged_into": self.merged_into,
+        }
+
+
+class StreamingCorrelator:
+    """
+    Long-lived correlation state shared by every ingest path
+
+    Open groups are indexed by entity key (tenant plus a canonical service,
+    host or pod from the entity extractor), so a new alert finds its group
+    with one dictionary lookup per key. An
+    alert touching several groups merges them, smaller into larger, and the
+    merged ids keep resolving to the surviving group. With a
+    topology, open groups of entities within its hop limit are joined too,
+    found through each entity's precomputed neighbourhood. Groups
+    are also filed in time buckets by expiry, and close once no alert has
+    joined them for window_seconds of event time.
+    """
+
+    # Expiry buckets per window; groups close at most this fraction late
+    BUCKETS_PER_WINDOW = 8
+
+    def __init__(self, window_seconds: float = 1800, max_closed: int = 1000,
+                 topology: Optional[ServiceTopology] = None, extractor: Optional[EntityExtractor] = None):
+        """
+        Initialize correlator
+
+        Args:
+            window_seconds: Idle time after which a group closes
+            max_closed: Number of recently closed groups kept for lookup
+            topology: Dependency graph linking related services and hosts,
+                      with nodes named by the extractor's normalize_id
+            extractor: Entity extractor (defaults to DEFAULT_ENTITY_KEYS)
+        """
+        self.window_seconds = window_seconds
+        self.topology = topology
+        self.extractor = extractor or EntityExtractor()
+        self._bucket_seconds = window_seconds / self.BUCKETS_PER_WINDOW
+        self._index: Dict[EntityKey, CorrelationGroup] = {}
+        self._groups: Dict[str, CorrelationGroup] = {}
+        # Merged group id -> id of the group it was folded into
+        self._aliases: Dict[str, str] = {}
+        self._buckets: Dict[int, Set[str]] = {}
+        self._next_bucket: Optional[int] = None
+        self._watermark = float("-inf")
+        self._ids = itertools.count(1)
+        self.closed_groups = deque(maxlen=max_closed)
+        self.alerts_correlated = 0
+        self.groups_opened = 0
+        self.groups_merged = 0
+        self.groups_closed = 0
+        logger.info(f"StreamingCorrelator initialized with {window_seconds}s window")
+
+    def _file(self, group: CorrelationGroup):
+        """Move a group to the bucket of its current expiry time"""
+        bucket = int((group.last_seen + self.window_seconds) // self._bucket_seconds)
+        if self._next_bucket is not None and bucket < self._next_bucket:
+            # Late alerts expire with the next sweep instead of in a bucket it has passed
+            bucket = self._next_bucket
+        if bucket == group.bucket:
+            return
+        if group.bucket is not None:
+            self._buckets[group.bucket].discard(group.group_id)
+        self._buckets.setdefault(bucket, set()).add(group.group_id)
+        group.bucket = bucket
+
+    def _close(self, group: CorrelationGroup):
+        group.closed = True
+        for key in group.entities:
+            if self._index.get(key) is group:
+                del self._index[key]
+        del self._groups[group.group_id]
+        if group.bucket is not None:
+            self._buckets[group.bucket].discard(group.group_id)
+        if len(self.closed_groups) == self.closed_groups.maxlen:
+            # The oldest closed group drops out of lookup, and its aliases with it
+            for merged_id in self.closed_groups[0].merged_ids:
+                self._aliases.pop(merged_id, None)
+        self.closed_groups.append(group)
+        self.groups_closed += 1
+
+    def expire(self, now: float) -> int:
+        """
+        Close groups whose expiry bucket lies entirely before now
+
+        Args:
+            now: Event-time watermark as an epoch timestamp
+
+        Returns:
+            Number of groups closed
+        """
+        current = int(now // self._bucket_seconds)
+        if self._next_bucket is None or not self._buckets:
+            self._next_bucket = current
+            return 0
+        if current - self._next_bucket <= len(self._buckets):
+            due = range(self._next_bucket, current)
+        else:
+            due = sorted(bucket for bucket in self._buckets if bucket < current)
+        closed = 0
+        for bucket in due:
+            for group_id in self._buckets.pop(bucket, ()):
+                group = self._groups[group_id]
+                group.bucket = None
+                self._close(group)
+                closed += 1
+        self._next_bucket = max(self._next_bucket, current)
+        return closed
+
+    def _candidate_keys(self, keys: List[EntityKey]) -> List[EntityKey]:
+        """The alert's own keys followed by those of topology neighbours"""
+        if self.topology is None:
+            return keys
+        candidates = list(keys)
+        for tenant, kind, value in keys:
+            for neighbor in self.topology.neighbors(f"{kind}:{value}"):
+                neighbor_kind, _, name = neighbor.partition(":")
+                candidates.append((tenant, neighbor_kind, name))
+        return candidates
+
+    def observe(self, alert: Dict[str, Any], ts: Optional[float] = None) -> Optional[CorrelationGroup]:
+        """
+        Add an alert to the open group of any entity it shares, opening or
+        merging groups as needed
+
+        Args:
+            alert: Alert dictionary with an "id"
+            ts: Event time; defaults to the alert's event time
+
+        Returns:
+            The alert's group, or None if the alert names no entity
+        """
+        tenant = get_tenant(alert)
+        keys = [(tenant, kind, name) for kind, name in self.extractor.extract(alert)]
+        if not keys:
+            return None
+        if ts is None:
+            ts = event_time(alert)
+        if ts > self._watermark:
+            self._watermark = ts
+            self.expire(ts)
+
+        groups: List[CorrelationGroup] = []
+        for key in self._candidate_keys(keys):
+            group = self._index.get(key)
+            if group is None or group in groups:
+                continue
+            if group.last_seen + self.window_seconds < self._watermark:
+                self._close(group)
+                continue
+            groups.append(group)
+
+        if not groups:
+            group = CorrelationGroup(f"cg-{next(self._ids)}", ts)
+            self._groups[group.group_id] = group
+            self.groups_opened += 1
+        else:
+            group = max(groups, key=lambda candidate: len(candidate.alert_ids))
+            for other in groups:
+                if other is not group:
+                    self._merge(group, other)
+
+        group.alert_ids.append(str(alert.get("id")))
+        group.opened_at = min(group.opened_at, ts)
+        group.last_seen = max(group.last_seen, ts)
+        for key in keys:
+            group.entities.add(key)
+            self._index[key] = group
+        self._file(group)
+        self.alerts_correlated += 1
+        return group
+
+    def _merge(self, group: CorrelationGroup, other: CorrelationGroup):
+        """Fold other into group"""
+        group.alert_ids.extend(other.alert_ids)
+        group.opened_at = min(group.opened_at, other.opened_at)
+        group.last_seen = max(group.last_seen, other.last_seen)
+        for key in other.entities:
+            group.entities.add(key)
+            self._index[key] = group
+        del self._groups[other.group_id]
+        if other.bucket is not None:
+            self._buckets[other.bucket].discard(other.group_id)
+            other.bucket = None
+        # Alerts already tagged with other's id, or any id merged into it,
+        # still find the surviving group
+        for merged_id in (other.group_id, *other.merged_ids):
+            self._aliases[merged_id] = group.group_id
+        group.merged_ids.append(other.group_id)
+        group.merged_ids.extend(other.merged_ids)
+        other.merged_ids = []
+        other.closed = True
+        other.merged_into = group.group_id
+        self.groups_merged += 1
+
+    def observe_batch(self, alerts: List[Dict[str, Any]]) -> List[CorrelationGroup]:
+        """
+        Feed a batch of alerts in event-time order
+
+        Returns:
+            Groups the batch touched that are still open, in first-touched order
+        """
+        touched: Dict[str, None] = {}
+        for alert in sorted(alerts, key=event_time):
+            group = self.observe(alert)
+            if group is not None:
+                touched[group.group_id] = None
+        open_ids = dict.fromkeys(self._aliases.get(group_id, group_id) for group_id in touched)
+        return [self._groups[group_id] for group_id in open_ids if group_id in self._groups]
+
+    def get_group(self, group_id: str) -> Optional[CorrelationGroup]:
+        """Look up an open or recently closed group; merged ids resolve to the surviving group"""
+        group_id = self._aliases.get(group_id, group_id)
+        group = self._groups.get(group_id)
+        if group is None:
+            group = next((closed for closed in self.closed_groups if closed.group_id == group_id), None)
+        return group
+
+    def get_groups(self, min_size: int = 2) -> List[Dict[str, Any]]:
+        """Open groups with at least min_size alerts, most recently active first"""
+        groups = [group for group in self._groups.values() if len(group.alert_ids) >= min_size]
+        return [group.to_dict() for group in sorted(groups, key=lambda group: group.last_seen, reverse=True)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get correlation statistics"""
+        return {
+            "open_groups": len(self._groups),
+            "indexed_entities": len(self._index),
+            "alerts_correlated": self.alerts_correlated,
+            "groups_opened": self.groups_opened,
+            "groups_merged": self.groups_merged,
+            "groups_closed": self.groups_closed,
+            "window_seconds": self.window_seconds,
+        }
@@ -0,0 +1,115 @@
+"""
+Correlation Grouping
+Collapses pairwise correlation edges into connected groups with union-find
+"""
+
+from typing import Dict, Any, Hashable, Iterable, List, Optional, Tuple
+
+
+class UnionFind:
+    """Disjoint sets over hashable items with path halving and union by size"""
+
+    def __init__(self):
+        self._parent: Dict[Hashable, Hashable] = {}
+        self._size: Dict[Hashable, int] = {}
+
+    def add(self, item: Hashable):
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        """Representative of item's set (item is added if unseen)"""
+        parent = self._parent
+        if item not in parent:
+            self.add(item)
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first: Hashable, second: Hashable) -> Hashable:
+        """Merge the sets of two items and return the new representative"""
+        first, second = self.find(first), self.find(second)
+        if first == second:
+            return first
+        if self._size[first] < self._size[second]:
+            first, second = second, first
+        self._parent[second] = first
+        self._size[first] += self._size.pop(second)
+        return first
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._parent
+
+
+Edge = Tuple[Hashable, Hashable, float, str]
+
+
+def group_edges(edges: Iterable[Edge], items: Optional[Iterable[Hashable]] = None,
+                min_size: int = 2, include_edges: bool = False) -> List[Dict[str, Any]]:
+    """
+    Group correlated alerts into connected components
+
+    Args:
+        edges: (alert_id, alert_id, confidence, correlation_type) tuples
+        items: Alert ids in preferred member order; ids seen only in edges
+               follow in order of first appearance
+        min_size: Smallest group to report
+        include_edges: Also list each group's edges under "edges"
+
+    Returns:
+        List of group dictionaries with member ids, edge count, mean and
+        maximum edge confidence and the correlation types involved, ordered
+        by their first member
+    """
+    sets = UnionFind()
+    order: Dict[Hashable, int] = {}
+    for item in items or ():
+        order.setdefault(item, len(order))
+    edge_list = []
+    for first, second, confidence, correlation_type in edges:
+        order.setdefault(first, len(order))
+        order.setdefault(second, len(order))
+        sets.union(first, second)
+        edge_list.append((first, second, confidence, correlation_type))
+
+    totals: Dict[Hashable, List[Any]] = {}
+    for first, second, confidence, correlation_type in edge_list:
+        total = totals.setdefault(sets.find(first), [0, 0.0, 0.0, set(), []])
+        total[0] += 1
+        total[1] += confidence
+        total[2] = max(total[2], confidence)
+        total[3].add(correlation_type)
+        if include_edges:
+            total[4].append({
+                "alert1_id": first,
+                "alert2_id": second,
+                "confidence": confidence,
+                "correlation_type": correlation_type,
+            })
+
+    members: Dict[Hashable, List[Hashable]] = {}
+    for item in sorted(order, key=order.__getitem__):
+        if item in sets:
+            members.setdefault(sets.find(item), []).append(item)
+
+    groups = []
+    for root, alert_ids in members.items():
+        if len(alert_ids) < min_size:
+            continue
+        edge_count, confidence_sum, max_confidence, types, group_edge_list = totals[root]
+        group = {
+            "group_id": f"group_{alert_ids[0]}",
+            "alert_ids": alert_ids,
+            "alert_count": len(alert_ids),
+            "edge_count": edge_count,
+            "confidence": round(confidence_sum / edge_count, 3),
+            "max_confidence": round(max_confidence, 3),
+            "correlation_types": sorted(types),
+        }
+        if include_edges:
+            group["edges"] = group_edge_list
+        groups.append(group)
+    return groups
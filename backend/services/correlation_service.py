@@ -3,15 +3,37 @@ Correlation service for MSP Alert Intelligence Platform
 """
 
 import logging
-from typing import List
-from uuid import UUID
-from sqlmodel import Session
+from typing import Any, Dict, Iterable, List
+from uuid import UUID, uuid4
+from sqlalchemy import Float, case, func, insert, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.expression import FunctionElement
+from sqlmodel import Session, select
 
-from models.alert import AlertCorrelationResponse
+from models.alert import Alert, AlertCorrelationResponse, AlertCorrelationGroup, AlertCorrelationMember
 
 logger = logging.getLogger(__name__)
 
 
+class _seconds_between(FunctionElement):
+    """Seconds from the second timestamp expression to the first"""
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(_seconds_between)
+def _compile_seconds_between(element, compiler, **kw):
+    later, earlier = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"EXTRACT(EPOCH FROM {later} - {earlier})"
+
+
+@compiles(_seconds_between, "sqlite")
+def _compile_seconds_between_sqlite(element, compiler, **kw):
+    later, earlier = (compiler.process(clause, **kw) for clause in element.clauses)
+    return f"((julianday({later}) - julianday({earlier})) * 86400.0)"
+
+
 class CorrelationService:
     """Service for alert correlation"""
     
@@ -25,20 +47,197 @@ class CorrelationService:
     ) -> AlertCorrelationResponse:
         """
         Correlate related alerts within a time window
-        Stub implementation - returns empty correlations for now
+        
+        Alerts with the same source and instance label whose start times
+        are chained by gaps of at most window_seconds form one group;
+        alerts without an instance label are not correlated. The
+        grouping runs in the database as a single gaps-and-islands query:
+        LAG finds each alert's predecessor per (source, instance), a running
+        SUM of window breaks numbers the groups, and COUNT drops singletons.
+        Only member rows come back, already ordered by group.
+        
+        Args:
+            alert_ids: Alerts to correlate
+            window_seconds: Largest gap between consecutive alerts in a group
+            
+        Returns:
+            Correlation groups and statistics
         """
         logger.info(f"Correlating {len(alert_ids)} alerts with window {window_seconds}s")
         
+        groups: List[Dict[str, Any]] = []
+        if alert_ids:
+            current = None
+            for alert_id, source, instance, started_at, island in self.db.exec(
+                self._correlation_statement(alert_ids, window_seconds)
+            ):
+                if current is None or current["_key"] != (source, instance, island):
+                    current = {
+                        "_key": (source, instance, island),
+                        "alert_ids": [],
+                        "correlation_type": "temporal+entity",
+                        "confidence": 0.85,
+                        "source": getattr(source, "value", source),
+                        "instance": instance,
+                        "started_at": started_at.isoformat(),
+                    }
+                    groups.append(current)
+                current["alert_ids"].append(str(alert_id))
+                current["ended_at"] = started_at.isoformat()
+            for group in groups:
+                del group["_key"]
+                group["alert_count"] = len(group["alert_ids"])
+        
+        correlated = sum(group["alert_count"] for group in groups)
         return AlertCorrelationResponse(
-            correlations=[],
+            correlations=groups,
             correlation_stats={
                 "total_alerts": len(alert_ids),
-                "correlations_found": 0
+                "correlations_found": len(groups),
+                "correlated_alerts": correlated
             }
         )
     
+    @staticmethod
+    def _correlation_statement(alert_ids: List[UUID], window_seconds: int):
+        """Gaps-and-islands query returning (id, source, instance, started_at, island) of grouped alerts"""
+        instance = Alert.labels["instance"].as_string()
+        entity = (Alert.source, instance)
+        previous = func.lag(Alert.started_at).over(partition_by=entity, order_by=(Alert.started_at, Alert.id))
+        breaks = (
+            select(
+                Alert.id,
+                Alert.source,
+                instance.label("instance"),
+                Alert.started_at,
+                case(
+                    (or_(previous.is_(None), _seconds_between(Alert.started_at, previous) > window_seconds), 1),
+                    else_=0
+                ).label("opens_group"),
+            )
+            .where(Alert.id.in_(alert_ids), instance.is_not(None))
+            .subquery()
+        )
+        
+        ordering = (breaks.c.started_at, breaks.c.id)
+        islands = select(
+            breaks.c.id,
+            breaks.c.source,
+            breaks.c.instance,
+            breaks.c.started_at,
+            func.sum(breaks.c.opens_group).over(
+                partition_by=(breaks.c.source, breaks.c.instance), order_by=ordering
+            ).label("island"),
+        ).subquery()
+        
+        sized = select(
+            islands,
+            func.count().over(
+                partition_by=(islands.c.source, islands.c.instance, islands.c.island)
+            ).label("size"),
+        ).subquery()
+        
+        return (
+            select(sized.c.id, sized.c.source, sized.c.instance, sized.c.started_at, sized.c.island)
+            .where(sized.c.size >= 2)
+            .order_by(sized.c.source, sized.c.instance, sized.c.island, sized.c.started_at, sized.c.id)
+        )
+    
     async def save_correlation(self, correlation: dict):
-        """Save correlation to database (stub)"""
-        logger.info(f"Saving correlation: {correlation}")
-        pass
-
+        """Save one correlation group to the database"""
+        await self.save_correlations([correlation])
+    
+    async def save_correlations(self, correlations: List[Dict[str, Any]]) -> int:
+        """
+        Bulk-insert correlation groups
+        
+        Each group is stored as one group row plus one membership row per
+        alert, instead of one row per correlated pair.
+        
+        Args:
+            correlations: Group dictionaries with "alert_ids", a
+                          "correlation_type" (or "correlation_types" list)
+                          and "confidence"
+            
+        Returns:
+            Number of groups saved
+        """
+        group_rows, member_rows = [], []
+        for correlation in correlations:
+            alert_ids = list(dict.fromkeys(UUID(str(alert_id)) for alert_id in correlation.get("alert_ids", [])))
+            if len(alert_ids) < 2:
+                continue
+            group_id = uuid4()
+            group_rows.append({
+                "id": group_id,
+                "correlation_type": (
+                    correlation.get("correlation_type")
+                    or "+".join(correlation.get("correlation_types", []))
+                    or "unknown"
+                ),
+                "confidence": float(correlation.get("confidence", 0.0)),
+                "alert_count": len(alert_ids),
+            })
+            member_rows.extend({"group_id": group_id, "alert_id": alert_id} for alert_id in alert_ids)
+        
+        if not group_rows:
+            return 0
+        try:
+            self.db.execute(insert(AlertCorrelationGroup), group_rows)
+            self.db.execute(insert(AlertCorrelationMember), member_rows)
+            self.db.commit()
+        except Exception as e:
+            logger.error(f"Failed to save correlations: {e}")
+            self.db.rollback()
+            raise
+        
+        logger.info(f"Saved {len(group_rows)} correlation groups with {len(member_rows)} members")
+        return len(group_rows)
+    
+    def get_correlations(self, alert_ids: Iterable[UUID]) -> Dict[UUID, List[Dict[str, Any]]]:
+        """
+        Load the correlation groups of several alerts in one query
+        
+        Memberships are looked up through the alert_id index and joined to
+        their group and fellow members.
+        
+        Args:
+            alert_ids: Alerts to load correlations for
+            
+        Returns:
+            Mapping of alert ID to its groups, each with the other members
+        """
+        alert_ids = list(alert_ids)
+        correlations: Dict[UUID, List[Dict[str, Any]]] = {alert_id: [] for alert_id in alert_ids}
+        if not alert_ids:
+            return correlations
+        
+        member = aliased(AlertCorrelationMember)
+        other = aliased(AlertCorrelationMember)
+        statement = (
+            select(
+                member.alert_id,
+                AlertCorrelationGroup.id,
+                AlertCorrelationGroup.correlation_type,
+                AlertCorrelationGroup.confidence,
+                other.alert_id,
+            )
+            .join(AlertCorrelationGroup, AlertCorrelationGroup.id == member.group_id)
+            .join(other, other.group_id == member.group_id)
+            .where(member.alert_id.in_(alert_ids), other.alert_id != member.alert_id)
+            .order_by(member.alert_id, AlertCorrelationGroup.created_at)
+        )
+        
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for alert_id, group_id, correlation_type, confidence, correlated_id in self.db.exec(statement):
+            group = groups.get((alert_id, group_id))
+            if group is None:
+                group = groups[(alert_id, group_id)] = {
+                    "group_id": str(group_id),
+                    "correlation_type": correlation_type,
+                    "confidence": confidence,
+                    "correlated_alert_ids": [],
+                }
+                correlations[alert_id].append(group)
+            group["correlated_alert_ids"].append(str(correlated_id))
+        return correlations
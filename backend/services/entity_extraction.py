@@ -0,0 +1,233 @@
+"""
+Entity Extraction
+Normalizes the hosts, pods and services an alert refers to into canonical entity IDs
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from collections import deque
+import logging
+import re
+
+import yaml
+
+from services.time_utils import event_time
+from services.tenancy import get_tenant
+
+logger = logging.getLogger(__name__)
+
+# Entity kind -> alert fields or labels that name an entity of that kind
+DEFAULT_ENTITY_KEYS: Dict[str, List[str]] = {
+    "service": ["service"],
+    "host": ["instance", "host", "hostname", "node", "nodename"],
+    "pod": ["pod", "pod_name"],
+}
+
+# Entity kinds whose names are network addresses, normalized without port
+HOST_KINDS = ("host",)
+
+# Kind of entity IDs written without a "kind:" prefix
+DEFAULT_ENTITY_KIND = "service"
+
+_PORT_RE = re.compile(r":\d+$")
+_IPV4_RE = re.compile(r"^\d{1,3}(\.\d{1,3}){3}$")
+
+Entity = Tuple[str, str]
+
+
+class EntityExtractor:
+    """Maps label keys of alerts onto canonical (kind, name) entities"""
+
+    def __init__(self, entity_keys: Optional[Dict[str, List[str]]] = None, strip_domain: bool = False,
+                 host_kinds: Tuple[str, ...] = HOST_KINDS):
+        """
+        Initialize extractor
+
+        Args:
+            entity_keys: Entity kind -> fields/labels naming it, checked in
+                         order on the alert, then its labels
+            strip_domain: Reduce fully qualified host names to their first
+                          label (IP addresses are kept whole); off by
+                          default, as it merges equal names in different
+                          domains
+            host_kinds: Entity kinds whose names are host addresses
+        """
+        self.entity_keys = {kind: list(keys) for kind, keys in (entity_keys or DEFAULT_ENTITY_KEYS).items()}
+        self.strip_domain = strip_domain
+        self.host_kinds = frozenset(host_kinds)
+        self.kinds = tuple(self.entity_keys)
+
+    @classmethod
+    def from_file(cls, path: str) -> "EntityExtractor":
+        """Load entity keys from a YAML (or JSON) file with an "entities" mapping"""
+        with open(path, "r") as f:
+            document = yaml.safe_load(f) or {}
+        return cls(
+            document.get("entities") or None,
+            bool(document.get("strip_domain", False)),
+            tuple(document.get("host_kinds") or HOST_KINDS),
+        )
+
+    def normalize(self, value: Any, kind: Optional[str] = None) -> str:
+        """
+        Canonical form of an entity name
+
+        Names are lower-cased. Host names also lose their port and, with
+        strip_domain, their domain; IPv6 addresses keep their colons.
+
+        Args:
+            value: Entity name as found on the alert
+            kind: Entity kind; None normalizes as a plain name
+        """
+        name = str(value).strip().lower()
+        if kind not in self.host_kinds:
+            return name
+        if name.startswith("["):
+            # Bracketed IPv6 address, optionally followed by a port
+            return name[1:].split("]", 1)[0]
+        if name.count(":") > 1:
+            return name  # Bare IPv6 address
+        name = _PORT_RE.sub("", name)
+        if self.strip_domain and "." in name and not _IPV4_RE.match(name):
+            name = name.split(".", 1)[0]
+        return name
+
+    def normalize_id(self, value: Any) -> str:
+        """
+        Canonical "kind:name" ID of an entity named in configuration
+
+        Names may carry a known kind as prefix ("host:DB-01.prod"); bare
+        names are DEFAULT_ENTITY_KIND. Topologies use this to name their
+        nodes, so a neighbour keeps its kind.
+        """
+        name = str(value).strip()
+        kind, sep, rest = name.partition(":")
+        kind = kind.strip().lower()
+        if not sep or kind not in self.entity_keys:
+            kind, rest = DEFAULT_ENTITY_KIND, name
+        return f"{kind}:{self.normalize(rest, kind)}"
+
+    def extract(self, alert: Dict[str, Any]) -> List[Entity]:
+        """
+        Entities an alert refers to
+
+        Uses the alert's "entities" field when ingest already filled it in,
+        as long as every entry is a "kind:name" ID of a known kind; other
+        lists (say, from upstream) are ignored.
+
+        Returns:
+            Distinct (kind, name) pairs
+        """
+        cached = alert.get("entities")
+        if isinstance(cached, list):
+            entities = [tuple(entity.split(":", 1)) for entity in cached if isinstance(entity, str)]
+            if len(entities) == len(cached) and all(
+                len(entity) == 2 and entity[0] in self.entity_keys for entity in entities
+            ):
+                return entities
+
+        labels = alert.get("labels") or {}
+        entities: List[Entity] = []
+        for kind, keys in self.entity_keys.items():
+            for key in keys:
+                value = alert.get(key) or labels.get(key)
+                if value:
+                    entity = (kind, self.normalize(value, kind))
+                    if entity not in entities:
+                        entities.append(entity)
+        return entities
+
+    def annotate(self, alert: Dict[str, Any]) -> List[str]:
+        """
+        Extract an alert's entities once and add them to its "entities" list
+        as "kind:name" IDs
+
+        Entries already present (say, from upstream) are kept ahead of them;
+        a value other than a list becomes the list's first entry.
+        """
+        existing = alert.pop("entities", None)
+        if existing is None:
+            existing = []
+        elif not isinstance(existing, list):
+            existing = [existing]
+        entities = [f"{kind}:{name}" for kind, name in self.extract(alert)]
+        alert["entities"] = existing + [entity for entity in entities if entity not in existing]
+        return alert["entities"]
+
+
+class EntityIndex:
+    """
+    Recent alert IDs per tenant and entity, for hash-join correlation
+
+    Entities with no alert left in the window are pruned once per window of
+    event time, so short-lived pods and hosts do not pile up.
+    """
+
+    def __init__(self, extractor: Optional[EntityExtractor] = None, window_seconds: float = 1800,
+                 max_per_entity: int = 200):
+        """
+        Initialize entity index
+
+        Args:
+            extractor: Entity extractor (defaults to DEFAULT_ENTITY_KEYS)
+            window_seconds: How long alerts stay associated with an entity
+            max_per_entity: Most recent alerts kept per entity
+        """
+        self.extractor = extractor or EntityExtractor()
+        self.window_seconds = window_seconds
+        self.max_per_entity = max_per_entity
+        self._recent: Dict[Tuple[str, Entity], deque] = {}
+        self._pruned_at = float("-inf")
+        self.lookups = 0
+        self.matches_found = 0
+
+    def add(self, alert: Dict[str, Any], ts: Optional[float] = None) -> List[Tuple[str, Entity]]:
+        """
+        Look up recent alerts sharing an entity with this one, then record it
+
+        Args:
+            alert: Alert dictionary with an "id"
+            ts: Event time; defaults to the alert's event time
+
+        Returns:
+            (alert_id, entity) pairs of earlier alerts in the window, one per
+            alert, naming the first entity they share
+        """
+        if ts is None:
+            ts = event_time(alert)
+        if ts - self._pruned_at >= self.window_seconds:
+            self.prune(ts)
+        tenant = get_tenant(alert)
+        alert_id = str(alert.get("id"))
+        cutoff = ts - self.window_seconds
+        related: Dict[str, Entity] = {}
+        for entity in self.extractor.extract(alert):
+            recent = self._recent.get((tenant, entity))
+            if recent is None:
+                recent = self._recent[(tenant, entity)] = deque(maxlen=self.max_per_entity)
+            while recent and recent[0][0] < cutoff:
+                recent.popleft()
+            for seen_at, other_id in recent:
+                if other_id != alert_id and abs(ts - seen_at) <= self.window_seconds:
+                    related.setdefault(other_id, entity)
+            recent.append((ts, alert_id))
+        self.lookups += 1
+        self.matches_found += len(related)
+        return list(related.items())
+
+    def prune(self, now: float) -> int:
+        """Drop entities with no alert in the window; returns how many were dropped"""
+        self._pruned_at = now
+        cutoff = now - self.window_seconds
+        stale = [key for key, recent in self._recent.items() if not recent or recent[-1][0] < cutoff]
+        for key in stale:
+            del self._recent[key]
+        return len(stale)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get entity index statistics"""
+        return {
+            "entities": len(self._recent),
+            "lookups": self.lookups,
+            "matches_found": self.matches_found,
+            "window_seconds": self.window_seconds,
+        }
@@ -0,0 +1,183 @@
+"""
+Alert Fingerprinting
+Compiles per-source fingerprint schemas into extractor functions
+"""
+
+from typing import List, Dict, Any, Callable, Optional, Union
+import hashlib
+import logging
+import re
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Volatile tokens that keep otherwise identical alerts from collapsing.
+# A schema applies them in the order it lists them, so list the broader
+# patterns (uuid, ipv4, hostname) before the "number" catch-all.
+NORMALIZERS = {
+    "uuid": (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE), "<uuid>"),
+    "ipv4": (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b"), "<ip>"),
+    "hostname": (re.compile(r"\b[a-z0-9-]+(?:\.[a-z0-9-]+)+\.[a-z]{2,}\b", re.IGNORECASE), "<host>"),
+    "pod_suffix": (re.compile(r"-[a-z0-9]{6,10}-[a-z0-9]{5}\b"), "-<pod>"),
+    "hex": (re.compile(r"\b(?:0x)?[0-9a-f]{8,}\b", re.IGNORECASE), "<hex>"),
+    "number": (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+}
+
+DEFAULT_SCHEMA = {
+    "fields": [
+        "source",
+        ["labels.service", "service"],
+        ["name", "title"],
+        "severity",
+    ],
+    "labels": [],
+    "normalize": [],
+}
+
+
+def _hash(key: str) -> str:
+    """
+    128-bit hex digest of a fingerprint key
+
+    Always BLAKE2b from the standard library, so every worker and every
+    stored fingerprint agree regardless of which optional packages a host
+    has installed.
+    """
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _compile_getter(paths: Union[str, List[str]]) -> Callable[[Dict[str, Any]], Any]:
+    """Compile a field path (or fallback list of paths) into a getter"""
+    if isinstance(paths, str):
+        paths = [paths]
+    split_paths = [tuple(path.split(".")) for path in paths]
+
+    def getter(alert: Dict[str, Any]) -> Any:
+        for parts in split_paths:
+            value = alert
+            for part in parts:
+                value = value.get(part) if isinstance(value, dict) else None
+                if value is None:
+                    break
+            if value not in (None, ""):
+                return value
+        return None
+
+    return getter
+
+
+def _compile_normalizer(steps: List[Union[str, Dict[str, str]]]) -> Callable[[str], str]:
+    """Compile builtin normalizer names and custom pattern dicts into one function"""
+    compiled = []
+    for step in steps:
+        if isinstance(step, str):
+            if step not in NORMALIZERS:
+                raise ValueError(f"Unknown normalizer: {step}")
+            compiled.append(NORMALIZERS[step])
+        else:
+            compiled.append((re.compile(step["pattern"]), step.get("replace", "")))
+
+    if not compiled:
+        return lambda value: value
+
+    def normalize(value: str) -> str:
+        for pattern, replacement in compiled:
+            value = pattern.sub(replacement, value)
+        return value
+
+    return normalize
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Dict[str, Any]], str]:
+    """
+    Compile a fingerprint schema into an extractor function
+
+    Args:
+        schema: Dictionary with keys:
+               - fields: alert fields to key on; each entry is a dotted path
+                 or a list of fallback paths (e.g. ["labels.service", "service"])
+               - labels: label keys appended to the key
+               - normalize: builtin normalizer names (see NORMALIZERS) or
+                 {"pattern": ..., "replace": ...} dicts applied to every part
+
+    Returns:
+        Function mapping an alert dictionary to its fingerprint
+    """
+    getters = [_compile_getter(paths) for paths in schema.get("fields", DEFAULT_SCHEMA["fields"])]
+    getters += [_compile_getter(f"labels.{key}") for key in schema.get("labels", [])]
+    normalize = _compile_normalizer(schema.get("normalize", []))
+
+    def extract(alert: Dict[str, Any]) -> str:
+        parts = []
+        for getter in getters:
+            value = getter(alert)
+            if value is None:
+                parts.append("unknown")
+            else:
+                if isinstance(value, list):
+                    value = ",".join(str(v) for v in value)
+                parts.append(normalize(str(value)))
+        return _hash(":".join(parts))
+
+    return extract
+
+
+class Fingerprinter:
+    """Generates alert fingerprints from per-source compiled schemas"""
+
+    def __init__(self, schemas: Optional[Dict[str, Any]] = None):
+        """
+        Initialize fingerprinter
+
+        Args:
+            schemas: Dictionary with an optional "default" schema and a
+                     "sources" mapping of source name to schema
+        """
+        schemas = schemas or {}
+        self._default = compile_schema(schemas.get("default", DEFAULT_SCHEMA))
+        self._by_source: Dict[str, Callable[[Dict[str, Any]], str]] = {
+            source: compile_schema(schema)
+            for source, schema in (schemas.get("sources") or {}).items()
+        }
+        logger.info(f"Fingerprinter initialized with {len(self._by_source)} source schemas")
+
+    @classmethod
+    def from_file(cls, path: str) -> "Fingerprinter":
+        """Load schemas from a YAML (or JSON) file"""
+        with open(path, "r") as f:
+            return cls(yaml.safe_load(f) or {})
+
+    def _extractor(self, alert: Dict[str, Any]) -> Callable[[Dict[str, Any]], str]:
+        source = alert.get("source")
+        if isinstance(source, list):
+            source = source[0] if source else None
+        return self._by_source.get(source, self._default) if self._by_source else self._default
+
+    def fingerprint(self, alert: Dict[str, Any]) -> str:
+        """
+        Generate the fingerprint for one alert
+
+        Args:
+            alert: Alert dictionary
+
+        Returns:
+            128-bit hex fingerprint string
+        """
+        return self._extractor(alert)(alert)
+
+    def fingerprint_batch(self, alerts: List[Dict[str, Any]]) -> List[str]:
+        """
+        Generate fingerprints for a list of alerts
+
+        Args:
+            alerts: List of alert dictionaries
+
+        Returns:
+            Fingerprints in the same order as alerts
+        """
+        if not self._by_source:
+            extract = self._default
+            return [extract(alert) for alert in alerts]
+        extractor = self._extractor
+        return [extractor(alert)(alert) for alert in alerts]
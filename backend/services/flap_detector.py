@@ -0,0 +1,184 @@
+"""
+Flap Detection Service
+Collapses alerts that oscillate between firing and resolved
+"""
+
+from typing import Dict, Any, List, Optional
+from collections import OrderedDict, deque
+import logging
+
+from services.time_utils import isoformat
+
+logger = logging.getLogger(__name__)
+
+_RESOLVED_STATUSES = {"resolved", "ok", "closed", "inactive"}
+
+
+def _normalize_status(status: Any) -> str:
+    """Collapse provider status values into firing/resolved"""
+    return "resolved" if str(status or "").lower() in _RESOLVED_STATUSES else "firing"
+
+
+class FlapRecord:
+    """State-transition history and flapping state of one fingerprint"""
+
+    __slots__ = ("status", "transitions", "last_transition", "flapping_since", "last_seen", "updates", "last_alert")
+
+    def __init__(self, status: str, event_ts: float):
+        self.status = status
+        self.transitions: deque = deque()
+        self.last_transition = event_ts
+        self.flapping_since: Optional[float] = None
+        self.last_seen = event_ts
+        self.updates = 0
+        self.last_alert: Optional[Dict[str, Any]] = None
+
+    def to_dict(self, fingerprint: str) -> Dict[str, Any]:
+        return {
+            "fingerprint": fingerprint,
+            "state": "flapping" if self.flapping_since is not None else "stable",
+            "current_status": self.status,
+            "transitions_in_window": len(self.transitions),
+            "flapping_since": isoformat(self.flapping_since) if self.flapping_since is not None else None,
+            "updates_suppressed": self.updates,
+        }
+
+
+class FlapDetector:
+    """Tracks state-transition frequency per fingerprint in a sliding window"""
+
+    def __init__(self, window_seconds: float = 600, flap_threshold: int = 4,
+                 stable_seconds: float = 300, max_entries: int = 100_000):
+        """
+        Initialize flap detector
+
+        Args:
+            window_seconds: Sliding window over which transitions are counted
+            flap_threshold: Transitions within the window that mark an alert
+                            as flapping
+            stable_seconds: Time without a transition after which a flapping
+                            alert is considered stable again
+            max_entries: Cap on tracked fingerprints; least recently seen
+                         fingerprints are dropped first
+        """
+        self.window_seconds = window_seconds
+        self.flap_threshold = flap_threshold
+        self.stable_seconds = stable_seconds
+        self.max_entries = max_entries
+        self.records: "OrderedDict[str, FlapRecord]" = OrderedDict()
+        self.flapping: set = set()
+        self.watermark = float("-inf")
+        self.stabilized: deque = deque()
+        self.suppressed = 0
+        self.flaps_stabilized = 0
+        logger.info(f"FlapDetector initialized: {flap_threshold} transitions per {window_seconds}s")
+
+    def observe(self, fingerprint: str, status: Any, event_ts: float,
+                alert: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Record a status update for a fingerprint
+
+        Args:
+            fingerprint: Alert fingerprint
+            status: Provider status of this update (firing, resolved, ...)
+            event_ts: Time of the update as an epoch timestamp
+            alert: Alert payload, kept as the latest state of a flapping record
+
+        Returns:
+            The flapping record as a dictionary if the update should be
+            suppressed, None if the alert is stable and should be processed
+        """
+        status = _normalize_status(status)
+        if event_ts > self.watermark:
+            self.watermark = event_ts
+            self.expire(event_ts)
+        record = self.records.get(fingerprint)
+        if record is None:
+            record = self.records[fingerprint] = FlapRecord(status, event_ts)
+            while len(self.records) > self.max_entries:
+                self.flapping.discard(self.records.popitem(last=False)[0])
+            return None
+        self.records.move_to_end(fingerprint)
+
+        transitions = record.transitions
+        if status != record.status:
+            record.status = status
+            record.last_transition = event_ts
+            transitions.append(event_ts)
+        record.last_seen = max(record.last_seen, event_ts)
+        while transitions and transitions[0] <= event_ts - self.window_seconds:
+            transitions.popleft()
+
+        if record.flapping_since is not None:
+            if event_ts - record.last_transition >= self.stable_seconds:
+                # This update is itself the final state, so it is processed
+                # normally instead of being emitted as a stabilized record
+                self._stabilize(fingerprint, record)
+                return None
+        elif len(transitions) >= self.flap_threshold:
+            logger.info(f"Alert {fingerprint} is flapping: {len(transitions)} transitions in {self.window_seconds}s")
+            record.flapping_since = event_ts
+            self.flapping.add(fingerprint)
+        else:
+            return None
+
+        record.updates += 1
+        record.last_alert = alert
+        self.suppressed += 1
+        return record.to_dict(fingerprint)
+
+    def _stabilize(self, fingerprint: str, record: FlapRecord) -> Dict[str, Any]:
+        """Clear the flapping state of a record and return its final state"""
+        logger.info(f"Alert {fingerprint} stabilized in state {record.status}")
+        final = {**record.to_dict(fingerprint), "state": "stable", "alert": record.last_alert}
+        record.flapping_since = None
+        record.updates = 0
+        record.last_alert = None
+        record.transitions.clear()
+        self.flapping.discard(fingerprint)
+        self.flaps_stabilized += 1
+        return final
+
+    def expire(self, now: float) -> int:
+        """
+        Stabilize flapping fingerprints that have gone quiet
+
+        Args:
+            now: Current watermark as an epoch timestamp
+
+        Returns:
+            Number of fingerprints that stabilized; their final states are
+            queued for pop_stabilized
+        """
+        quiet = [
+            fingerprint for fingerprint in self.flapping
+            if now - self.records[fingerprint].last_transition >= self.stable_seconds
+        ]
+        for fingerprint in quiet:
+            self.stabilized.append(self._stabilize(fingerprint, self.records[fingerprint]))
+        return len(quiet)
+
+    def pop_stabilized(self) -> List[Dict[str, Any]]:
+        """
+        Take the final states of flaps that stabilized without a new update
+
+        Each entry is the record as a dictionary with the last suppressed
+        alert payload under "alert", to be processed as the alert's state.
+        """
+        stabilized = list(self.stabilized)
+        self.stabilized.clear()
+        return stabilized
+
+    def get_flapping(self) -> Dict[str, Dict[str, Any]]:
+        """Get every fingerprint currently marked as flapping"""
+        return {fingerprint: self.records[fingerprint].to_dict(fingerprint) for fingerprint in self.flapping}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get flap detection statistics"""
+        return {
+            "tracked_fingerprints": len(self.records),
+            "flapping": len(self.flapping),
+            "updates_suppressed": self.suppressed,
+            "flaps_stabilized": self.flaps_stabilized,
+            "flapping_alerts": list(self.get_flapping().values()),
+        }
@@ -0,0 +1,120 @@
+"""
+Multi-Pattern Matcher
+Finds which of many substring and regex patterns occur in a string in one scan
+"""
+
+from typing import AbstractSet, Dict, List, Set
+import re
+import logging
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+
+class _Alternation:
+    """
+    One regex alternation over many patterns, each in its own group
+
+    A single finditer scan reports the pattern behind every match through
+    the group that matched. Matches do not overlap and the first pattern
+    matching at a position wins, so a pattern whose only occurrences are
+    covered by another reported match can be missed; the result is empty
+    only when no pattern matches at all. Callers check the patterns they
+    must not miss with search.
+    """
+
+    def __init__(self, patterns: List[str], flags: int):
+        self._combined = re.compile("|".join(f"({pattern})" for pattern in patterns), flags)
+        self._individual = [re.compile(pattern, flags).search for pattern in patterns]
+
+    def matches(self, text: str) -> Set[int]:
+        return {match.lastindex - 1 for match in self._combined.finditer(text)}
+
+    def search(self, i: int, text: str) -> bool:
+        return self._individual[i](text) is not None
+
+
+class MultiPatternMatcher:
+    """Matches a fixed set of substring and regex patterns against strings"""
+
+    def __init__(self, literals: List[str], patterns: List[str], flags: int = re.IGNORECASE):
+        """
+        Initialize matcher
+
+        Substring literals go into an Aho-Corasick automaton when
+        pyahocorasick is installed, otherwise into an escaped regex
+        alternation. Regex patterns are merged into one alternation.
+        An alternation reports matches in one scan but can miss a pattern
+        that only overlaps another match, so indices passed as required
+        are confirmed with their own search when the scan misses them.
+        Patterns with capture groups are rejected, since merging would
+        renumber their backreferences.
+
+        Literal and regex matches are reported as indices into the
+        literals and patterns lists respectively.
+
+        Args:
+            literals: Substrings to look for (matched as given; callers
+                      lower-case both sides for case-insensitive matching)
+            patterns: Regex patterns to search for
+            flags: Flags applied to the regex patterns
+
+        Raises:
+            ValueError: If a pattern has capture groups
+            re.error: If a pattern is invalid
+        """
+        for pattern in patterns:
+            if re.compile(pattern, flags).groups:
+                raise ValueError(f"Pattern with capture groups cannot be merged: {pattern}")
+        self.literals = list(literals)
+        self.patterns = list(patterns)
+
+        # Empty needles are contained in every string
+        self._always = {i for i, literal in enumerate(literals) if not literal}
+        # Duplicate literals share one needle reporting all their indices
+        by_needle: Dict[str, List[int]] = {}
+        for i, literal in enumerate(literals):
+            if literal:
+                by_needle.setdefault(literal, []).append(i)
+        self._automaton = None
+        self._literal_alternation = None
+        if by_needle and ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for literal, indices in by_needle.items():
+                automaton.add_word(literal, indices)
+            automaton.make_automaton()
+            self._automaton = automaton
+        elif by_needle:
+            self._literal_positions = list(by_needle.values())
+            self._literal_slots = {i: slot for slot, indices in enumerate(self._literal_positions) for i in indices}
+            self._literal_alternation = _Alternation([re.escape(literal) for literal in by_needle], 0)
+        self._pattern_alternation = _Alternation(patterns, flags) if patterns else None
+
+    def match_literals(self, text: str, required: AbstractSet[int] = frozenset()) -> Set[int]:
+        """Indices of the literals contained in text; required ones are never missed"""
+        found = set(self._always)
+        if self._automaton is not None:
+            for _, indices in self._automaton.iter(text):
+                found.update(indices)
+        elif self._literal_alternation is not None:
+            alternation = self._literal_alternation
+            for slot in alternation.matches(text):
+                found.update(self._literal_positions[slot])
+            for i in required - found:
+                slot = self._literal_slots.get(i)
+                if slot is not None and alternation.search(slot, text):
+                    found.update(self._literal_positions[slot])
+        return found
+
+    def match_patterns(self, text: str, required: AbstractSet[int] = frozenset()) -> Set[int]:
+        """Indices of the regex patterns found in text; required ones are never missed"""
+        alternation = self._pattern_alternation
+        if alternation is None:
+            return set()
+        found = alternation.matches(text)
+        found.update(i for i in required - found if alternation.search(i, text))
+        return found
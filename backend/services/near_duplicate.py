@@ -0,0 +1,188 @@
+"""
+Near-Duplicate Detection
+Folds alerts with near-identical text into existing groups using MinHash/LSH
+"""
+
+from typing import List, Dict, Any, Optional, FrozenSet
+import hashlib
+import heapq
+import logging
+import random
+import re
+
+from services.tenancy import get_tenant
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def alert_tokens(alert: Dict[str, Any]) -> FrozenSet[str]:
+    """Word tokens of an alert's title/name and description, plus its service"""
+    text = f"{alert.get('title') or alert.get('name') or ''} {alert.get('description') or ''}"
+    tokens = set(_TOKEN_RE.findall(text.lower()))
+    service = alert.get("service") or (alert.get("labels") or {}).get("service")
+    if service:
+        tokens.add(f"service={service}")
+    return frozenset(tokens)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "little")
+
+
+class _Group:
+    """A near-duplicate group: the representative's tokens plus counters"""
+
+    __slots__ = ("group_id", "tokens", "band_keys", "count", "last_seen")
+
+    def __init__(self, group_id: str, tokens: FrozenSet[str], band_keys: List[int], event_ts: float):
+        self.group_id = group_id
+        self.tokens = tokens
+        self.band_keys = band_keys
+        self.count = 1
+        self.last_seen = event_ts
+
+
+class _TenantIndex:
+    """LSH buckets and expiry heap for one tenant"""
+
+    __slots__ = ("buckets", "groups", "expiry_heap")
+
+    def __init__(self):
+        self.buckets: Dict[int, List[str]] = {}
+        self.groups: Dict[str, _Group] = {}
+        self.expiry_heap: List[tuple] = []
+
+
+class NearDuplicateIndex:
+    """Rolling per-tenant MinHash/LSH index of recent alerts"""
+
+    def __init__(self, threshold: float = 0.8, window_seconds: float = 300,
+                 num_perm: int = 64, bands: int = 16, max_groups_per_tenant: int = 10000):
+        """
+        Initialize near-duplicate index
+
+        LSH only proposes candidates; each candidate is confirmed with the
+        exact Jaccard similarity of its token set before an alert is folded.
+
+        Args:
+            threshold: Minimum Jaccard similarity to fold an alert into a group
+            window_seconds: How long a group accepts new members after its last one
+            num_perm: Number of MinHash permutations
+            bands: Number of LSH bands (num_perm must be divisible by it)
+            max_groups_per_tenant: Cap on open groups per tenant; the group
+                                   that expires first is dropped beyond it
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_groups_per_tenant = max_groups_per_tenant
+        rng = random.Random(1)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._tenants: Dict[str, _TenantIndex] = {}
+        self.folded = 0
+        logger.info(f"NearDuplicateIndex initialized with threshold {threshold}")
+
+    def _band_keys(self, tokens: FrozenSet[str]) -> List[int]:
+        """MinHash signature of a token set, hashed per LSH band"""
+        hashes = [_token_hash(token) for token in tokens] or [0]
+        signature = [
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._perms
+        ]
+        rows = self.rows
+        return [hash((band, *signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _expire(self, index: _TenantIndex, now: float):
+        heap = index.expiry_heap
+        while heap and (heap[0][0] <= now or len(index.groups) > self.max_groups_per_tenant):
+            expires_at, group_id = heapq.heappop(heap)
+            group = index.groups.get(group_id)
+            # Skip entries superseded by a later refresh of the same group
+            if group is None or group.last_seen + self.window_seconds != expires_at:
+                continue
+            self._remove(index, group)
+
+    @staticmethod
+    def _remove(index: _TenantIndex, group: _Group):
+        del index.groups[group.group_id]
+        for key in group.band_keys:
+            members = index.buckets.get(key)
+            if members is None:
+                continue
+            members.remove(group.group_id)
+            if not members:
+                del index.buckets[key]
+
+    def fold(self, alert: Dict[str, Any], group_id: str, event_ts: float) -> Optional[Dict[str, Any]]:
+        """
+        Fold an alert into a near-duplicate group, or index it as a new group
+
+        Args:
+            alert: Alert dictionary
+            group_id: Id for a new group if the alert opens one (its fingerprint)
+            event_ts: Event time of the alert as an epoch timestamp
+
+        Returns:
+            Dictionary with the matched group_id, similarity and count if the
+            alert was folded, None if it opened a new group
+        """
+        tenant = get_tenant(alert)
+        index = self._tenants.get(tenant)
+        if index is None:
+            index = self._tenants[tenant] = _TenantIndex()
+        self._expire(index, event_ts)
+
+        tokens = alert_tokens(alert)
+        band_keys = self._band_keys(tokens)
+
+        best, best_similarity, seen = None, 0.0, set()
+        for key in band_keys:
+            for candidate_id in index.buckets.get(key, ()):
+                if candidate_id in seen:
+                    continue
+                seen.add(candidate_id)
+                candidate = index.groups[candidate_id]
+                union = len(tokens | candidate.tokens)
+                similarity = len(tokens & candidate.tokens) / union if union else 1.0
+                if similarity > best_similarity:
+                    best, best_similarity = candidate, similarity
+
+        if best is not None and best_similarity >= self.threshold:
+            best.count += 1
+            if event_ts > best.last_seen:
+                best.last_seen = event_ts
+                heapq.heappush(index.expiry_heap, (event_ts + self.window_seconds, best.group_id))
+            self.folded += 1
+            return {"group_id": best.group_id, "similarity": round(best_similarity, 3), "count": best.count}
+
+        if group_id in index.groups:
+            self._remove(index, index.groups[group_id])
+        group = _Group(group_id, tokens, band_keys, event_ts)
+        index.groups[group_id] = group
+        for key in band_keys:
+            index.buckets.setdefault(key, []).append(group_id)
+        heapq.heappush(index.expiry_heap, (event_ts + self.window_seconds, group_id))
+        self._expire(index, event_ts)
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        return {
+            "threshold": self.threshold,
+            "tenants": len(self._tenants),
+            "open_groups": sum(len(index.groups) for index in self._tenants.values()),
+            "near_duplicates_folded": self.folded,
+        }
+
+    def clear(self):
+        """Drop all indexed groups"""
+        self._tenants.clear()
@@ -0,0 +1,132 @@
+"""
+Redis Deduplication Store
+Shares dedup windows across worker processes through Redis
+"""
+
+from typing import List, Tuple
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from services.alert_deduplicator import SharedStoreUnavailable
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] fingerprint key; ARGV[1] event time, ARGV[2] window in seconds,
+# ARGV[3] key lifetime in ms. The key holds the event time that opened the
+# window, so windows are judged in event time like AlertDeduplicator's.
+# Returns 1 if the event is outside the open window (a stale replay older
+# than it does not move the window back), 0 if it is a duplicate.
+_CLAIM_SCRIPT = """
+local start = tonumber(redis.call('GET', KEYS[1]))
+local event_ts = tonumber(ARGV[1])
+if start and math.abs(event_ts - start) < tonumber(ARGV[2]) then
+    return 0
+end
+if not start or event_ts > start then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[3])
+end
+return 1
+"""
+
+
+class RedisDedupStore:
+    """Dedup window claims backed by an atomic Redis script per fingerprint"""
+
+    def __init__(self, window_seconds: float, client=None, key_prefix: str = "msp:dedup",
+                 retry_seconds: float = 30.0):
+        """
+        Initialize Redis dedup store
+
+        Args:
+            window_seconds: Dedup window length in seconds
+            client: redis.asyncio client; defaults to core.database.get_redis()
+            key_prefix: Prefix for fingerprint keys
+            retry_seconds: How long to stay on the in-memory fallback after a
+                           Redis failure before trying Redis again
+        """
+        self.window_seconds = window_seconds
+        self.key_prefix = key_prefix
+        self.retry_seconds = retry_seconds
+        self._client = client
+        self._down_until = 0.0
+
+    async def _get_client(self):
+        """Resolve the Redis client, failing fast while Redis is known to be down"""
+        if time.monotonic() < self._down_until:
+            raise SharedStoreUnavailable("Redis marked unavailable")
+        if self._client is not None:
+            return self._client
+        from core.database import get_redis
+        try:
+            return await get_redis()
+        except RuntimeError as e:
+            raise SharedStoreUnavailable(str(e)) from e
+
+    def _claim_args(self, fingerprint: str, event_ts: float) -> tuple:
+        """EVAL arguments claiming a fingerprint's window at an event time"""
+        # Keys live for a full window of wall-clock time, so replays of old
+        # alerts arriving across workers are still caught
+        return (_CLAIM_SCRIPT, 1, f"{self.key_prefix}:{fingerprint}",
+                repr(event_ts), self.window_seconds, int(self.window_seconds * 1000))
+
+    def _mark_down(self, error: Exception):
+        if time.monotonic() >= self._down_until:
+            logger.warning(f"Redis dedup store unavailable, using in-memory fallback: {error}")
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    async def claim(self, fingerprint: str, event_ts: float) -> bool:
+        """
+        Atomically claim the dedup window for a fingerprint
+
+        Args:
+            fingerprint: Alert fingerprint
+            event_ts: Event time of the alert as an epoch timestamp
+
+        Returns:
+            True if this call opened the window, False if it was already open
+
+        Raises:
+            SharedStoreUnavailable: If Redis cannot be reached
+        """
+        client = await self._get_client()
+        try:
+            created = await client.eval(*self._claim_args(fingerprint, event_ts))
+        except (RedisError, OSError) as e:
+            self._mark_down(e)
+            raise SharedStoreUnavailable(str(e)) from e
+        return bool(created)
+
+    async def claim_many(self, entries: List[Tuple[str, float]]) -> List[bool]:
+        """
+        Claim dedup windows for many fingerprints in one pipelined round trip
+
+        Args:
+            entries: (fingerprint, event_ts) pairs
+
+        Returns:
+            One flag per entry, True where the window was newly opened
+
+        Raises:
+            SharedStoreUnavailable: If Redis cannot be reached
+        """
+        if not entries:
+            return []
+        client = await self._get_client()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for fingerprint, event_ts in entries:
+                pipe.eval(*self._claim_args(fingerprint, event_ts))
+            results = await pipe.execute()
+        except (RedisError, OSError) as e:
+            self._mark_down(e)
+            raise SharedStoreUnavailable(str(e)) from e
+        return [bool(created) for created in results]
+
+    def get_stats(self) -> dict:
+        """Get store status"""
+        return {
+            "backend": "redis",
+            "available": time.monotonic() >= self._down_until,
+        }
@@ -0,0 +1,537 @@
+"""
+Filter Rule Compiler
+Compiles AlertFilter rule dictionaries into precompiled predicates
+"""
+
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from time import perf_counter_ns
+import logging
+import re
+
+from services.multi_pattern import MultiPatternMatcher
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_RULE_FIELDS = ["name", "field", "operator", "value"]
+
+# Operators on string fields that can share one multi-pattern scan
+PATTERN_OPERATORS = ("contains", "not_contains", "regex", "not_regex")
+
+# Pattern rules on one field are merged once there are at least this many
+MIN_PATTERN_GROUP = 3
+
+# Relative evaluation cost used when ordering rules by selectivity
+OPERATOR_COST = {
+    "equals": 1.0,
+    "in": 1.0,
+    "not_in": 1.0,
+    "contains": 2.0,
+    "not_contains": 2.0,
+    "regex": 4.0,
+    "not_regex": 4.0,
+}
+
+
+def validate_rule(rule: Dict[str, Any], strict: bool = False):
+    """
+    Validate a rule definition
+
+    Args:
+        rule: Rule dictionary
+        strict: Also reject unknown operators and invalid regexes, which
+                otherwise compile to rules that always pass
+
+    Raises:
+        ValueError: If a required field is missing or, when strict, the
+                    operator or pattern is invalid
+    """
+    if not all(field in rule for field in REQUIRED_RULE_FIELDS):
+        raise ValueError(f"Rule must contain fields: {REQUIRED_RULE_FIELDS}")
+    if not strict:
+        return
+    if rule["operator"] not in OPERATOR_COST:
+        raise ValueError(f"Unknown operator '{rule['operator']}' in rule '{rule['name']}'")
+    if rule["operator"] in ("regex", "not_regex"):
+        try:
+            re.compile(rule["value"])
+        except (re.error, TypeError) as e:
+            raise ValueError(f"Invalid pattern in rule '{rule['name']}': {e}")
+
+
+def compile_accessor(field: str) -> Callable[[Dict[str, Any]], Any]:
+    """Compile a field lookup (direct field, then labels, then annotations)"""
+    def get(alert: Dict[str, Any]) -> Any:
+        value = alert.get(field)
+        if value is None:
+            value = alert.get("labels", {}).get(field)
+        if value is None:
+            value = alert.get("annotations", {}).get(field)
+        return value
+    return get
+
+
+def _membership(value: Any) -> Callable[[Any], bool]:
+    """Membership test against a rule value, using a set where possible"""
+    if isinstance(value, (list, tuple, set, frozenset)):
+        try:
+            members = frozenset(value)
+        except TypeError:
+            members = None
+        if members is not None:
+            listed = list(value)
+
+            def contains(item: Any) -> bool:
+                try:
+                    return item in members
+                except TypeError:
+                    return item in listed
+            return contains
+    return lambda item: item in value
+
+
+def _compile_test(operator: str, value: Any) -> Callable[[Any], bool]:
+    """Compile one operator into a test over a field value"""
+    if operator == "equals":
+        return lambda item: item == value
+    if operator in ("in", "not_in"):
+        member = _membership(value)
+        if operator == "in":
+            return member
+        return lambda item: not member(item)
+    if operator in ("regex", "not_regex"):
+        search = re.compile(value, re.IGNORECASE).search
+        if operator == "regex":
+            return lambda item: search(str(item)) is not None
+        return lambda item: search(str(item)) is None
+    if operator in ("contains", "not_contains"):
+        needle = str(value).lower()
+        if operator == "contains":
+            return lambda item: needle in str(item).lower()
+        return lambda item: needle not in str(item).lower()
+    raise KeyError(operator)
+
+
+class _Column:
+    """One field projected out of a batch, with rows grouped by distinct value"""
+
+    __slots__ = ("groups", "unhashable", "error_rows")
+
+    def __init__(self, alerts: List[Dict[str, Any]], get: Callable[[Dict[str, Any]], Any], rows: List[int]):
+        groups: Dict[Tuple[type, Any], Tuple[Any, List[int]]] = {}
+        unhashable: List[Tuple[int, Any]] = []
+        error_rows: List[int] = []
+        for row in rows:
+            alert = alerts[row]
+            try:
+                value = get(alert)
+            except Exception:
+                error_rows.append(row)
+                continue
+            # Keyed by type too, so 1, 1.0 and True are tested separately
+            key = (type(value), value)
+            try:
+                entry = groups.get(key)
+            except TypeError:
+                unhashable.append((row, value))
+                continue
+            if entry is None:
+                groups[key] = (value, [row])
+            else:
+                entry[1].append(row)
+        self.groups = list(groups.values())
+        self.unhashable = unhashable
+        self.error_rows = error_rows
+
+
+class RuleStats:
+    """Running evaluation counters of one rule, shared across recompiles"""
+
+    __slots__ = ("evaluations", "rejections", "errors", "nanoseconds")
+
+    def __init__(self):
+        self.evaluations = 0
+        self.rejections = 0
+        self.errors = 0
+        self.nanoseconds = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "evaluations": self.evaluations,
+            "rejections": self.rejections,
+            "errors": self.errors,
+            "rejection_rate": round(self.rejections / self.evaluations * 100, 2) if self.evaluations else 0.0,
+            "total_ms": round(self.nanoseconds / 1e6, 3),
+            "avg_ns": round(self.nanoseconds / self.evaluations) if self.evaluations else 0,
+        }
+
+
+class CompiledRule:
+    """A single compiled filter rule with its evaluation counters"""
+
+    __slots__ = ("name", "field", "operator", "rule", "cost", "get", "test", "stats")
+
+    def __init__(self, rule: Dict[str, Any], stats: Optional[RuleStats] = None):
+        self.rule = rule
+        self.name = rule.get("name", "unnamed")
+        self.field = rule["field"]
+        self.operator = rule["operator"]
+        self.cost = OPERATOR_COST.get(self.operator, 1.0)
+        self.stats = stats if stats is not None else RuleStats()
+        self.get = compile_accessor(self.field)
+        try:
+            self.test = _compile_test(self.operator, rule["value"])
+        except KeyError:
+            logger.warning(f"Unknown operator '{self.operator}' in rule '{self.name}'")
+            self.test = lambda item: True  # Default to pass if unknown operator
+        except (re.error, TypeError) as e:
+            logger.error(f"Error compiling rule '{self.name}': {e}")
+            self.test = self._always_error(e)
+
+    @property
+    def names(self) -> List[str]:
+        return [self.name]
+
+    def mergeable(self) -> bool:
+        """Whether the rule can join a multi-pattern group"""
+        if self.operator not in PATTERN_OPERATORS:
+            return False
+        if self.operator in ("contains", "not_contains"):
+            return True
+        value = self.rule["value"]
+        if not isinstance(value, str):
+            return False
+        # Compiled as it would appear inside the alternation, which also
+        # rejects patterns opening with a global flag group such as (?i)
+        try:
+            return re.compile(f"(?:{value})", re.IGNORECASE).groups == 0
+        except re.error:
+            return False
+
+    @staticmethod
+    def _always_error(error: Exception) -> Callable[[Any], bool]:
+        def test(item: Any) -> bool:
+            raise error
+        return test
+
+    def evaluate(self, alert: Dict[str, Any]) -> bool:
+        """
+        Apply the rule to an alert
+
+        Returns:
+            True if alert passes the rule (or the rule errors), False otherwise
+        """
+        stats = self.stats
+        stats.evaluations += 1
+        start = perf_counter_ns()
+        try:
+            result = bool(self.test(self.get(alert)))
+        except Exception as e:
+            stats.nanoseconds += perf_counter_ns() - start
+            stats.errors += 1
+            logger.error(f"Error applying rule '{self.name}': {e}")
+            return True  # Default to pass on error
+        stats.nanoseconds += perf_counter_ns() - start
+        if not result:
+            stats.rejections += 1
+        return result
+
+    def apply_value(self, value: Any, count: int) -> bool:
+        """
+        Apply the rule to a field value shared by count alerts
+
+        Returns:
+            True if the value passes the rule (or the rule errors)
+        """
+        stats = self.stats
+        stats.evaluations += count
+        try:
+            passed = bool(self.test(value))
+        except Exception as e:
+            stats.errors += count
+            logger.error(f"Error applying rule '{self.name}': {e}")
+            return True  # Default to pass on error
+        if not passed:
+            stats.rejections += count
+        return passed
+
+    def record_errors(self, count: int):
+        """Count alerts whose field lookup failed (they pass)"""
+        self.stats.evaluations += count
+        self.stats.errors += count
+
+    def add_time(self, nanoseconds: int):
+        self.stats.nanoseconds += nanoseconds
+
+    def selectivity(self) -> float:
+        """Observed rejections per unit of evaluation cost"""
+        stats = self.stats
+        if not stats.evaluations:
+            return 0.0
+        return stats.rejections / stats.evaluations / self.cost
+
+
+class PatternGroup:
+    """
+    contains/regex rules on one field, evaluated with a single scan
+
+    Behaves like one rule that rejects an alert if any member rejects it;
+    each member still gets its own counters. Evaluation counts and time are
+    accumulated on the group and flushed to the members in bulk.
+    """
+
+    # Evaluations between flushes of pending member counters
+    FLUSH_INTERVAL = 1024
+
+    def __init__(self, members: List[CompiledRule]):
+        self.members = members
+        self.field = members[0].field
+        self.get = members[0].get
+        self.cost = OPERATOR_COST["regex"]
+        self.evaluations = 0
+        self.rejections = 0
+        self._pending_evaluations = 0
+        self._pending_nanoseconds = 0
+
+        self._literal_rules = [rule for rule in members if rule.operator in ("contains", "not_contains")]
+        self._pattern_rules = [rule for rule in members if rule.operator in ("regex", "not_regex")]
+        # Indices of members that must match; a member fails when its
+        # match state differs from this, i.e. index in (found ^ required)
+        self._required_literals = frozenset(
+            i for i, rule in enumerate(self._literal_rules) if rule.operator == "contains"
+        )
+        self._required_patterns = frozenset(
+            i for i, rule in enumerate(self._pattern_rules) if rule.operator == "regex"
+        )
+        self.matcher = MultiPatternMatcher(
+            [str(rule.rule["value"]).lower() for rule in self._literal_rules],
+            [rule.rule["value"] for rule in self._pattern_rules],
+        )
+
+    @property
+    def name(self) -> str:
+        return "+".join(self.names)
+
+    @property
+    def names(self) -> List[str]:
+        return [rule.name for rule in self.members]
+
+    def failures(self, value: Any) -> List[CompiledRule]:
+        """Members that reject a field value"""
+        text = str(value)
+        failed = []
+        if self._literal_rules:
+            found = self.matcher.match_literals(text.lower(), self._required_literals)
+            failed.extend(self._literal_rules[i] for i in found ^ self._required_literals)
+        if self._pattern_rules:
+            found = self.matcher.match_patterns(text, self._required_patterns)
+            failed.extend(self._pattern_rules[i] for i in found ^ self._required_patterns)
+        return failed
+
+    def apply_value(self, value: Any, count: int) -> bool:
+        """
+        Apply every member to a field value shared by count alerts
+
+        Returns:
+            True if no member rejects the value
+        """
+        self.evaluations += count
+        self._pending_evaluations += count
+        if self._pending_evaluations >= self.FLUSH_INTERVAL:
+            self.flush()
+        try:
+            failed = self.failures(value)
+        except Exception as e:
+            for rule in self.members:
+                rule.stats.errors += count
+            logger.error(f"Error applying rules '{self.name}': {e}")
+            return True  # Default to pass on error
+        if not failed:
+            return True
+        for rule in failed:
+            rule.stats.rejections += count
+        self.rejections += count
+        return False
+
+    def evaluate(self, alert: Dict[str, Any]) -> bool:
+        """
+        Apply every member to an alert
+
+        Returns:
+            True if alert passes every member rule
+        """
+        start = perf_counter_ns()
+        try:
+            value = self.get(alert)
+        except Exception as e:
+            self.record_errors(1)
+            logger.error(f"Error applying rules '{self.name}': {e}")
+            result = True  # Default to pass on error
+        else:
+            result = self.apply_value(value, 1)
+        self._pending_nanoseconds += perf_counter_ns() - start
+        return result
+
+    def record_errors(self, count: int):
+        """Count alerts whose field lookup failed (they pass)"""
+        self.evaluations += count
+        for rule in self.members:
+            rule.record_errors(count)
+
+    def add_time(self, nanoseconds: int):
+        self._pending_nanoseconds += nanoseconds
+
+    def flush(self):
+        """Add pending evaluation counts and time to every member"""
+        evaluations, nanoseconds = self._pending_evaluations, self._pending_nanoseconds
+        self._pending_evaluations = self._pending_nanoseconds = 0
+        # One scan serves every member; attribute its time evenly
+        share = nanoseconds // len(self.members)
+        for rule in self.members:
+            rule.stats.evaluations += evaluations
+            rule.stats.nanoseconds += share
+
+    def selectivity(self) -> float:
+        """Observed rejections per unit of evaluation cost"""
+        if not self.evaluations:
+            return 0.0
+        return self.rejections / self.evaluations / self.cost
+
+
+def _group_patterns(compiled: Tuple[CompiledRule, ...]) -> Tuple[Any, ...]:
+    """Merge pattern rules sharing a field into PatternGroups, keeping rule order"""
+    by_field: Dict[str, List[CompiledRule]] = {}
+    for rule in compiled:
+        if rule.mergeable():
+            by_field.setdefault(rule.field, []).append(rule)
+    groups = {}
+    for field, members in by_field.items():
+        if len(members) < MIN_PATTERN_GROUP:
+            continue
+        try:
+            groups[field] = PatternGroup(members)
+        except (re.error, ValueError) as e:
+            # The members still work on their own
+            logger.warning(f"Evaluating pattern rules on '{field}' separately: {e}")
+
+    evaluators, placed = [], set()
+    for rule in compiled:
+        group = groups.get(rule.field) if rule.mergeable() else None
+        if group is None:
+            evaluators.append(rule)
+        elif rule.field not in placed:
+            evaluators.append(group)
+            placed.add(rule.field)
+    return tuple(evaluators)
+
+
+class CompiledRuleSet:
+    """An AND of compiled rules, reordered so the most rejecting cheap rule runs first"""
+
+    def __init__(self, rules: List[Dict[str, Any]], reorder_interval: int = 1000,
+                 stats: Optional[List[RuleStats]] = None):
+        """
+        Compile a rule list
+
+        Args:
+            rules: Rule dictionaries (see AlertFilter.add_rule)
+            reorder_interval: Re-sort rules by observed selectivity after
+                              this many alerts; 0 disables reordering
+            stats: Counters to attach to each rule (aligned with rules), so
+                   they survive recompiles; fresh counters by default
+        """
+        if stats is None:
+            stats = [RuleStats() for _ in rules]
+        self.source_rules: Tuple[Dict[str, Any], ...] = tuple(rules)
+        self.compiled: Tuple[CompiledRule, ...] = tuple(
+            CompiledRule(rule, rule_stats) for rule, rule_stats in zip(rules, stats)
+        )
+        # Rules and pattern groups, each evaluated as one step
+        self.evaluators = _group_patterns(self.compiled)
+        self._order = self.evaluators
+        self.reorder_interval = reorder_interval
+        self._until_reorder = reorder_interval
+
+    def __len__(self) -> int:
+        return len(self.compiled)
+
+    def __call__(self, alert: Dict[str, Any]) -> bool:
+        """
+        Check an alert against every rule
+
+        Returns:
+            True if the alert passes all rules
+        """
+        if self.reorder_interval:
+            self._until_reorder -= 1
+            if self._until_reorder <= 0:
+                self.reorder()
+        for rule in self._order:
+            if not rule.evaluate(alert):
+                return False
+        return True
+
+    def filter_batch(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Filter a batch column-wise
+
+        Each referenced field is projected out of the batch once, rows are
+        grouped by distinct field value, and each rule's test runs once per
+        distinct value still alive rather than once per alert. Rules run in
+        selectivity order and columns are projected lazily over surviving
+        rows, so later rules never touch rejected alerts. Results
+        and rule counters match calling the set on each alert in turn.
+
+        Args:
+            alerts: Alerts to filter
+
+        Returns:
+            Alerts that pass every rule, in input order
+        """
+        if self.reorder_interval:
+            self._until_reorder -= len(alerts)
+            if self._until_reorder <= 0:
+                self.reorder()
+
+        alive = bytearray(b"\x01") * len(alerts)
+        columns: Dict[str, _Column] = {}
+        for rule in self._order:
+            start = perf_counter_ns()
+            column = columns.get(rule.field)
+            if column is None:
+                rows = [row for row, keep in enumerate(alive) if keep]
+                if not rows:
+                    break
+                column = columns[rule.field] = _Column(alerts, rule.get, rows)
+
+            live = [row for row in column.error_rows if alive[row]]
+            if live:
+                rule.record_errors(len(live))
+
+            for value, rows in column.groups:
+                live = [row for row in rows if alive[row]]
+                if live and not rule.apply_value(value, len(live)):
+                    for row in live:
+                        alive[row] = 0
+            for row, value in column.unhashable:
+                if alive[row] and not rule.apply_value(value, 1):
+                    alive[row] = 0
+            rule.add_time(perf_counter_ns() - start)
+
+        return [alert for alert, keep in zip(alerts, alive) if keep]
+
+    def flush_stats(self):
+        """Bring counters of grouped rules up to date"""
+        for evaluator in self.evaluators:
+            if isinstance(evaluator, PatternGroup):
+                evaluator.flush()
+
+    def reorder(self):
+        """Sort rules by observed selectivity and publish the new order"""
+        self._until_reorder = self.reorder_interval
+        # Publish with a single reference swap; iterations in flight keep the old tuple
+        self._order = tuple(sorted(self.evaluators, key=lambda rule: rule.selectivity(), reverse=True))
+
+    @property
+    def order(self) -> List[str]:
+        """Rule names in current evaluation order"""
+        return [name for rule in self._order for name in rule.names]
@@ -0,0 +1,129 @@
+"""
+Filter Rule Store
+Loads filter rules from a file and hot-reloads them into an AlertFilter
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import logging
+import os
+
+import yaml
+
+from services.alert_filter import AlertFilter
+from services.rule_compiler import validate_rule
+
+logger = logging.getLogger(__name__)
+
+
+def parse_rules(document: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+    """
+    Parse and strictly validate a rule document
+
+    Args:
+        document: Dictionary with a "rules" list of global rules and an
+                  optional "tenants" mapping of tenant to rule list
+
+    Returns:
+        Tuple of global rules and tenant rules
+
+    Raises:
+        ValueError: If the document or any rule is invalid
+    """
+    if not isinstance(document, dict):
+        raise ValueError("Rule document must be a mapping")
+    rules = list(document.get("rules") or [])
+    tenant_rules = {str(tenant): list(scoped or []) for tenant, scoped in (document.get("tenants") or {}).items()}
+
+    for scope, scoped in [(None, rules), *tenant_rules.items()]:
+        names = set()
+        for rule in scoped:
+            if not isinstance(rule, dict):
+                raise ValueError(f"Rule entries must be mappings (tenant {scope})")
+            validate_rule(rule, strict=True)
+            if rule["name"] in names:
+                raise ValueError(f"Duplicate rule name '{rule['name']}' (tenant {scope})")
+            names.add(rule["name"])
+    return rules, tenant_rules
+
+
+class RuleStore:
+    """File-backed source of filter rules with change detection"""
+
+    def __init__(self, path: str, filter_engine: AlertFilter):
+        """
+        Initialize rule store
+
+        Args:
+            path: YAML (or JSON) rule file, see parse_rules for the layout
+            filter_engine: Filter the loaded rules are published to
+        """
+        self.path = path
+        self.filter_engine = filter_engine
+        self._loaded_stamp: Optional[Tuple[float, int]] = None
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error: Optional[str] = None
+
+    def _stamp(self) -> Tuple[float, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime, stat.st_size
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the rule file and publish it if it changed
+
+        An invalid file is rejected as a whole and the current rules stay
+        active; it is not parsed again until it changes.
+
+        Args:
+            force: Reload even if the file looks unchanged
+
+        Returns:
+            True if a new rule version was published
+        """
+        stamp = None
+        try:
+            stamp = self._stamp()
+            if not force and stamp == self._loaded_stamp:
+                return False
+            with open(self.path, "r") as f:
+                rules, tenant_rules = parse_rules(yaml.safe_load(f) or {})
+            snapshot = self.filter_engine.publish(rules, tenant_rules, source=self.path)
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            # Remember the rejected file too, so the watcher does not retry it every interval
+            if stamp is not None:
+                self._loaded_stamp = stamp
+            self.failed_reloads += 1
+            self.last_error = str(e)
+            logger.error(f"Failed to load filter rules from {self.path}: {e}")
+            return False
+
+        self._loaded_stamp = stamp
+        self.reloads += 1
+        self.last_error = None
+        logger.info(f"Loaded filter rules v{snapshot.version} from {self.path}")
+        return True
+
+    async def watch(self, interval: float = 5.0):
+        """
+        Poll the rule file and reload it on change until cancelled
+
+        Parsing and compiling run in a worker thread, off the event loop.
+
+        Args:
+            interval: Seconds between checks
+        """
+        while True:
+            await asyncio.to_thread(self.reload)
+            await asyncio.sleep(interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rule store statistics"""
+        return {
+            "path": self.path,
+            "version": self.filter_engine.version,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_error": self.last_error,
+        }
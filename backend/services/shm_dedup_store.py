@@ -0,0 +1,189 @@
+"""
+Shared Memory Deduplication Store
+Shares dedup windows between worker processes on one host without Redis
+"""
+
+from typing import List, Tuple
+from multiprocessing import shared_memory, resource_tracker
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts only get in-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Slot layout: fingerprint hash (0 = never used) and window expiry epoch
+_SLOT = struct.Struct("<Qd")
+
+
+def _fingerprint_hash(fingerprint: str) -> int:
+    """64-bit non-zero hash of a fingerprint"""
+    value = int.from_bytes(hashlib.blake2b(fingerprint.encode(), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class SharedMemoryDedupStore:
+    """Dedup window claims in an open-addressing hash table in shared memory"""
+
+    def __init__(self, window_seconds: float, name: str = "msp_alert_dedup",
+                 slots: int = 262144, stripes: int = 64, max_probes: int = 16):
+        """
+        Create or attach to the shared dedup table
+
+        The table is split into stripes; a fingerprint always probes inside
+        its own stripe, so locking one stripe (an fcntl byte-range lock on a
+        lock file) is enough to make its check-and-set atomic across every
+        process on the host.
+
+        Args:
+            window_seconds: Dedup window length in seconds
+            name: Shared memory segment name, identical in every worker
+            slots: Total slot count when creating the segment (16 bytes each)
+            stripes: Number of independently locked stripes
+            max_probes: Longest probe sequence before evicting the slot with
+                        the earliest expiry
+        """
+        self.window_seconds = window_seconds
+        self.name = name
+        self.stripes = stripes
+        self.max_probes = max_probes
+        self.evictions = 0
+
+        self._shm = self._open_segment(name, slots * _SLOT.size)
+        self.slots_per_stripe = (self._shm.size // _SLOT.size) // stripes
+        self.slots = self.slots_per_stripe * stripes
+        self._buf = self._shm.buf
+
+        self._lock_fd = None
+        if fcntl is not None:
+            lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+            self._lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        # fcntl locks are per process, so threads of one worker also need a lock
+        self._thread_lock = threading.Lock()
+        logger.info(f"SharedMemoryDedupStore attached to '{name}' with {self.slots} slots")
+
+    @staticmethod
+    def _open_segment(name: str, size: int) -> shared_memory.SharedMemory:
+        """Create the segment, or attach if another worker already created it"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            shm = shared_memory.SharedMemory(name=name)
+        # The segment outlives any single worker; keep the resource tracker
+        # from unlinking it when the process that touched it exits
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+    def _lock(self, stripe: int):
+        self._thread_lock.acquire()
+        if self._lock_fd is not None:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX, 1, stripe, os.SEEK_SET)
+
+    def _unlock(self, stripe: int):
+        if self._lock_fd is not None:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_UN, 1, stripe, os.SEEK_SET)
+        self._thread_lock.release()
+
+    def claim_sync(self, fingerprint: str, event_ts: float) -> bool:
+        """
+        Atomically claim the dedup window for a fingerprint
+
+        Args:
+            fingerprint: Alert fingerprint
+            event_ts: Event time of the alert as an epoch timestamp
+
+        Returns:
+            True if this call opened the window, False if it was already open
+        """
+        key = _fingerprint_hash(fingerprint)
+        stripe = key % self.stripes
+        base = stripe * self.slots_per_stripe
+        home = (key // self.stripes) % self.slots_per_stripe
+        probes = min(self.max_probes, self.slots_per_stripe)
+        now = time.time()
+        window = self.window_seconds
+        buf = self._buf
+        unpack_from = _SLOT.unpack_from
+
+        self._lock(stripe)
+        try:
+            free_offset = None
+            oldest_offset, oldest_expiry = None, float("inf")
+            for i in range(probes):
+                offset = (base + (home + i) % self.slots_per_stripe) * _SLOT.size
+                slot_key, expiry = unpack_from(buf, offset)
+                if slot_key == key:
+                    window_start = expiry - window
+                    if abs(event_ts - window_start) < window:
+                        return False
+                    # Stale replays older than the open window do not move it back
+                    if event_ts > window_start:
+                        _SLOT.pack_into(buf, offset, key, event_ts + window)
+                    return True
+                if slot_key == 0:
+                    # End of the probe chain: the fingerprint is not present
+                    if free_offset is None:
+                        free_offset = offset
+                    break
+                if free_offset is None and expiry <= now:
+                    free_offset = offset
+                if expiry < oldest_expiry:
+                    oldest_offset, oldest_expiry = offset, expiry
+
+            if free_offset is None:
+                free_offset = oldest_offset
+                self.evictions += 1
+            _SLOT.pack_into(buf, free_offset, key, event_ts + window)
+            return True
+        finally:
+            self._unlock(stripe)
+
+    async def claim(self, fingerprint: str, event_ts: float) -> bool:
+        """Async form of claim_sync, matching the shared store interface"""
+        return self.claim_sync(fingerprint, event_ts)
+
+    async def claim_many(self, entries: List[Tuple[str, float]]) -> List[bool]:
+        """
+        Claim dedup windows for many fingerprints
+
+        Args:
+            entries: (fingerprint, event_ts) pairs
+
+        Returns:
+            One flag per entry, True where the window was newly opened
+        """
+        return [self.claim_sync(fingerprint, event_ts) for fingerprint, event_ts in entries]
+
+    def get_stats(self) -> dict:
+        """Get store status"""
+        return {
+            "backend": "shm",
+            "available": True,
+            "segment": self.name,
+            "slots": self.slots,
+            "stripes": self.stripes,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        """Detach this process from the segment"""
+        self._buf = None
+        self._shm.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def unlink(self):
+        """Remove the segment from the host; call once when all workers are stopped"""
+        self._shm.unlink()
@@ -0,0 +1,301 @@
+"""
+Silence Engine
+Suppresses alerts that fall inside maintenance windows and ad-hoc silences
+"""
+
+from typing import List, Dict, Any, Optional, Tuple, Union
+from datetime import datetime, timezone
+import logging
+import threading
+import time
+import uuid
+
+from services.time_utils import event_time, isoformat
+
+logger = logging.getLogger(__name__)
+
+TimeValue = Union[float, int, str, datetime]
+
+
+def _to_epoch(value: TimeValue) -> float:
+    """Convert an epoch timestamp, ISO 8601 string or datetime to epoch seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _label_value(alert: Dict[str, Any], name: str) -> Any:
+    """Look up a matcher label on an alert (direct field, then labels)"""
+    value = alert.get(name)
+    if value is None:
+        value = (alert.get("labels") or {}).get(name)
+    return value
+
+
+class Silence:
+    """A time window with equality label matchers"""
+
+    __slots__ = ("silence_id", "matchers", "starts_at", "ends_at", "comment", "created_by", "kind")
+
+    def __init__(self, silence_id: str, matchers: Dict[str, str], starts_at: float, ends_at: float,
+                 comment: str = "", created_by: str = "", kind: str = "silence"):
+        self.silence_id = silence_id
+        self.matchers = matchers
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+        self.comment = comment
+        self.created_by = created_by
+        self.kind = kind
+
+    def index_key(self) -> Optional[Tuple[str, str]]:
+        """The (label, value) pair the silence is indexed under"""
+        if not self.matchers:
+            return None
+        name = min(self.matchers)
+        return name, self.matchers[name]
+
+    def matches(self, alert: Dict[str, Any]) -> bool:
+        for name, expected in self.matchers.items():
+            value = _label_value(alert, name)
+            if value is None or str(value) != expected:
+                return False
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.silence_id,
+            "kind": self.kind,
+            "matchers": dict(self.matchers),
+            "starts_at": isoformat(self.starts_at),
+            "ends_at": isoformat(self.ends_at),
+            "comment": self.comment,
+            "created_by": self.created_by,
+        }
+
+
+class _IntervalNode:
+    """Centered interval tree node"""
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, silences: List[Silence]):
+        # The median start is covered by its own silence, so every node
+        # holds at least one interval and the tree has O(log n) depth
+        starts = sorted(silence.starts_at for silence in silences)
+        self.center = center = starts[len(starts) // 2]
+        left, right, overlapping = [], [], []
+        for silence in silences:
+            if silence.ends_at < center:
+                left.append(silence)
+            elif silence.starts_at > center:
+                right.append(silence)
+            else:
+                overlapping.append(silence)
+        self.by_start = sorted(overlapping, key=lambda silence: silence.starts_at)
+        self.by_end = sorted(overlapping, key=lambda silence: silence.ends_at, reverse=True)
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+
+def _stab(node: Optional[_IntervalNode], ts: float) -> List[Silence]:
+    """Silences active at ts (starts_at <= ts < ends_at)"""
+    active = []
+    while node is not None:
+        if ts < node.center:
+            # Every interval here ends at or after center > ts
+            for silence in node.by_start:
+                if silence.starts_at > ts:
+                    break
+                active.append(silence)
+            node = node.left
+        else:
+            # Every interval here starts at or before center <= ts
+            for silence in node.by_end:
+                if silence.ends_at <= ts:
+                    break
+                active.append(silence)
+            node = node.right
+    return active
+
+
+class _SilenceIndex:
+    """Immutable lookup structure: one interval tree per indexed (label, value)"""
+
+    __slots__ = ("silences", "trees", "unscoped", "labels")
+
+    def __init__(self, silences: Dict[str, Silence]):
+        self.silences = silences
+        grouped: Dict[Tuple[str, str], List[Silence]] = {}
+        unscoped: List[Silence] = []
+        for silence in silences.values():
+            key = silence.index_key()
+            if key is None:
+                unscoped.append(silence)
+            else:
+                grouped.setdefault(key, []).append(silence)
+        self.trees = {key: _IntervalNode(members) for key, members in grouped.items()}
+        self.unscoped = _IntervalNode(unscoped) if unscoped else None
+        self.labels = sorted({key[0] for key in grouped})
+
+
+class SilenceEngine:
+    """Holds maintenance windows and silences and matches alerts against them"""
+
+    # Ended silences are kept this long so late-arriving alerts still match
+    RETENTION_SECONDS = 86400
+
+    def __init__(self):
+        """Initialize an empty silence engine"""
+        self._index = _SilenceIndex({})
+        # Serializes writers only; lookups read the current index
+        self._write_lock = threading.Lock()
+        self.suppressed = 0
+        logger.info("SilenceEngine initialized")
+
+    def add_silence(self, matchers: Dict[str, Any], starts_at: TimeValue, ends_at: TimeValue,
+                    comment: str = "", created_by: str = "", kind: str = "silence",
+                    silence_id: Optional[str] = None) -> Silence:
+        """
+        Add a silence or maintenance window
+
+        Args:
+            matchers: Label -> value pairs an alert must all carry (checked
+                      on top-level fields, then labels); empty matches all
+            starts_at: Window start (epoch, ISO 8601 or datetime)
+            ends_at: Window end, exclusive
+            comment: Why the alerts are silenced
+            created_by: Who created the silence
+            kind: "silence" or "maintenance_window"
+            silence_id: Id to use; generated if omitted
+
+        Returns:
+            The added silence
+
+        Raises:
+            ValueError: If the window ends before it starts
+        """
+        start, end = _to_epoch(starts_at), _to_epoch(ends_at)
+        if end <= start:
+            raise ValueError("Silence must end after it starts")
+        silence = Silence(
+            silence_id or str(uuid.uuid4()),
+            {str(name): str(value) for name, value in matchers.items()},
+            start, end, comment, created_by, kind,
+        )
+        with self._write_lock:
+            retain_after = time.time() - self.RETENTION_SECONDS
+            silences = {
+                key: existing for key, existing in self._index.silences.items()
+                if existing.ends_at > retain_after
+            }
+            silences[silence.silence_id] = silence
+            self._index = _SilenceIndex(silences)
+        logger.info(f"Added {kind} {silence.silence_id}: {silence.matchers} "
+                    f"{isoformat(start)} - {isoformat(end)}")
+        return silence
+
+    def remove_silence(self, silence_id: str) -> bool:
+        """
+        Remove a silence by id
+
+        Returns:
+            True if the silence existed
+        """
+        with self._write_lock:
+            if silence_id not in self._index.silences:
+                return False
+            silences = dict(self._index.silences)
+            del silences[silence_id]
+            self._index = _SilenceIndex(silences)
+        logger.info(f"Removed silence {silence_id}")
+        return True
+
+    def match(self, alert: Dict[str, Any], ts: Optional[float] = None) -> Optional[Silence]:
+        """
+        Find a silence covering an alert
+
+        Only the interval trees of (label, value) pairs the alert carries
+        are searched, and only windows active at the alert's time are checked
+        against the remaining matchers.
+
+        Args:
+            alert: Alert dictionary
+            ts: Time to check at; defaults to the alert's event time
+
+        Returns:
+            The first matching silence, or None
+        """
+        index = self._index
+        if not index.silences:
+            return None
+        if ts is None:
+            ts = event_time(alert)
+
+        unscoped = _stab(index.unscoped, ts)
+        if unscoped:
+            return unscoped[0]
+        for name in index.labels:
+            value = _label_value(alert, name)
+            if value is None:
+                continue
+            tree = index.trees.get((name, str(value)))
+            if tree is None:
+                continue
+            for silence in _stab(tree, ts):
+                if silence.matches(alert):
+                    return silence
+        return None
+
+    def apply(self, alert: Dict[str, Any], ts: Optional[float] = None) -> Optional[Silence]:
+        """
+        Match an alert and count it as suppressed if a silence covers it
+
+        Returns:
+            The matching silence, or None if the alert should be processed
+        """
+        silence = self.match(alert, ts)
+        if silence is not None:
+            self.suppressed += 1
+        return silence
+
+    def filter_alerts(self, alerts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Drop alerts covered by a silence
+
+        Args:
+            alerts: Alerts to check
+
+        Returns:
+            Alerts not covered by any silence, in input order
+        """
+        return [alert for alert in alerts if self.apply(alert) is None]
+
+    def get_silences(self, active_at: Optional[TimeValue] = None) -> List[Dict[str, Any]]:
+        """
+        List silences
+
+        Args:
+            active_at: Only list silences active at this time
+
+        Returns:
+            List of silence dictionaries ordered by start time
+        """
+        silences = self._index.silences.values()
+        if active_at is not None:
+            ts = _to_epoch(active_at)
+            silences = [silence for silence in silences if silence.starts_at <= ts < silence.ends_at]
+        return [silence.to_dict() for silence in sorted(silences, key=lambda silence: silence.starts_at)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get silence statistics"""
+        now = time.time()
+        silences = self._index.silences.values()
+        return {
+            "silences": len(silences),
+            "active": sum(1 for silence in silences if silence.starts_at <= now < silence.ends_at),
+            "alerts_suppressed": self.suppressed,
+        }
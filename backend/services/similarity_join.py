@@ -0,0 +1,73 @@
+"""
+Similarity Join
+Finds all pairs of token sets above a Jaccard threshold without comparing every pair
+"""
+
+from typing import Dict, List, Sequence, Set, Tuple
+import math
+
+# Guards the prefix length against float error in threshold * size
+_EPSILON = 1e-9
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    """Jaccard similarity of two token sets; two empty sets count as identical"""
+    if not first and not second:
+        return 1.0
+    if not first or not second:
+        return 0.0
+    intersection = len(first & second)
+    return intersection / (len(first) + len(second) - intersection)
+
+
+def similar_pairs(token_sets: Sequence[Set[str]], threshold: float) -> List[Tuple[int, int, float]]:
+    """
+    Find every pair of token sets with Jaccard similarity above threshold
+
+    Tokens are ranked rarest first. Two sets with similarity of at least t
+    must share a token among the first |s| - ceil(t * |s|) + 1 ranked tokens
+    of each (prefix filtering), so only prefix tokens are indexed and only
+    sets sharing one are compared. Sets whose sizes alone rule out the
+    threshold are skipped before computing the intersection.
+
+    Args:
+        token_sets: Token set per record
+        threshold: Similarity a pair must exceed
+
+    Returns:
+        (i, j, similarity) tuples with i < j, in (i, j) order
+    """
+    frequency: Dict[str, int] = {}
+    for tokens in token_sets:
+        for token in tokens:
+            frequency[token] = frequency.get(token, 0) + 1
+
+    pairs = []
+    empty = [i for i, tokens in enumerate(token_sets) if not tokens]
+    if 1.0 > threshold:
+        pairs.extend((i, j, 1.0) for n, i in enumerate(empty) for j in empty[n + 1:])
+
+    index: Dict[str, List[int]] = {}
+    for j, tokens in enumerate(token_sets):
+        if not tokens:
+            continue
+        size = len(tokens)
+        ranked = sorted(tokens, key=lambda token: (frequency[token], token))
+        prefix = ranked[:size - max(1, math.ceil(threshold * size - _EPSILON)) + 1]
+
+        candidates: Set[int] = set()
+        for token in prefix:
+            candidates.update(index.get(token, ()))
+        for i in candidates:
+            other = token_sets[i]
+            if min(size, len(other)) < threshold * max(size, len(other)) - _EPSILON:
+                continue
+            similarity = jaccard(other, tokens)
+            if similarity > threshold:
+                pairs.append((i, j, similarity))
+
+        for token in prefix:
+            index.setdefault(token, []).append(j)
+
+    pairs.sort(key=lambda pair: (pair[0], pair[1]))
+    return pairs
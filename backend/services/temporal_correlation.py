@@ -0,0 +1,43 @@
+"""
+Temporal Correlation
+Clusters alerts that occur close together in time with a single sorted sweep
+"""
+
+from typing import Dict, Any, List, Tuple
+
+from services.time_utils import event_time
+
+
+def temporal_clusters(alerts: List[Dict[str, Any]], window: float,
+                      min_size: int = 2) -> List[Tuple[float, float, List[Dict[str, Any]]]]:
+    """
+    Group alerts into clusters of co-occurring alerts
+
+    Each alert's event time is resolved once and the batch is sorted once.
+    A cluster opens at the earliest unassigned alert and takes every
+    following alert within window seconds of it, so all members of a
+    cluster are pairwise within the window and every alert belongs to at
+    most one cluster. Runs in O(n log n) with output linear in n.
+
+    Args:
+        alerts: Alerts to cluster
+        window: Maximum spread of a cluster in seconds
+        min_size: Smallest cluster to report
+
+    Returns:
+        List of (start, end, members) tuples in time order, with start and
+        end as epoch timestamps and members sorted by event time
+    """
+    timed = sorted(((event_time(alert), i) for i, alert in enumerate(alerts)))
+    clusters = []
+    start = 0
+    count = len(timed)
+    while start < count:
+        opened_at = timed[start][0]
+        end = start + 1
+        while end < count and timed[end][0] - opened_at <= window:
+            end += 1
+        if end - start >= min_size:
+            clusters.append((opened_at, timed[end - 1][0], [alerts[i] for _, i in timed[start:end]]))
+        start = end
+    return clusters
@@ -0,0 +1,35 @@
+"""
+Tenant Resolution
+Resolves which MSP client (tenant) an alert belongs to
+"""
+
+from typing import Dict, Any
+
+DEFAULT_TENANT = "default"
+
+# Label keys checked, in order, for the tenant of an alert
+TENANT_LABEL_KEYS = ("tenant", "client", "customer")
+
+
+def get_tenant(alert: Dict[str, Any]) -> str:
+    """
+    Get the tenant key of an alert
+
+    Checks a top-level "tenant" field first (set at ingest, e.g. from an API
+    key), then the tenant label keys.
+
+    Args:
+        alert: Alert dictionary
+
+    Returns:
+        Tenant key, or DEFAULT_TENANT if none is present
+    """
+    tenant = alert.get("tenant")
+    if tenant:
+        return str(tenant)
+    labels = alert.get("labels") or {}
+    for key in TENANT_LABEL_KEYS:
+        value = labels.get(key)
+        if value:
+            return str(value)
+    return DEFAULT_TENANT
@@ -0,0 +1,190 @@
+"""
+Text Similarity Correlation
+Scores new alerts against a rolling window of TF-IDF weighted hashed-feature vectors
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from collections import deque
+import itertools
+import logging
+import math
+
+from services.time_utils import event_time
+from services.near_duplicate import _TOKEN_RE, _token_hash
+from services.tenancy import get_tenant
+
+logger = logging.getLogger(__name__)
+
+SparseVector = Dict[int, float]
+
+
+def alert_terms(alert: Dict[str, Any]) -> List[str]:
+    """Terms of an alert's title/name, description and labels, with repeats"""
+    text = f"{alert.get('title') or alert.get('name') or ''} {alert.get('description') or ''}"
+    terms = _TOKEN_RE.findall(text.lower())
+    for key, value in (alert.get("labels") or {}).items():
+        terms.append(f"{key}={value}".lower())
+    return terms
+
+
+class _Window:
+    """Recent vectors of one tenant with their inverted index"""
+
+    __slots__ = ("docs", "order", "postings", "df")
+
+    def __init__(self):
+        self.docs: Dict[int, Tuple[str, float, SparseVector]] = {}
+        self.order: deque = deque()
+        self.postings: Dict[int, Dict[int, float]] = {}
+        self.df: Dict[int, int] = {}
+
+
+class TextSimilarityIndex:
+    """
+    Rolling per-tenant window of alert text vectors
+
+    Terms are hashed into a fixed feature space and weighted by TF-IDF,
+    with document frequencies kept up to date as alerts enter and leave
+    the window. Each alert's normalized vector is computed once, at ingest,
+    and stored column-wise: per feature, the window alerts carrying it and
+    their weights. Scoring a new alert against the whole window is then one
+    sparse matrix-vector product that only touches the postings of the
+    alert's own features. Once the rest of the alert's vector is too small
+    to reach the threshold on its own, common features only update alerts
+    already scored instead of walking their long postings.
+    """
+
+    def __init__(self, threshold: float = 0.5, window_seconds: float = 1800,
+                 max_alerts: int = 100_000, n_features: int = 1 << 20):
+        """
+        Initialize text similarity index
+
+        Args:
+            threshold: Cosine similarity an alert must reach to be reported
+            window_seconds: How long alerts stay in the window
+            max_alerts: Cap on alerts per tenant window
+            n_features: Size of the hashed feature space (a power of two)
+        """
+        self.threshold = threshold
+        self.window_seconds = window_seconds
+        self.max_alerts = max_alerts
+        self._mask = n_features - 1
+        self._windows: Dict[str, _Window] = {}
+        self._slots = itertools.count()
+        self.alerts_indexed = 0
+        self.matches_found = 0
+        logger.info(f"TextSimilarityIndex initialized with threshold {threshold}, {window_seconds}s window")
+
+    def _evict(self, window: _Window, now: float):
+        order, docs, postings, df = window.order, window.docs, window.postings, window.df
+        while order and (len(order) >= self.max_alerts or docs[order[0]][1] < now - self.window_seconds):
+            slot = order.popleft()
+            _, _, vector = docs.pop(slot)
+            for feature in vector:
+                posting = postings[feature]
+                del posting[slot]
+                if not posting:
+                    del postings[feature]
+                    del df[feature]
+                else:
+                    df[feature] -= 1
+
+    def vectorize(self, alert: Dict[str, Any], window: Optional[_Window] = None) -> SparseVector:
+        """
+        Unit-length TF-IDF vector of an alert's terms
+
+        Args:
+            alert: Alert dictionary
+            window: Window whose document frequencies weight the terms
+
+        Returns:
+            Mapping of hashed feature to weight
+        """
+        counts: Dict[int, int] = {}
+        for term in alert_terms(alert):
+            feature = _token_hash(term) & self._mask
+            counts[feature] = counts.get(feature, 0) + 1
+        if not counts:
+            return {}
+        size = len(window.docs) if window else 0
+        df = window.df if window else {}
+        vector = {
+            feature: (1 + math.log(count)) * (math.log((1 + size) / (1 + df.get(feature, 0))) + 1)
+            for feature, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {feature: weight / norm for feature, weight in vector.items()}
+
+    def _score(self, window: _Window, vector: SparseVector, limit: int) -> List[Tuple[str, float]]:
+        postings, docs = window.postings, window.docs
+        threshold_sq = self.threshold * self.threshold
+        # Rare features first: they carry the most weight and the shortest postings
+        features = sorted(vector.items(), key=lambda item: len(postings.get(item[0], ())))
+        remaining = sum(weight * weight for weight in vector.values())
+        scores: Dict[int, float] = {}
+        for feature, weight in features:
+            posting = postings.get(feature)
+            if posting is not None:
+                if remaining >= threshold_sq:
+                    for slot, other in posting.items():
+                        scores[slot] = scores.get(slot, 0.0) + weight * other
+                else:
+                    # By Cauchy-Schwarz, an alert sharing none of the features
+                    # seen so far scores at most the norm of the rest, which is
+                    # now below the threshold: only update existing candidates
+                    for slot in scores:
+                        other = posting.get(slot)
+                        if other is not None:
+                            scores[slot] += weight * other
+            remaining -= weight * weight
+        matches = [(docs[slot][0], round(score, 4)) for slot, score in scores.items() if score >= self.threshold]
+        matches.sort(key=lambda match: -match[1])
+        return matches[:limit]
+
+    def add(self, alert: Dict[str, Any], ts: Optional[float] = None, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Score an alert against its tenant's window, then add it
+
+        Args:
+            alert: Alert dictionary with an "id"
+            ts: Event time; defaults to the alert's event time
+            limit: Most matches to return; 0 only indexes the alert
+
+        Returns:
+            (alert_id, similarity) pairs at or above the threshold, best first
+        """
+        if ts is None:
+            ts = event_time(alert)
+        window = self._windows.setdefault(get_tenant(alert), _Window())
+        self._evict(window, ts)
+        vector = self.vectorize(alert, window)
+        matches = self._score(window, vector, limit) if vector and limit else []
+
+        slot = next(self._slots)
+        window.docs[slot] = (str(alert.get("id")), ts, vector)
+        window.order.append(slot)
+        for feature, weight in vector.items():
+            window.postings.setdefault(feature, {})[slot] = weight
+            window.df[feature] = window.df.get(feature, 0) + 1
+        self.alerts_indexed += 1
+        self.matches_found += len(matches)
+        return matches
+
+    def query(self, alert: Dict[str, Any], limit: int = 10) -> List[Tuple[str, float]]:
+        """Score an alert against its tenant's window without adding it"""
+        window = self._windows.get(get_tenant(alert))
+        if window is None:
+            return []
+        vector = self.vectorize(alert, window)
+        return self._score(window, vector, limit) if vector else []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get text similarity statistics"""
+        return {
+            "tenants": len(self._windows),
+            "window_alerts": sum(len(window.docs) for window in self._windows.values()),
+            "features": sum(len(window.postings) for window in self._windows.values()),
+            "alerts_indexed": self.alerts_indexed,
+            "matches_found": self.matches_found,
+            "threshold": self.threshold,
+        }
@@ -0,0 +1,36 @@
+"""
+Event Time Utilities
+Resolves and renders the event time of alerts as UTC epoch timestamps
+"""
+
+from typing import Dict, Any
+from datetime import datetime, timezone
+import time
+
+
+def event_time(alert: Dict[str, Any]) -> float:
+    """
+    Resolve the event time of an alert as a UTC epoch timestamp
+
+    Uses started_at, then created_at, and falls back to the arrival time
+    when neither is present or parseable.
+    """
+    value = alert.get("started_at") or alert.get("created_at")
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+def isoformat(ts: float) -> str:
+    """Render an epoch timestamp as an ISO 8601 UTC string"""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
@@ -0,0 +1,168 @@
+"""
+Service Topology
+Dependency graph of services and hosts with precomputed k-hop neighbourhoods
+"""
+
+from typing import Dict, Any, Callable, Iterable, List, Optional, Set, FrozenSet
+import logging
+import threading
+
+import yaml
+
+logger = logging.getLogger(__name__)
+
+_EMPTY: FrozenSet[str] = frozenset()
+
+
+class ServiceTopology:
+    """
+    Services and hosts linked by "depends on" edges
+
+    For every node the set of nodes within max_hops edges (in either
+    direction) is precomputed, so checking whether two entities are related
+    is a set lookup rather than a graph search. Adding or removing an edge
+    only recomputes the nodes whose neighbourhood can change: those within
+    max_hops - 1 edges of either endpoint.
+
+    Entity names go through normalize on the way in and on lookup, so the
+    graph can share the canonical names of an EntityExtractor.
+    """
+
+    def __init__(self, dependencies: Dict[str, Iterable[str]] = None, max_hops: int = 2,
+                 normalize: Optional[Callable[[Any], str]] = None):
+        """
+        Initialize topology
+
+        Args:
+            dependencies: Mapping of service or host to the entities it depends on
+            max_hops: Largest number of edges between related entities
+            normalize: Canonical form of an entity name (defaults to str)
+        """
+        if max_hops < 1:
+            raise ValueError("max_hops must be at least 1")
+        self.max_hops = max_hops
+        self.normalize = normalize or str
+        self._depends_on: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        self._reach: Dict[str, FrozenSet[str]] = {}
+        self._write_lock = threading.Lock()
+        self.load(dependencies or {})
+
+    @classmethod
+    def from_file(cls, path: str, max_hops: int = 2,
+                  normalize: Optional[Callable[[Any], str]] = None) -> "ServiceTopology":
+        """
+        Load a topology from a YAML (or JSON) file
+
+        The file holds a "dependencies" mapping of entity to the list of
+        entities it depends on, and optionally "max_hops".
+        """
+        with open(path, "r") as f:
+            document = yaml.safe_load(f) or {}
+        return cls(document.get("dependencies") or {}, int(document.get("max_hops", max_hops)), normalize)
+
+    def _within(self, node: str, hops: int) -> Set[str]:
+        """Nodes at most hops edges from node, including node"""
+        seen = {node}
+        frontier = [node]
+        for _ in range(hops):
+            following = []
+            for current in frontier:
+                for adjacent in (self._depends_on.get(current, _EMPTY), self._dependents.get(current, _EMPTY)):
+                    for other in adjacent:
+                        if other not in seen:
+                            seen.add(other)
+                            following.append(other)
+            if not following:
+                break
+            frontier = following
+        return seen
+
+    def _affected(self, service: str, depends_on: str) -> Set[str]:
+        return self._within(service, self.max_hops - 1) | self._within(depends_on, self.max_hops - 1)
+
+    def _refresh(self, nodes: Iterable[str]):
+        for node in nodes:
+            if node in self._depends_on or node in self._dependents:
+                self._reach[node] = frozenset(self._within(node, self.max_hops) - {node})
+            else:
+                self._reach.pop(node, None)
+
+    def load(self, dependencies: Dict[str, Iterable[str]]):
+        """Replace the whole graph and rebuild every neighbourhood"""
+        depends_on: Dict[str, Set[str]] = {}
+        dependents: Dict[str, Set[str]] = {}
+        for service, targets in dependencies.items():
+            service = self.normalize(service)
+            for target in targets or ():
+                target = self.normalize(target)
+                if target == service:
+                    continue
+                depends_on.setdefault(service, set()).add(target)
+                dependents.setdefault(target, set()).add(service)
+        with self._write_lock:
+            self._depends_on, self._dependents = depends_on, dependents
+            self._reach = {}
+            self._refresh(set(depends_on) | set(dependents))
+        logger.info(f"Loaded topology with {len(self._reach)} entities, max {self.max_hops} hops")
+
+    def add_dependency(self, service: str, depends_on: str) -> bool:
+        """
+        Add a "service depends on depends_on" edge
+
+        Returns:
+            True if the edge was new
+        """
+        service, depends_on = self.normalize(service), self.normalize(depends_on)
+        if service == depends_on:
+            return False
+        with self._write_lock:
+            if depends_on in self._depends_on.get(service, _EMPTY):
+                return False
+            self._depends_on.setdefault(service, set()).add(depends_on)
+            self._dependents.setdefault(depends_on, set()).add(service)
+            self._refresh(self._affected(service, depends_on))
+        return True
+
+    def remove_dependency(self, service: str, depends_on: str) -> bool:
+        """
+        Remove a "service depends on depends_on" edge
+
+        Returns:
+            True if the edge existed
+        """
+        service, depends_on = self.normalize(service), self.normalize(depends_on)
+        with self._write_lock:
+            if depends_on not in self._depends_on.get(service, _EMPTY):
+                return False
+            affected = self._affected(service, depends_on)
+            self._depends_on[service].discard(depends_on)
+            self._dependents[depends_on].discard(service)
+            for adjacency, node in ((self._depends_on, service), (self._dependents, depends_on)):
+                if not adjacency[node]:
+                    del adjacency[node]
+            self._refresh(affected)
+        return True
+
+    def neighbors(self, entity: str) -> FrozenSet[str]:
+        """Entities within max_hops of entity, excluding itself"""
+        return self._reach.get(self.normalize(entity), _EMPTY)
+
+    def related(self, first: str, second: str) -> bool:
+        """Whether two entities are the same or within max_hops of each other"""
+        first, second = self.normalize(first), self.normalize(second)
+        return first == second or second in self._reach.get(first, _EMPTY)
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """Dependencies as a mapping of entity to sorted dependency list"""
+        return {service: sorted(targets) for service, targets in sorted(self._depends_on.items())}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get topology statistics"""
+        reach = self._reach
+        return {
+            "entities": len(reach),
+            "dependencies": sum(len(targets) for targets in self._depends_on.values()),
+            "max_hops": self.max_hops,
+            "avg_neighbors": round(sum(len(nodes) for nodes in reach.values()) / len(reach), 2) if reach else 0.0,
+        }
@@ -0,0 +1,324 @@
+"""
+Deduplication Tests for MSP Alert Intelligence Platform
+"""
+
+import sys
+import os
+import time
+import multiprocessing
+from datetime import datetime, timezone
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.alert_deduplicator import AlertDeduplicator
+from services.redis_dedup_store import RedisDedupStore
+from services.shm_dedup_store import SharedMemoryDedupStore
+from services.fingerprint import Fingerprinter
+from services.near_duplicate import NearDuplicateIndex
+from services.bloom_dedup import RotatingBloomFilter
+
+
+class FakeRedis:
+    """Minimal in-process stand-in for the redis.asyncio commands the store uses"""
+
+    def __init__(self, down=False):
+        self.data = {}
+        self.down = down
+
+    async def eval(self, script, numkeys, name, event_ts, window, px):
+        # Same steps as the store's claim script
+        if self.down:
+            raise RedisConnectionError("connection refused")
+        now = time.monotonic()
+        current = self.data.get(name)
+        start = float(current[0]) if current is not None and current[1] > now else None
+        if start is not None and abs(float(event_ts) - start) < float(window):
+            return 0
+        if start is None or float(event_ts) > start:
+            self.data[name] = (event_ts, now + int(px) / 1000)
+        return 1
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def eval(self, *args):
+        self.commands.append(args)
+
+    async def execute(self):
+        return [await self.redis.eval(*args) for args in self.commands]
+
+
+def make_alert(started_at, name="High CPU", service="api"):
+    return {
+        "name": name,
+        "source": "prometheus",
+        "service": service,
+        "severity": "high",
+        "started_at": started_at,
+    }
+
+def test_fingerprint_schema_normalizes_volatile_tokens():
+    """Per-source schemas strip volatile tokens so variants collapse"""
+    fingerprinter = Fingerprinter({
+        "sources": {
+            "kubernetes": {
+                "fields": ["source", "name"],
+                "labels": ["namespace"],
+                "normalize": ["ipv4", "pod_suffix", "number"],
+            }
+        }
+    })
+    a = {"source": "kubernetes", "name": "OOMKilled api-7d9f8c6b5-x2k9p on 10.0.3.17", "labels": {"namespace": "prod"}}
+    b = {"source": "kubernetes", "name": "OOMKilled api-5c4b7d9f2-qq81z on 10.0.9.2", "labels": {"namespace": "prod"}}
+    c = dict(b, labels={"namespace": "staging"})
+    assert fingerprinter.fingerprint(a) == fingerprinter.fingerprint(b)
+    assert fingerprinter.fingerprint(a) != fingerprinter.fingerprint(c)
+
+    # Sources without a schema keep the default source:service:name:severity key
+    d = {"source": "prometheus", "name": "Disk 91% full", "service": "db", "severity": "high"}
+    e = dict(d, name="Disk 92% full")
+    assert fingerprinter.fingerprint(d) != fingerprinter.fingerprint(e)
+    assert fingerprinter.fingerprint_batch([a, b, d]) == [
+        fingerprinter.fingerprint(a), fingerprinter.fingerprint(b), fingerprinter.fingerprint(d)
+    ]
+
+def test_duplicate_within_event_time_window():
+    """Alerts are judged by started_at, not arrival time"""
+    dedup = AlertDeduplicator(window_minutes=5)
+    first = make_alert("2024-01-15T10:00:00Z")
+    fp = dedup.generate_fingerprint(first)
+
+    assert dedup.is_duplicate(first, fp) is False
+    assert dedup.is_duplicate(make_alert("2024-01-15T10:04:00Z"), fp) is True
+    # Late replay that fired before the first occurrence, still inside the window
+    assert dedup.is_duplicate(make_alert("2024-01-15T09:58:00Z"), fp) is True
+    assert dedup.is_duplicate(make_alert("2024-01-15T10:06:00Z"), fp) is False
+
+def test_closed_windows_are_evicted():
+    """Fingerprints seen once are dropped when the watermark passes their window"""
+    dedup = AlertDeduplicator(window_minutes=5)
+    for i in range(50):
+        alert = make_alert("2024-01-15T10:00:00Z", name=f"Alert {i}")
+        dedup.is_duplicate(alert, dedup.generate_fingerprint(alert))
+    assert dedup.get_cache_stats()["unique_fingerprints"] == 50
+
+    later = make_alert("2024-01-15T11:00:00Z", name="Later")
+    dedup.is_duplicate(later, dedup.generate_fingerprint(later))
+
+    stats = dedup.get_cache_stats()
+    assert stats["unique_fingerprints"] == 1
+    assert stats["expired_evictions"] == 50
+
+def test_far_future_alert_does_not_expire_open_windows():
+    """The watermark is clamped to the wall clock plus a small skew"""
+    dedup = AlertDeduplicator(window_minutes=5)
+    now = datetime.now(timezone.utc)
+    first = make_alert(now.isoformat())
+    fp = dedup.generate_fingerprint(first)
+    assert dedup.is_duplicate(first, fp) is False
+
+    future = make_alert("2099-01-01T00:00:00Z", name="Clock gone wrong")
+    dedup.is_duplicate(future, dedup.generate_fingerprint(future))
+    assert dedup.get_cache_stats()["expired_evictions"] == 0
+    assert dedup.is_duplicate(make_alert(now.isoformat()), fp) is True
+
+def test_memory_cap_evicts_least_recently_seen():
+    """The cache never grows past max_entries"""
+    dedup = AlertDeduplicator(window_minutes=5, max_entries=3)
+    alerts = [make_alert("2024-01-15T10:00:00Z", name=f"Alert {i}") for i in range(4)]
+    fps = [dedup.generate_fingerprint(a) for a in alerts]
+
+    for alert, fp in zip(alerts[:3], fps[:3]):
+        dedup.is_duplicate(alert, fp)
+    # Touch the oldest entry so the second one becomes least recently seen
+    assert dedup.is_duplicate(alerts[0], fps[0]) is True
+    dedup.is_duplicate(alerts[3], fps[3])
+
+    stats = dedup.get_cache_stats()
+    assert stats["cache_size"] == 3
+    assert stats["lru_evictions"] == 1
+    assert fps[1] not in dedup.alert_cache
+    assert fps[0] in dedup.alert_cache
+
+def test_deduplicate_batch():
+    """Batch deduplication keeps the first alert of each fingerprint"""
+    dedup = AlertDeduplicator()
+    alerts = [
+        make_alert("2024-01-15T10:00:00Z"),
+        make_alert("2024-01-15T10:01:00Z"),
+        make_alert("2024-01-15T10:01:00Z", service="database"),
+    ]
+    unique = dedup.deduplicate_batch(alerts)
+    assert len(unique) == 2
+    assert all("fingerprint" in a for a in unique)
+
+def test_aggregate_batch_counts_occurrences():
+    """Aggregating mode folds duplicates into per-fingerprint counters"""
+    dedup = AlertDeduplicator(aggregate=True)
+    alerts = [
+        make_alert("2024-01-15T10:00:00Z"),
+        make_alert("2024-01-15T10:02:00Z"),
+        make_alert("2024-01-15T10:01:00Z"),
+        make_alert("2024-01-15T10:01:00Z", service="database"),
+    ]
+    reps = dedup.deduplicate_batch(alerts)
+
+    assert len(reps) == 2
+    cpu = next(a for a in reps if a["service"] == "api")
+    assert cpu["occurrence_count"] == 3
+    assert cpu["first_seen"].startswith("2024-01-15T10:00:00")
+    assert cpu["last_seen"].startswith("2024-01-15T10:02:00")
+
+    # A later batch inside the same window only updates the counters
+    assert dedup.deduplicate_batch([make_alert("2024-01-15T10:03:00Z")]) == []
+    occurrence = dedup.get_occurrence(cpu["fingerprint"])
+    assert occurrence["occurrence_count"] == 4
+    assert occurrence["last_seen"].startswith("2024-01-15T10:03:00")
+
+    stats = dedup.get_cache_stats()
+    assert stats["occurrences_seen"] == 5
+    assert stats["duplicates_folded"] == 3
+    assert stats["noise_reduction_rate"] == 60.0
+
+@pytest.mark.asyncio
+async def test_shared_store_dedups_across_workers():
+    """Two workers sharing Redis let only one copy of an alert through"""
+    redis = FakeRedis()
+    worker_a = AlertDeduplicator(shared_store=RedisDedupStore(300, client=redis))
+    worker_b = AlertDeduplicator(shared_store=RedisDedupStore(300, client=redis))
+    now = datetime.now(timezone.utc).isoformat()
+
+    alert = make_alert(now)
+    fp = worker_a.generate_fingerprint(alert)
+    assert await worker_a.is_duplicate_async(alert, fp) is False
+    assert await worker_b.is_duplicate_async(make_alert(now), fp) is True
+
+    batch = [make_alert(now), make_alert(now, service="database")]
+    unique = await worker_b.deduplicate_batch_async(batch)
+    assert [a["service"] for a in unique] == ["database"]
+
+@pytest.mark.asyncio
+async def test_redis_store_holds_windows_of_old_alerts():
+    """Replayed alerts older than the window are still deduplicated across workers"""
+    redis = FakeRedis()
+    worker_a = AlertDeduplicator(shared_store=RedisDedupStore(300, client=redis))
+    worker_b = AlertDeduplicator(shared_store=RedisDedupStore(300, client=redis))
+    old = "2024-01-15T10:00:00Z"
+
+    alert = make_alert(old)
+    fp = worker_a.generate_fingerprint(alert)
+    assert await worker_a.is_duplicate_async(alert, fp) is False
+    assert await worker_b.is_duplicate_async(make_alert("2024-01-15T10:02:00Z"), fp) is True
+    assert await worker_b.deduplicate_batch_async([make_alert("2024-01-15T10:03:00Z", service="db")]) != []
+    assert await worker_a.deduplicate_batch_async([make_alert("2024-01-15T10:04:00Z", service="db")]) == []
+    # Past the event-time window a new one opens
+    assert await worker_b.is_duplicate_async(make_alert("2024-01-15T10:08:00Z"), fp) is False
+
+@pytest.mark.asyncio
+async def test_shared_store_falls_back_to_memory():
+    """A Redis outage degrades to per-worker dedup instead of failing"""
+    dedup = AlertDeduplicator(shared_store=RedisDedupStore(300, client=FakeRedis(down=True)))
+    alert = make_alert(datetime.now(timezone.utc).isoformat())
+    fp = dedup.generate_fingerprint(alert)
+
+    assert await dedup.is_duplicate_async(alert, fp) is False
+    assert await dedup.is_duplicate_async(dict(alert), fp) is True
+    stats = dedup.get_cache_stats()
+    assert stats["shared_fallbacks"] == 1
+    assert stats["shared_store"]["available"] is False
+
+def _claim_in_child(name, fingerprint, event_ts, results):
+    store = SharedMemoryDedupStore(300, name=name, slots=1024, stripes=4)
+    results.put(store.claim_sync(fingerprint, event_ts))
+    store.close()
+
+def test_shared_memory_store_across_processes():
+    """Worker processes on one host share a single dedup window"""
+    name = f"msp_dedup_test_{os.getpid()}"
+    store = SharedMemoryDedupStore(300, name=name, slots=1024, stripes=4)
+    try:
+        now = time.time()
+        ctx = multiprocessing.get_context("spawn")
+        results = ctx.Queue()
+        child = ctx.Process(target=_claim_in_child, args=(name, "fp-1", now, results))
+        child.start()
+        child.join(timeout=30)
+        assert results.get(timeout=5) is True
+
+        assert store.claim_sync("fp-1", now + 10) is False
+        assert store.claim_sync("fp-1", now + 301) is True
+        assert store.claim_sync("fp-2", now) is True
+    finally:
+        store.close()
+        store.unlink()
+
+def test_shared_memory_store_evicts_when_stripe_is_full():
+    """A full probe sequence evicts the slot with the earliest expiry"""
+    name = f"msp_dedup_test_full_{os.getpid()}"
+    store = SharedMemoryDedupStore(300, name=name, slots=4, stripes=1, max_probes=4)
+    try:
+        now = time.time()
+        for i in range(5):
+            assert store.claim_sync(f"fp-{i}", now + i) is True
+        assert store.get_stats()["evictions"] == 1
+        # fp-0 had the earliest expiry and was evicted
+        assert store.claim_sync("fp-0", now) is True
+        assert store.claim_sync("fp-4", now + 4) is False
+    finally:
+        store.close()
+        store.unlink()
+
+def test_near_duplicates_fold_per_tenant():
+    """Near-identical titles fold into one group within the same tenant"""
+    dedup = AlertDeduplicator(aggregate=True, near_duplicate=NearDuplicateIndex(threshold=0.8))
+    alerts = [
+        dict(make_alert("2024-01-15T10:00:00Z", name="High CPU Usage on Server-01"), labels={"client": "acme"}),
+        dict(make_alert("2024-01-15T10:01:00Z", name="High CPU usage on server-01 (92%)"), labels={"client": "acme"}),
+        dict(make_alert("2024-01-15T10:01:00Z", name="High CPU usage on server-01 (95%)"), labels={"client": "globex"}),
+        dict(make_alert("2024-01-15T10:02:00Z", name="Disk full on db-02"), labels={"client": "acme"}),
+    ]
+    reps = dedup.deduplicate_batch(alerts)
+
+    assert [(a["name"], a["labels"]["client"]) for a in reps] == [
+        ("High CPU Usage on Server-01", "acme"),
+        ("High CPU usage on server-01 (95%)", "globex"),
+        ("Disk full on db-02", "acme"),
+    ]
+    assert alerts[1]["near_duplicate_of"] == alerts[0]["fingerprint"]
+    stats = dedup.get_cache_stats()
+    assert stats["near_duplicate"]["near_duplicates_folded"] == 1
+    assert stats["duplicates_folded"] == 1
+
+def test_bloom_mode_window_and_stats():
+    """Bloom mode dedups within the window in fixed memory"""
+    bloom = RotatingBloomFilter(300, slices=5, capacity_per_slice=20000, fp_rate=0.01)
+    dedup = AlertDeduplicator(bloom_filter=bloom)
+    first = make_alert("2024-01-15T10:00:00Z")
+    fp = dedup.generate_fingerprint(first)
+
+    assert dedup.is_duplicate(first, fp) is False
+    assert dedup.is_duplicate(make_alert("2024-01-15T10:04:00Z"), fp) is True
+    assert dedup.is_duplicate(make_alert("2024-01-15T10:07:00Z"), fp) is False
+    assert dedup.alert_cache == {}
+
+    # False positives over many distinct fingerprints stay near the target
+    base = 1705312800.0
+    for i in range(10000):
+        bloom.check_and_add(f"seen-{i}", base + 400)
+    false_positives = sum(bloom.check_and_add(f"unseen-{i}", base + 401) for i in range(10000))
+    assert false_positives < 200
+
+    stats = dedup.get_cache_stats()["bloom_filter"]
+    assert 0 < stats["fill_ratio"] < 1
+    assert 0 < stats["estimated_fp_rate"] < 0.05
+    assert stats["memory_bytes"] <= stats["max_memory_bytes"]
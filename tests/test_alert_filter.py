@@ -0,0 +1,268 @@
+"""
+Alert Filter Tests for MSP Alert Intelligence Platform
+"""
+
+import sys
+import os
+import threading
+
+import pytest
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services import multi_pattern
+from services.alert_filter import AlertFilter
+from services.rule_compiler import CompiledRuleSet, PatternGroup
+from services.rule_store import RuleStore
+
+
+def _alert(severity="critical", status="active", name="Disk full", **labels):
+    return {"severity": severity, "status": status, "name": name, "labels": labels}
+
+
+def test_compiled_rules_match_apply_filter():
+    """The compiled rule set agrees with per-rule apply_filter"""
+    engine = AlertFilter()
+    engine.add_rule({"name": "prod_only", "field": "env", "operator": "in", "value": ["prod"]})
+    engine.add_rule({"name": "no_noise", "field": "name", "operator": "not_contains", "value": "NOISE"})
+    alerts = [
+        _alert(env="prod"),
+        _alert(env="staging"),
+        _alert(severity="low", env="prod"),
+        _alert(status="resolved", env="prod"),
+        _alert(name="demo alert", env="prod"),
+        _alert(name="noise burst", env="prod"),
+    ]
+    expected = [a for a in alerts if all(engine.apply_filter(a, r) for r in engine.get_rules())]
+    assert engine.filter_alerts(alerts) == expected == [alerts[0]]
+    assert [engine.passes(a) for a in alerts] == [a in expected for a in alerts]
+
+
+def test_rule_errors_and_unknown_operators_pass():
+    """Invalid regexes and unknown operators default to passing"""
+    rules = CompiledRuleSet([
+        {"name": "broken", "field": "name", "operator": "regex", "value": "("},
+        {"name": "odd", "field": "name", "operator": "sounds_like", "value": "x"},
+    ])
+    assert rules(_alert())
+    assert rules.compiled[0].stats.errors == 1
+
+
+def test_rules_reordered_by_selectivity():
+    """The rule that rejects most alerts moves to the front"""
+    rules = CompiledRuleSet([
+        {"name": "rarely_rejects", "field": "name", "operator": "not_regex", "value": "zzz"},
+        {"name": "usually_rejects", "field": "severity", "operator": "equals", "value": "critical"},
+    ], reorder_interval=10)
+    for i in range(20):
+        rules(_alert(severity="critical" if i % 5 == 0 else "low"))
+    assert rules.order == ["usually_rejects", "rarely_rejects"]
+
+
+def test_add_and_remove_rule_recompile():
+    """Rule changes take effect on the next evaluation"""
+    engine = AlertFilter()
+    alert = _alert(env="staging")
+    assert engine.passes(alert)
+    engine.add_rule({"name": "prod_only", "field": "env", "operator": "equals", "value": "prod"})
+    assert not engine.passes(alert)
+    engine.remove_rule("prod_only")
+    assert engine.passes(alert)
+
+
+def test_columnar_batch_matches_row_path():
+    """Column-wise filtering returns the same alerts and counters as row-by-row"""
+    alerts = []
+    for i in range(600):
+        alert = _alert(
+            severity=["critical", "high", "low", 1, True][i % 5],
+            status="active" if i % 7 else "resolved",
+            name=["CPU high", "test probe", "Disk full", None][i % 4],
+            env=["prod", "staging", ["prod"]][i % 3],
+        )
+        if i % 50 == 0:
+            alert["labels"] = None
+        alerts.append(alert)
+    rules = [
+        {"name": "sev", "field": "severity", "operator": "in", "value": ["critical", "high", 1]},
+        {"name": "active", "field": "status", "operator": "equals", "value": "active"},
+        {"name": "no_test", "field": "name", "operator": "not_regex", "value": "test"},
+        {"name": "env", "field": "env", "operator": "not_contains", "value": "staging"},
+    ]
+    row, batch = CompiledRuleSet(rules, reorder_interval=0), CompiledRuleSet(rules, reorder_interval=0)
+    assert batch.filter_batch(alerts) == [a for a in alerts if row(a)]
+    for r, b in zip(row.compiled, batch.compiled):
+        assert (r.stats.evaluations, r.stats.rejections, r.stats.errors) == (b.stats.evaluations, b.stats.rejections, b.stats.errors)
+
+    engine = AlertFilter()
+    assert engine.filter_alerts(alerts, columnar=True) == engine.filter_alerts(alerts, columnar=False)
+
+
+def test_tenant_rules_only_apply_to_their_tenant():
+    """Tenant rules run on top of global rules, for that tenant's alerts only"""
+    engine = AlertFilter()
+    engine.add_rule({"name": "no_backups", "field": "name", "operator": "not_contains", "value": "backup"}, tenant="acme")
+    acme = _alert(name="Backup job failed", tenant="acme")
+    globex = _alert(name="Backup job failed", tenant="globex")
+    low = _alert(severity="low", tenant="acme")
+    assert not engine.passes(acme)
+    assert engine.passes(globex)
+    assert not engine.passes(low)
+    assert engine.get_rules("acme")[0]["name"] == "no_backups"
+    assert len(engine.get_rules()) == 3
+
+    alerts = [acme, globex, low] * 100
+    assert engine.filter_alerts(alerts, columnar=True) == engine.filter_alerts(alerts, columnar=False) == [globex] * 100
+
+    engine.remove_rule("no_backups", tenant="acme")
+    assert engine.passes(acme)
+    assert engine.tenant_rules == {}
+
+
+def test_filter_stats_are_running_counters():
+    """Per-rule counters accumulate without refiltering and survive rule changes"""
+    engine = AlertFilter()
+    engine.filter_alerts([_alert(), _alert(severity="low"), _alert(status="resolved")], columnar=False)
+    engine.add_rule({"name": "prod_only", "field": "env", "operator": "equals", "value": "prod"})
+    engine.passes(_alert(env="prod"))
+
+    stats = engine.get_filter_stats()
+    assert (stats["total_alerts"], stats["filtered_alerts"], stats["filtered_out"]) == (4, 2, 2)
+    rules = {rule["name"]: rule for rule in stats["rules"]}
+    assert rules["high_severity_only"]["evaluations"] == 4
+    assert rules["high_severity_only"]["rejections"] == 1
+    assert rules["prod_only"]["evaluations"] == 1
+    assert rules["exclude_test_alerts"]["total_ms"] >= 0
+
+    engine.remove_rule("prod_only")
+    assert "prod_only" not in {rule["name"] for rule in engine.get_filter_stats()["rules"]}
+    assert engine.get_filter_stats()["total_alerts"] == 4
+
+
+def test_rule_store_publishes_versioned_snapshots(tmp_path):
+    """File reloads publish a new version; invalid files keep the current one"""
+    path = tmp_path / "rules.yml"
+    path.write_text(
+        "rules:\n"
+        "  - {name: critical_only, field: severity, operator: equals, value: critical}\n"
+        "tenants:\n"
+        "  acme:\n"
+        "    - {name: no_disk, field: name, operator: not_contains, value: disk}\n"
+    )
+    engine = AlertFilter()
+    store = RuleStore(str(path), engine)
+    assert store.reload()
+    version = engine.version
+    assert [rule["name"] for rule in engine.get_rules()] == ["critical_only"]
+    assert engine.decide(_alert(severity="high")) == (False, version)
+    assert engine.decide(_alert(tenant="acme")) == (False, version)
+    assert not store.reload()  # unchanged file
+
+    path.write_text("rules:\n  - {name: broken, field: name, operator: regex, value: '('}\n")
+    assert not store.reload(force=True)
+    assert engine.version == version
+    assert store.get_stats()["failed_reloads"] == 1
+    assert not store.reload()  # the rejected file is not parsed again
+    assert store.get_stats()["failed_reloads"] == 1
+
+
+def test_concurrent_rule_changes_are_not_lost():
+    """Rules added from several threads all end up in the published set"""
+    engine = AlertFilter()
+    engine.publish([], {})
+
+    def add(worker):
+        for i in range(25):
+            engine.add_rule({"name": f"r{worker}_{i}", "field": "env", "operator": "not_in", "value": ["lab"]})
+
+    threads = [threading.Thread(target=add, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(engine.get_rules()) == 100
+
+
+def test_pattern_rules_share_one_matcher():
+    """contains/regex rules on one field merge into a group with per-rule results"""
+    rules = [
+        {"name": "no_backup", "field": "name", "operator": "not_contains", "value": "Backup"},
+        {"name": "no_canary", "field": "name", "operator": "not_regex", "value": r"canar(y|ies)"},
+        {"name": "no_heartbeat", "field": "name", "operator": "not_regex", "value": r"heart\s*beat"},
+        {"name": "needs_host", "field": "name", "operator": "contains", "value": "host"},
+        {"name": "no_lab", "field": "name", "operator": "not_regex", "value": r"\blab\d+"},
+    ]
+    grouped = CompiledRuleSet(rules, reorder_interval=0)
+    groups = [e for e in grouped.evaluators if isinstance(e, PatternGroup)]
+    assert len(groups) == 1
+    # The capture-group regex cannot be merged and stays standalone
+    assert groups[0].names == ["no_backup", "no_heartbeat", "needs_host", "no_lab"]
+
+    names = ["BACKUP on host-1", "Heart beat lost on host-2", "Disk full on host-3", "canaries failing on host",
+             "lab7 host down", "HOST backupheartbeat", "Disk full", None]
+    for name in names:
+        alert = _alert(name=name)
+        expected = [r["name"] for r in rules if not CompiledRuleSet([r], reorder_interval=0)(alert)]
+        failed = [rule.name for rule in groups[0].failures(name)]
+        assert sorted(failed) == sorted(n for n in expected if n != "no_canary")
+        assert grouped(alert) == (not expected)
+
+
+def test_inline_flag_patterns_stay_standalone(tmp_path):
+    """Patterns opening with a global flag group are not merged into an alternation"""
+    engine = AlertFilter()
+    engine.publish([], {})
+    for name, pattern in [("no_foo", "(?i)foo"), ("no_bar", "bar"), ("no_baz", "baz")]:
+        engine.add_rule({"name": name, "field": "title", "operator": "not_regex", "value": pattern})
+    assert engine.passes({"title": "all quiet"})
+    assert not engine.passes({"title": "FOO happened"})
+    assert not engine.passes({"title": "a baz"})
+
+    path = tmp_path / "rules.yml"
+    path.write_text(
+        "rules:\n"
+        "  - {name: a, field: title, operator: not_regex, value: '(?i)foo'}\n"
+        "  - {name: b, field: title, operator: not_regex, value: bar}\n"
+        "  - {name: c, field: title, operator: not_regex, value: baz}\n"
+        "  - {name: d, field: title, operator: not_regex, value: qux}\n"
+    )
+    store = RuleStore(str(path), AlertFilter())
+    assert store.reload()
+    groups = [e for e in store.filter_engine._snapshot.compiled.evaluators if isinstance(e, PatternGroup)]
+    assert groups[0].names == ["b", "c", "d"]
+
+
+@pytest.mark.parametrize("automaton", [True, False])
+def test_multi_pattern_matcher_never_misses_required_patterns(monkeypatch, automaton):
+    """Overlapping matches hide patterns from the one-pass scan unless they are required"""
+    if not automaton:
+        monkeypatch.setattr(multi_pattern, "ahocorasick", None)
+    matcher = multi_pattern.MultiPatternMatcher(["disk", "iskf", "disk", "full"], [r"dis", r"isk\s*full", r"ful+"])
+    assert (matcher._automaton is not None) == automaton
+
+    # "dis" consumes the text "isk full" needs, "ful+" still matches after it
+    assert matcher.match_patterns("disk full") == {0, 2}
+    assert matcher.match_patterns("disk full", required={1}) == {0, 1, 2}
+    assert matcher.match_patterns("cpu high", required={1}) == set()
+
+    literals = matcher.match_literals("diskfull", required={1})
+    assert literals == {0, 1, 2, 3}
+    assert matcher.match_literals("cpu high", required={1}) == set()
+    if automaton:
+        # Aho-Corasick reports overlapping literals without a required hint
+        assert matcher.match_literals("diskfull") == {0, 1, 2, 3}
+    else:
+        assert matcher.match_literals("diskfull") == {0, 2, 3}
+
+
+def test_pattern_group_positive_rule_behind_an_overlapping_match():
+    """A regex rule that must match is not rejected when another member's match covers it"""
+    rules = [
+        {"name": "no_dis", "field": "name", "operator": "not_regex", "value": r"dis"},
+        {"name": "needs_disk_full", "field": "name", "operator": "regex", "value": r"isk\s*full"},
+        {"name": "no_lab", "field": "name", "operator": "not_regex", "value": r"\blab\d+"},
+    ]
+    groups = [e for e in CompiledRuleSet(rules, reorder_interval=0).evaluators if isinstance(e, PatternGroup)]
+    assert [rule.name for rule in groups[0].failures("Disk full")] == ["no_dis"]
+    assert [rule.name for rule in groups[0].failures("Memory high")] == ["needs_disk_full"]
@@ -0,0 +1,366 @@
+"""
+Correlation Tests for MSP Alert Intelligence Platform
+"""
+
+import sys
+import os
+import random
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import Column, MetaData, Table, Uuid, create_engine, insert
+from sqlmodel import Session, select
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.temporal_correlation import temporal_clusters
+from services.correlation_engine import StreamingCorrelator
+from services.topology import ServiceTopology
+from services.similarity_join import jaccard, similar_pairs
+from services.correlation_grouping import group_edges
+from services.text_similarity import TextSimilarityIndex
+from services.entity_extraction import EntityExtractor, EntityIndex
+from agents.agent_orchestrator import AgentOrchestrator
+from models.alert import Alert, AlertCorrelationGroup, AlertCorrelationMember, AlertSeverity, AlertSource
+from services.correlation_service import CorrelationService
+from agents.bedrock_agentcore import BedrockAgentCoreManager
+
+
+def _alert(alert_id, minutes, **fields):
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minutes)
+    return {"id": alert_id, "created_at": created.isoformat().replace("+00:00", "Z"), **fields}
+
+
+def test_temporal_clusters_are_disjoint_and_bounded_by_window():
+    """Every alert lands in at most one cluster whose spread is within the window"""
+    random.seed(7)
+    alerts = [_alert(f"a{i}", random.uniform(0, 60)) for i in range(500)]
+    clusters = temporal_clusters(alerts, window=300)
+
+    seen = set()
+    for start, end, members in clusters:
+        assert len(members) >= 2
+        assert end - start <= 300
+        ids = {alert["id"] for alert in members}
+        assert not ids & seen
+        seen |= ids
+    # Dense input leaves nothing unclustered except possibly a lone trailer
+    assert len(seen) >= len(alerts) - 1
+
+
+def test_orchestrator_honors_correlation_window():
+    """Temporal correlations use the configured window and emit clusters"""
+    alerts = [_alert("a", 0), _alert("b", 4), _alert("c", 20), _alert("d", 24), _alert("e", 90)]
+
+    narrow = AgentOrchestrator(None, None, correlation_window=300)
+    correlations = narrow._find_temporal_correlations(alerts)
+    assert [c["alerts"] for c in correlations] == [["a", "b"], ["c", "d"]]
+
+    wide = AgentOrchestrator(None, None, correlation_window=1800)
+    correlations = wide._find_temporal_correlations(alerts)
+    assert [c["alerts"] for c in correlations] == [["a", "b", "c", "d"]]
+    assert correlations[0]["alert_count"] == 4
+
+
+def test_streaming_correlator_links_alerts_across_batches():
+    """Alerts sharing a service or instance join one group until it goes idle"""
+    correlator = StreamingCorrelator(window_seconds=600)
+    first = correlator.observe_batch([_alert("a", 0, service="db"), _alert("b", 1, labels={"instance": "h1"})])
+    assert len(first) == 2
+
+    # A later delivery naming both entities merges the two open groups
+    group = correlator.observe(_alert("c", 5, service="db", labels={"instance": "h1"}))
+    assert sorted(group.alert_ids) == ["a", "b", "c"]
+    assert correlator.get_stats()["groups_merged"] == 1
+
+    # Once idle past the window, the group closes and a new one opens
+    later = correlator.observe(_alert("d", 60, service="db"))
+    assert later.group_id != group.group_id
+    assert later.alert_ids == ["d"]
+    assert correlator.get_group(group.group_id).closed
+    assert correlator.get_stats()["open_groups"] == 1
+
+    # Alerts without a service or instance are not correlated
+    assert correlator.observe(_alert("e", 61)) is None
+
+
+def test_merged_group_ids_resolve_to_the_surviving_group():
+    """Ids handed out before a merge still look up the group that absorbed them"""
+    correlator = StreamingCorrelator(window_seconds=600, max_closed=1)
+    db = correlator.observe(_alert("a", 0, service="db"))
+    web = correlator.observe(_alert("b", 1, service="web"))
+    cache = correlator.observe(_alert("c", 2, service="cache"))
+    correlator.observe(_alert("d", 3, service="db", labels={"instance": "h1"}))
+    # Two merges: the ids folded in by the first still resolve after the second
+    correlator.observe(_alert("e", 4, service="web", labels={"instance": "h1"}))
+    survivor = correlator.observe(_alert("f", 5, service="cache", labels={"instance": "h1"}))
+    assert survivor.group_id in (db.group_id, web.group_id, cache.group_id)
+    assert sorted(survivor.alert_ids) == ["a", "b", "c", "d", "e", "f"]
+    merged = [group for group in (db, web, cache) if group is not survivor]
+    for group in merged:
+        assert group.closed and group.merged_into == survivor.group_id
+        assert correlator.get_group(group.group_id) is survivor
+    assert sorted(survivor.to_dict()["merged_ids"]) == sorted(group.group_id for group in merged)
+
+    # Aliases live as long as the surviving group can be looked up
+    correlator.observe(_alert("g", 1000, service="api"))
+    assert correlator.get_group(merged[0].group_id) is survivor and survivor.closed
+    correlator.observe(_alert("h", 2000, service="api"))
+    assert correlator.get_group(merged[0].group_id) is None
+    assert correlator._aliases == {}
+
+
+def test_streaming_correlator_closes_groups_of_late_alerts():
+    """A group opened by an out-of-order alert still closes as time moves on"""
+    correlator = StreamingCorrelator(window_seconds=1800)
+    correlator.observe({"id": "now", "service": "web"}, ts=10000)
+    late = correlator.observe({"id": "late", "service": "db"}, ts=0)
+    for i in range(200):
+        correlator.observe({"id": f"n{i}", "service": "web"}, ts=10000 + i * 60)
+    assert correlator.get_group(late.group_id).closed
+    assert all(group["group_id"] != late.group_id for group in correlator.get_groups(min_size=1))
+    assert sum(len(ids) for ids in correlator._buckets.values()) == correlator.get_stats()["open_groups"]
+
+
+def test_topology_incremental_updates_match_full_rebuild():
+    """Adding and removing edges leaves the same neighbourhoods as a rebuild"""
+    random.seed(11)
+    nodes = [f"svc{i}" for i in range(40)]
+    edges = set()
+    topology = ServiceTopology(max_hops=3)
+    for _ in range(200):
+        edge = tuple(random.sample(nodes, 2))
+        if edge in edges and random.random() < 0.5:
+            edges.discard(edge)
+            assert topology.remove_dependency(*edge)
+        else:
+            edges.add(edge)
+            topology.add_dependency(*edge)
+
+    dependencies = {}
+    for service, target in edges:
+        dependencies.setdefault(service, []).append(target)
+    rebuilt = ServiceTopology(dependencies, max_hops=3)
+    for node in nodes:
+        assert topology.neighbors(node) == rebuilt.neighbors(node)
+
+
+def test_topology_links_dependent_services():
+    """Alerts on services within the hop limit are correlated"""
+    topology = ServiceTopology({"api": ["database"], "web": ["api"], "database": ["storage"]}, max_hops=1,
+                               normalize=EntityExtractor().normalize_id)
+    assert topology.related("api", "database")
+    assert not topology.related("web", "database")
+
+    correlator = StreamingCorrelator(window_seconds=600, topology=topology)
+    database = correlator.observe(_alert("a", 0, service="database"))
+    api = correlator.observe(_alert("b", 2, service="api"))
+    assert api is database
+    assert correlator.observe(_alert("c", 3, service="billing")) is not database
+
+    orchestrator = AgentOrchestrator(None, None, topology=topology)
+    alerts = [_alert("d", 0, service="database"), _alert("e", 1, service="api"), _alert("f", 1, service="billing")]
+    correlations = orchestrator._find_topology_correlations(
+        {alert["service"]: [alert] for alert in alerts}
+    )
+    assert [c["services"] for c in correlations] == [["api", "database"]]
+
+
+def test_similarity_correlation_matches_pairwise_scan():
+    """Indexed similarity correlation returns exactly the pairwise result"""
+    random.seed(3)
+    words = ["high", "cpu", "usage", "on", "server", "disk", "full", "db", "latency", "api", "memory", "pod"]
+    alerts = [
+        {"id": f"a{i}", "title": " ".join(random.choice(words) for _ in range(random.randint(0, 6)))}
+        for i in range(300)
+    ]
+    token_sets = [set(alert["title"].lower().split()) for alert in alerts]
+    expected = [
+        (i, j, jaccard(token_sets[i], token_sets[j]))
+        for i in range(len(alerts)) for j in range(i + 1, len(alerts))
+        if jaccard(token_sets[i], token_sets[j]) > 0.7
+    ]
+    assert similar_pairs(token_sets, 0.7) == expected
+
+    pairs = [(alerts[i]["id"], alerts[j]["id"], similarity) for i, j, similarity in expected]
+    result = asyncio.run(BedrockAgentCoreManager()._correlate_alerts({"alerts": alerts}))
+    assert "correlations" not in result
+    assert result["correlation_count"] == len(pairs)
+    grouped = [(e["alert1_id"], e["alert2_id"], e["confidence"]) for group in result["groups"] for e in group["edges"]]
+    assert sorted(grouped) == sorted(pairs)
+    for group in result["groups"]:
+        assert {e["alert1_id"] for e in group["edges"]} <= set(group["alert_ids"])
+
+    result = asyncio.run(BedrockAgentCoreManager()._correlate_alerts({"alerts": alerts, "include_pairs": True}))
+    assert [(c["alert1_id"], c["alert2_id"], c["confidence"]) for c in result["correlations"]] == pairs
+
+
+def test_group_edges_collapses_pairs_into_components():
+    """Correlation edges become one group per connected component"""
+    edges = [("a", "b", 0.8, "similarity"), ("c", "d", 0.9, "temporal"), ("b", "e", 0.6, "temporal"), ("e", "a", 1.0, "similarity")]
+    groups = group_edges(edges, items=["e", "d", "c", "b", "a", "z"])
+    assert [group["alert_ids"] for group in groups] == [["e", "b", "a"], ["d", "c"]]
+    assert groups[0]["edge_count"] == 3
+    assert groups[0]["confidence"] == 0.8
+    assert groups[0]["max_confidence"] == 1.0
+    assert groups[0]["correlation_types"] == ["similarity", "temporal"]
+
+    # A long chain stays one group
+    chain = [(f"n{i}", f"n{i + 1}", 0.5, "temporal") for i in range(5000)]
+    assert [group["alert_count"] for group in group_edges(chain)] == [5001]
+
+
+def test_text_similarity_scores_match_full_cosine_scan():
+    """Pruned sparse scoring finds exactly the window alerts a full scan finds"""
+    random.seed(5)
+    words = ["disk", "full", "cpu", "high", "latency", "api", "db", "timeout", "pool", "exhausted", "node", "restart"]
+    index = TextSimilarityIndex(threshold=0.5, window_seconds=3600)
+    for i in range(400):
+        alert = _alert(
+            f"a{i}", i / 10,
+            title=" ".join(random.choice(words) for _ in range(4)),
+            labels={"service": f"svc{random.randrange(5)}"},
+        )
+        window = next(iter(index._windows.values()), None)
+        expected = set()
+        if window:
+            vector = index.vectorize(alert, window)
+            for alert_id, _, other in window.docs.values():
+                score = sum(weight * other.get(feature, 0.0) for feature, weight in vector.items())
+                if score >= 0.5 - 1e-9:
+                    expected.add(alert_id)
+        assert {alert_id for alert_id, _ in index.add(alert, limit=1000)} == expected
+
+    # Alerts from another tenant never match
+    other_tenant = _alert("x", 41, title="disk full cpu high", labels={"tenant": "acme"})
+    assert index.add(other_tenant) == []
+
+
+def test_entities_are_normalized_across_label_keys():
+    """instance, host and hostname labels naming one machine map to one entity"""
+    extractor = EntityExtractor(strip_domain=True)
+    assert extractor.extract({"labels": {"instance": "Server-01:9100"}}) == [("host", "server-01")]
+    assert extractor.extract({"labels": {"hostname": "server-01.acme.local"}}) == [("host", "server-01")]
+    assert extractor.extract({"host": "10.0.0.12:9100"}) == [("host", "10.0.0.12")]
+    assert extractor.extract({"host": "fe80::1"}) == [("host", "fe80::1")]
+    assert extractor.extract({"host": "[fe80::1]:9100"}) == [("host", "fe80::1")]
+    # Only host names lose ports and domains
+    assert extractor.extract({"service": "Payments.v2"}) == [("service", "payments.v2")]
+
+    # Domains are kept by default, so equal names in different domains stay apart
+    plain = EntityExtractor()
+    assert plain.extract({"host": "db-01.eu.prod"}) != plain.extract({"host": "db-01.us.prod"})
+
+    alert = {"service": "api", "labels": {"node": "worker-3", "pod": "api-7d9f"}}
+    assert extractor.annotate(alert) == ["service:api", "host:worker-3", "pod:api-7d9f"]
+    assert extractor.extract(alert) == [("service", "api"), ("host", "worker-3"), ("pod", "api-7d9f")]
+
+    custom = EntityExtractor({"host": ["kubernetes_node"]})
+    assert custom.extract({"labels": {"kubernetes_node": "n1", "instance": "n1"}}) == [("host", "n1")]
+
+    # An upstream entities list in another format is not taken as the cache
+    upstream = {"host": "web-01", "entities": ["web-01", {"id": 3}]}
+    assert extractor.extract(upstream) == [("host", "web-01")]
+    correlator = StreamingCorrelator(extractor=extractor)
+    assert {key[1:] for key in correlator.observe(dict(upstream, id="u1")).entities} == {("host", "web-01")}
+
+    # Annotating keeps upstream entries and adds the extracted IDs after them
+    assert extractor.annotate(dict(upstream)) == ["web-01", {"id": 3}, "host:web-01"]
+    assert extractor.annotate({"host": "web-01", "entities": ["host:web-01"]}) == ["host:web-01"]
+    assert extractor.annotate({"host": "web-01", "entities": "checkout"}) == ["checkout", "host:web-01"]
+
+
+def test_entity_index_joins_alerts_on_shared_entities():
+    """Recent alerts sharing an entity are found by hash lookup within the window"""
+    index = EntityIndex(EntityExtractor(strip_domain=True), window_seconds=600)
+    assert index.add(_alert("a", 0, labels={"instance": "db-01:9187"})) == []
+    assert index.add(_alert("b", 1, labels={"hostname": "db-01.prod"})) == [("a", ("host", "db-01"))]
+    assert index.add(_alert("c", 2, labels={"host": "web-01"})) == []
+    # Outside the window the earlier alerts no longer match
+    assert index.add(_alert("d", 30, labels={"node": "db-01"})) == []
+
+    correlator = StreamingCorrelator(window_seconds=600)
+    first = correlator.observe(_alert("e", 0, labels={"instance": "cache-1:6379"}))
+    assert correlator.observe(_alert("f", 1, labels={"hostname": "cache-1"})) is first
+
+    # Entities idle past the window are pruned as event time moves on
+    for i in range(100):
+        index.add(_alert(f"pod{i}", 40 + i / 10, labels={"pod": f"batch-{i}"}))
+    index.add(_alert("g", 80, labels={"pod": "batch-late"}))
+    assert index.get_stats()["entities"] == 1
+
+    # Topology nodes are normalized like alert entities and keep their kind
+    topology = ServiceTopology({"Payments.V2": ["host:DB-01.prod"]}, max_hops=1,
+                               normalize=correlator.extractor.normalize_id)
+    assert topology.to_dict() == {"service:payments.v2": ["host:db-01.prod"]}
+    linked = StreamingCorrelator(window_seconds=600, topology=topology)
+    group = linked.observe(_alert("h", 0, service="payments.v2"))
+    assert linked.observe(_alert("i", 1, labels={"host": "db-01.prod:5432"})) is group
+    # A service that happens to share the host's name is not its neighbour
+    assert linked.observe(_alert("j", 2, service="db-01.prod")) is not group
+
+
+def _correlation_db():
+    """SQLite session with the alert and correlation tables"""
+    metadata = MetaData()
+    # alerts.incident_id references incidents, whose model is not importable here
+    Table("incidents", metadata, Column("id", Uuid, primary_key=True))
+    for model in (Alert, AlertCorrelationGroup, AlertCorrelationMember):
+        model.__table__.to_metadata(metadata)
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    return Session(engine)
+
+
+def _stored_alert(db, minutes, source=AlertSource.PROMETHEUS, **labels):
+    alert_id = uuid4()
+    db.execute(insert(Alert.__table__), [{
+        "id": alert_id, "title": "disk full", "severity": AlertSeverity.HIGH, "source": source,
+        "source_id": "x", "fingerprint": "fp", "labels": labels, "annotations": {},
+        "started_at": datetime(2024, 1, 1) + timedelta(minutes=minutes), "created_at": datetime(2024, 1, 1),
+    }])
+    return alert_id
+
+
+def test_sql_correlation_groups_chained_alerts_per_source_and_instance():
+    """The gaps-and-islands query chains alerts per (source, instance) and skips unlabeled alerts"""
+    db = _correlation_db()
+    chain = [_stored_alert(db, minutes, instance="h1") for minutes in (0, 4, 8)]
+    alerts = chain + [
+        _stored_alert(db, 40, instance="h1"),  # gap past the window
+        _stored_alert(db, 1), _stored_alert(db, 2),  # no instance label
+        _stored_alert(db, 1, instance="h2"), _stored_alert(db, 2, source=AlertSource.DATADOG, instance="h2"),
+    ]
+    db.commit()
+
+    result = asyncio.run(CorrelationService(db).correlate_alerts(alerts, 300))
+    assert [group["alert_ids"] for group in result.correlations] == [[str(alert_id) for alert_id in chain]]
+    assert result.correlations[0]["instance"] == "h1"
+    assert result.correlations[0]["source"] == "prometheus"
+    assert result.correlation_stats["correlated_alerts"] == 3
+
+
+def test_correlation_groups_round_trip_through_membership_table():
+    """Saved groups are stored once and loaded per alert with their fellow members"""
+    db = _correlation_db()
+    a, b, c, d, lone = (_stored_alert(db, minutes, instance="h1") for minutes in range(5))
+    db.commit()
+    service = CorrelationService(db)
+    saved = asyncio.run(service.save_correlations([
+        {"alert_ids": [a, b, c, a], "correlation_type": "temporal", "confidence": 0.9},
+        {"alert_ids": [c, d], "correlation_types": ["similarity", "entity"], "confidence": 0.7},
+        {"alert_ids": [lone], "correlation_type": "temporal", "confidence": 0.5},  # singletons are skipped
+    ]))
+    assert saved == 2
+
+    correlations = service.get_correlations([a, c, lone])
+    assert [sorted(group["correlated_alert_ids"]) for group in correlations[a]] == [sorted([str(b), str(c)])]
+    assert correlations[a][0]["correlation_type"] == "temporal"
+    assert sorted((group["correlation_type"], sorted(group["correlated_alert_ids"])) for group in correlations[c]) == [
+        ("similarity+entity", [str(d)]),
+        ("temporal", sorted([str(a), str(b)])),
+    ]
+    assert correlations[lone] == []
+    assert db.exec(select(AlertCorrelationGroup.alert_count)).all() in ([3, 2], [2, 3])
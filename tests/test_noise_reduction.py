@@ -0,0 +1,123 @@
+"""
+Noise Reduction Tests for MSP Alert Intelligence Platform
+"""
+
+import sys
+import os
+import random
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from services.flap_detector import FlapDetector
+from services.silence_engine import SilenceEngine, _stab
+from services.throttler import AlertThrottler
+
+
+def test_flapping_alert_is_collapsed_until_stable():
+    """Oscillating alerts are suppressed until they stop transitioning"""
+    detector = FlapDetector(window_seconds=600, flap_threshold=4, stable_seconds=300)
+    statuses = ["firing", "resolved", "firing", "resolved"]
+    results = [detector.observe("fp-1", status, 1000 + i * 10) for i, status in enumerate(statuses)]
+    assert results == [None, None, None, None]
+
+    # Fourth transition inside the window marks the alert as flapping
+    held = detector.observe("fp-1", "firing", 1040, {"id": "a"})
+    assert held["state"] == "flapping"
+    assert held["transitions_in_window"] == 4
+    held = detector.observe("fp-1", "resolved", 1050)
+    assert held["updates_suppressed"] == 2
+    assert list(detector.get_flapping()) == ["fp-1"]
+
+    assert detector.get_stats()["flapping_alerts"][0]["fingerprint"] == "fp-1"
+
+    # No transition for stable_seconds: processed normally again
+    assert detector.observe("fp-1", "resolved", 1400) is None
+    assert detector.get_stats() == {
+        "tracked_fingerprints": 1,
+        "flapping": 0,
+        "updates_suppressed": 2,
+        "flaps_stabilized": 1,
+        "flapping_alerts": [],
+    }
+
+def test_quiet_flap_stabilizes_against_the_watermark():
+    """A flap that goes quiet ends when other alerts advance the watermark"""
+    detector = FlapDetector(window_seconds=600, flap_threshold=4, stable_seconds=300)
+    for i, status in enumerate(["firing", "resolved", "firing", "resolved", "firing"]):
+        detector.observe("fp-1", status, 1000 + i * 10, {"id": f"a{i}", "status": status})
+    held = detector.observe("fp-1", "resolved", 1050, {"id": "final", "status": "resolved"})
+    assert held["state"] == "flapping"
+
+    # Still inside stable_seconds of the last transition
+    assert detector.observe("fp-2", "firing", 1200) is None
+    assert detector.pop_stabilized() == []
+
+    assert detector.observe("fp-2", "firing", 1350) is None
+    stabilized = detector.pop_stabilized()
+    assert [(s["fingerprint"], s["state"], s["current_status"]) for s in stabilized] == [("fp-1", "stable", "resolved")]
+    assert stabilized[0]["alert"] == {"id": "final", "status": "resolved"}
+    assert detector.get_flapping() == {}
+    assert detector.pop_stabilized() == []
+
+def test_slow_transitions_do_not_flap():
+    """Transitions spread beyond the window never reach the threshold"""
+    detector = FlapDetector(window_seconds=600, flap_threshold=3)
+    for i, status in enumerate(["firing", "resolved", "firing", "resolved", "firing"]):
+        assert detector.observe("fp-1", status, i * 400) is None
+
+
+def test_silence_matches_only_active_windows_and_labels():
+    """Alerts are silenced only inside a window whose matchers they all carry"""
+    now = time.time()
+    engine = SilenceEngine()
+    engine.add_silence({"client": "acme", "instance": "server-01"}, now, now + 1000, kind="maintenance_window")
+    engine.add_silence({"client": "globex"}, now + 500, now + 600)
+    engine.add_silence({}, now + 4000, now + 4100)
+
+    acme = {"labels": {"client": "acme", "instance": "server-01"}}
+    assert engine.match(acme, now + 500).kind == "maintenance_window"
+    assert engine.match(acme, now + 1000) is None
+    assert engine.match({"labels": {"client": "acme", "instance": "server-02"}}, now + 500) is None
+    assert engine.match({"client": "globex"}, now + 550) is not None
+    assert engine.match({"client": "globex"}, now + 700) is None
+    assert engine.match({"client": "initech"}, now + 4050) is not None
+
+
+def test_silence_interval_tree_agrees_with_linear_scan():
+    """Stabbing queries return exactly the windows a linear scan finds"""
+    rng = random.Random(3)
+    now = time.time()
+    engine = SilenceEngine()
+    windows = []
+    for i in range(500):
+        start = now + rng.uniform(0, 10000)
+        end = start + rng.uniform(1, 500)
+        windows.append((start, end))
+        engine.add_silence({"instance": "server-01"}, start, end, silence_id=str(i))
+    tree = engine._index.trees[("instance", "server-01")]
+    for ts in [now + rng.uniform(-100, 10600) for _ in range(300)]:
+        expected = {str(i) for i, (start, end) in enumerate(windows) if start <= ts < end}
+        assert {silence.silence_id for silence in _stab(tree, ts)} == expected
+
+
+def test_throttler_limits_each_source_and_service():
+    """Alerts beyond a bucket's burst are counted until tokens refill"""
+    throttler = AlertThrottler(rate_per_minute=60, burst=2, service_rate_per_minute=60, service_burst=3)
+    alert = {"source": ["prometheus"], "labels": {"client": "acme"}}
+    results = [throttler.check(alert, 1000.0) for _ in range(4)]
+    assert results[:2] == [None, None]
+    assert results[2] == {"scope": "source", "key": "acme/prometheus", "throttled_count": 1}
+    assert results[3]["throttled_count"] == 2
+
+    # Alerts of one service share the service bucket across sources
+    billing = {"service": "billing", "labels": {"client": "acme"}}
+    assert [throttler.check({**billing, "source": source}, 1000.0) for source in ("a", "b", "c")] == [None] * 3
+    assert throttler.check({**billing, "source": "d"}, 1000.0)["scope"] == "service"
+    # Other tenants have their own buckets
+    assert throttler.check({"source": ["prometheus"], "labels": {"client": "globex"}}, 1000.0) is None
+
+    # One token per second refills lazily
+    assert throttler.check(alert, 1001.0) is None
+    assert throttler.get_stats()["throttled"] == 3